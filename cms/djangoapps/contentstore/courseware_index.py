@@ -2,11 +2,14 @@
 from __future__ import absolute_import
 from abc import ABCMeta, abstractmethod
 from datetime import timedelta
+import json
 import logging
 import re
 from six import add_metaclass
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import ugettext as _
 from django.core.urlresolvers import resolve
 
@@ -14,6 +17,7 @@ from contentstore.utils import course_image_url
 from contentstore.course_group_config import GroupConfiguration
 from course_modes.models import CourseMode
 from eventtracking import tracker
+from opaque_keys.edx.keys import UsageKey
 from search.search_engine_base import SearchEngine
 from xmodule.annotator_mixin import html_to_text
 from xmodule.modulestore import ModuleStoreEnum
@@ -26,6 +30,10 @@ from xmodule.library_tools import normalize_key_for_search
 # how far back from the trigger point to look back in order to index
 REINDEX_AGE = timedelta(0, 60)  # 60 seconds
 
+# Key of the cache entry recording the (split modulestore) structure version of a course
+# or library that was last indexed, which changes are identified from when it's next indexed
+INDEXED_STATE_CACHE_KEY = u'courseware_index.indexed_state.{}'
+
 log = logging.getLogger('edx.modulestore')
 
 
@@ -56,6 +64,56 @@ class SearchIndexingError(Exception):
         self.error_list = error_list
 
 
+class StructureChanges(object):
+    """
+    The blocks to index after a split modulestore structure changed from
+    `old_blocks` to `new_blocks` (dicts of BlockData by BlockKey), given the
+    block keys whose content groups usage changed meanwhile.
+
+    Blocks whose content or children changed are reindexed. Blocks that are new,
+    moved, or whose settings changed are reindexed along with their descendants,
+    which inherit their settings and show their names in their location.
+    """
+    def __init__(self, old_blocks, new_blocks, changed_group_usage_keys=()):
+        # Blocks to reindex
+        self.reindex = set(changed_group_usage_keys) & set(new_blocks)
+        # Blocks to reindex along with their descendants
+        self.subtrees = set()
+        # Blocks to remove from the index
+        self.removed = set(old_blocks) - set(new_blocks)
+
+        parents = {}
+        for block_key, block in new_blocks.iteritems():
+            children = block.fields.get('children', [])
+            for child_key in children:
+                parents[child_key] = block_key
+
+            old_block = old_blocks.get(block_key)
+            if old_block is None:
+                self.subtrees.add(block_key)
+                continue
+            old_children = old_block.fields.get('children', [])
+            if self._settings(old_block) != self._settings(block) or old_block.defaults != block.defaults:
+                self.subtrees.add(block_key)
+            elif old_block.definition != block.definition or old_children != children:
+                self.reindex.add(block_key)
+            self.subtrees.update(set(children) - set(old_children))
+
+        # Blocks to walk through to reach those to index
+        self.visit = set()
+        for block_key in self.reindex | self.subtrees:
+            while block_key is not None and block_key not in self.visit:
+                self.visit.add(block_key)
+                block_key = parents.get(block_key)
+
+    @staticmethod
+    def _settings(block):
+        """
+        Returns the settings of the block, other than its children.
+        """
+        return {name: value for name, value in block.fields.iteritems() if name != 'children'}
+
+
 @add_metaclass(ABCMeta)
 class SearchIndexerBase(object):
     """
@@ -130,6 +188,10 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+            For split modulestore structures that have been indexed before, updates
+            instead only index the blocks that changed since the indexed version of
+            the structure (see StructureChanges), and remove the deleted ones
+
         Returns:
         Number of items that have been added to the index
         """
@@ -163,7 +225,13 @@ class SearchIndexerBase(object):
             """
             return item.location.version_agnostic().replace(branch=None)
 
-        def prepare_item_index(item, skip_index=False, groups_usage_info=None):
+        def get_block_key(item):
+            """
+            Gets the (block type, block id) of the item, which equals its split modulestore BlockKey
+            """
+            return (item.location.block_type, item.location.block_id)
+
+        def prepare_item_index(item, skip_index=False, groups_usage_info=None, in_changed_subtree=False):
             """
             Add this item to the items_index and indexed_items list
 
@@ -175,10 +243,18 @@ class SearchIndexerBase(object):
                 This should really only be passed from the recursive child calls when
                 this method has determined that it is safe to do so
 
+            in_changed_subtree - when indexing structure changes, whether an ancestor
+                of the item is to be reindexed along with its descendants
+
             Returns:
             item_content_groups - content groups assigned to indexed item
             """
-            is_indexable = hasattr(item, "index_dictionary")
+            if changes is not None:
+                in_changed_subtree = in_changed_subtree or get_block_key(item) in changes.subtrees
+                skip_index = not (in_changed_subtree or get_block_key(item) in changes.reindex)
+
+            # When indexing structure changes, items the changes don't affect aren't rendered
+            is_indexable = hasattr(item, "index_dictionary") and not (changes is not None and skip_index)
             item_index_dictionary = item.index_dictionary() if is_indexable else None
             # if it's not indexable and it does not have children, then ignore
             if not item_index_dictionary and not item.has_children:
@@ -214,12 +290,18 @@ class SearchIndexerBase(object):
                     (triggered_at is not None and (triggered_at - item.subtree_edited_on) > reindex_age)
                 children_groups_usage = []
                 for child_item in item.get_children():
-                    if modulestore.has_published_version(child_item):
+                    child_is_unchanged = changes is not None and not in_changed_subtree and \
+                        get_block_key(child_item) not in changes.visit
+                    if child_is_unchanged:
+                        # Nothing to index within the child
+                        children_groups_usage.append(None)
+                    elif modulestore.has_published_version(child_item):
                         children_groups_usage.append(
                             prepare_item_index(
                                 child_item,
                                 skip_index=skip_child_index,
-                                groups_usage_info=groups_usage_info
+                                groups_usage_info=groups_usage_info,
+                                in_changed_subtree=in_changed_subtree
                             )
                         )
                 if None in children_groups_usage:
@@ -246,19 +328,30 @@ class SearchIndexerBase(object):
                 log.warning('Could not index item: %s - %r', item.location, err)
                 error_list.append(_('Could not index item: {}').format(item.location))
 
+        changes = None
+        indexed_state = None
         try:
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
                 structure = cls._fetch_top_level(modulestore, structure_key)
                 groups_usage_info = cls.fetch_group_usage(modulestore, structure)
+                indexed_state = cls._get_indexed_state(structure, groups_usage_info)
+                if triggered_at is not None:
+                    changes = cls._get_structure_changes(structure, structure_key, indexed_state)
 
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
-                # Now index the content
+                # Now index the content; every item inherits the settings of the structure object
+                root_changed = changes is not None and get_block_key(structure) in changes.subtrees
                 for item in structure.get_children():
-                    prepare_item_index(item, groups_usage_info=groups_usage_info)
-                searcher.index(cls.DOCUMENT_TYPE, items_index)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                    if changes is None or root_changed or get_block_key(item) in changes.visit:
+                        prepare_item_index(item, groups_usage_info=groups_usage_info, in_changed_subtree=root_changed)
+                for items_batch in cls._batch_items_index(items_index):
+                    searcher.index(cls.DOCUMENT_TYPE, items_batch)
+                if changes is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_items)
+                elif changes.removed:
+                    searcher.remove(cls.DOCUMENT_TYPE, cls._get_item_ids(structure, changes.removed))
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -271,8 +364,98 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
+        if indexed_state is not None:
+            cache.set(INDEXED_STATE_CACHE_KEY.format(structure_key), indexed_state)
+
         return indexed_count["count"]
 
+    @classmethod
+    def _batch_items_index(cls, items_index):
+        """
+        Splits the items index dictionaries into batches to send to the search
+        engine together, whose JSON adds up to at most
+        SEARCH_INDEX_BATCH_MAX_BYTES (unless a single item is larger).
+        Returns a single batch if they all fit, or there are none.
+        """
+        max_bytes = getattr(settings, 'SEARCH_INDEX_BATCH_MAX_BYTES', None)
+        if not max_bytes:
+            return [items_index]
+
+        batches = [[]]
+        batch_bytes = 0
+        for item_index in items_index:
+            item_bytes = len(json.dumps(item_index, cls=DjangoJSONEncoder))
+            if batches[-1] and batch_bytes + item_bytes > max_bytes:
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append(item_index)
+            batch_bytes += item_bytes
+        return batches
+
+    @classmethod
+    def _get_indexed_state(cls, structure, groups_usage_info):
+        """
+        Returns what identifies the changes to the structure object from the
+        indexed version when it's next indexed: the split modulestore structure
+        it was loaded from, and its content groups usage. Returns None for other
+        modulestores.
+        """
+        course_entry = getattr(structure.runtime, 'course_entry', None)
+        if course_entry is None:
+            return None
+        return {
+            'version': course_entry.structure['_id'],
+            'groups_usage': dict(groups_usage_info or {}),
+        }
+
+    @classmethod
+    def _get_structure_changes(cls, structure, structure_key, indexed_state):
+        """
+        Returns the StructureChanges since the last indexed version of the
+        structure object, or None if they can't be identified.
+        """
+        if indexed_state is None:
+            return None
+        previous_state = cache.get(INDEXED_STATE_CACHE_KEY.format(structure_key))
+        if previous_state is None:
+            return None
+
+        # The indexed version may since have been removed from the modulestore,
+        # in which case the whole structure has to be reindexed.
+        runtime = structure.runtime
+        previous_structures = runtime.modulestore.find_structures_by_id([previous_state['version']])
+        if not previous_structures:
+            return None
+        previous_structure = previous_structures[0]
+
+        previous_groups_usage = previous_state['groups_usage']
+        groups_usage = indexed_state['groups_usage']
+        changed_group_usage_keys = set()
+        for usage_key_string in set(previous_groups_usage) | set(groups_usage):
+            if previous_groups_usage.get(usage_key_string) != groups_usage.get(usage_key_string):
+                usage_key = UsageKey.from_string(usage_key_string)
+                changed_group_usage_keys.add((usage_key.block_type, usage_key.block_id))
+
+        return StructureChanges(
+            previous_structure['blocks'],
+            runtime.course_entry.structure['blocks'],
+            changed_group_usage_keys
+        )
+
+    @classmethod
+    def _get_item_ids(cls, structure, block_keys):
+        """
+        Returns the ids in the index of the blocks of the structure object with the given keys.
+        """
+        # Usage keys of descendants carry the course key they were loaded with, which
+        # the modulestore may strip from the top level object's.
+        children = structure.children
+        course_key = children[0].course_key if children else structure.location.course_key
+        return [
+            unicode(cls._id_modifier(course_key.make_usage_key(block_type, block_id)))
+            for block_type, block_id in block_keys
+        ]
+
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
         """
@@ -1,5 +1,9 @@
 """ Management command to update courses' search index """
 import logging
+import multiprocessing
+import os
+import time
+from django import db
 from django.core.management import BaseCommand, CommandError
 from optparse import make_option
 from textwrap import dedent
@@ -14,7 +18,41 @@ from opaque_keys.edx.locator import CourseLocator
 
 from .prompt import query_yes_no
 
-from xmodule.modulestore.django import modulestore
+from xmodule.contentstore import django as contentstore_django
+from xmodule.modulestore.django import clear_existing_modulestores, modulestore
+
+log = logging.getLogger(__name__)
+
+
+def _init_process():
+    """
+    Sets up a process of the pool, which can't share the database connections
+    of the command's process.
+
+    The command closes its connections before starting the pool, so this only
+    forgets any connection the process inherited, without closing it: that
+    would close it for the command's process too.
+    """
+    for connection in db.connections.all():
+        connection.connection = None
+    clear_existing_modulestores()
+    contentstore_django._CONTENTSTORE.clear()  # pylint: disable=protected-access
+
+
+def _reindex_course_in_process(course_id):
+    """
+    Reindexes the course in a process of the pool.
+
+    Returns the course id, the number of items indexed, and the error message
+    if reindexing failed.
+    """
+    try:
+        indexed_count = CoursewareSearchIndexer.do_course_reindex(modulestore(), CourseKey.from_string(course_id))
+    except Exception as exc:  # pylint: disable=broad-except
+        # broad exception so that a single course does not stop the others from being reindexed
+        log.exception(u"Failed to reindex course %s", course_id)
+        return course_id, 0, unicode(exc)
+    return course_id, indexed_count or 0, None
 
 
 class Command(BaseCommand):
@@ -26,6 +64,9 @@ class Command(BaseCommand):
         ./manage.py reindex_course <course_id_1> <course_id_2> - reindexes courses with keys course_id_1 and course_id_2
         ./manage.py reindex_course --all - reindexes all available courses
         ./manage.py reindex_course --setup - reindexes all courses for devstack setup
+        ./manage.py reindex_course --all --processes 8 --checkpoint reindex.txt - reindexes all courses
+            with 8 processes, recording the reindexed courses in reindex.txt, and skipping those
+            already recorded there (i.e. resuming an interrupted run)
     """
     help = dedent(__doc__)
 
@@ -45,7 +86,20 @@ class Command(BaseCommand):
                                default=False,
                                help='Reindex all courses on developers stack setup')
 
-    option_list = BaseCommand.option_list + (all_option, setup_option)
+    processes_option = make_option('--processes',
+                                   action='store',
+                                   dest='processes',
+                                   type='int',
+                                   default=1,
+                                   help='Number of processes reindexing courses in parallel')
+
+    checkpoint_option = make_option('--checkpoint',
+                                    action='store',
+                                    dest='checkpoint',
+                                    default=None,
+                                    help='File recording the reindexed courses, which are skipped when rerun')
+
+    option_list = BaseCommand.option_list + (all_option, setup_option, processes_option, checkpoint_option)
 
     CONFIRMATION_PROMPT = u"Re-indexing all courses might be a time consuming operation. Do you want to continue?"
 
@@ -111,5 +165,63 @@ class Command(BaseCommand):
             # in case course keys are provided as arguments
             course_keys = map(self._parse_course_key, args)
 
-        for course_key in course_keys:
-            CoursewareSearchIndexer.do_course_reindex(store, course_key)
+        checkpoint = options.get('checkpoint')
+        if checkpoint:
+            reindexed_course_ids = self._read_checkpoint(checkpoint)
+            course_keys = [course_key for course_key in course_keys if unicode(course_key) not in reindexed_course_ids]
+            if reindexed_course_ids:
+                self.stdout.write(u"Skipping {} courses already reindexed\n".format(len(reindexed_course_ids)))
+
+        start_time = time.time()
+        indexed_items = 0
+        failed_course_ids = []
+        processes = options.get('processes') or 1
+        if processes > 1:
+            # Each process reindexes whole courses, as removing stale items and assigning
+            # content groups need the whole course tree. The processes mustn't inherit
+            # open database connections, see `_init_process`.
+            db.close_connection()
+            pool = multiprocessing.Pool(processes, initializer=_init_process)
+            try:
+                course_ids = [unicode(course_key) for course_key in course_keys]
+                for course_id, indexed_count, error in pool.imap_unordered(_reindex_course_in_process, course_ids):
+                    if error:
+                        failed_course_ids.append(course_id)
+                        continue
+                    indexed_items += indexed_count
+                    self._record_checkpoint(checkpoint, course_id)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            for course_key in course_keys:
+                indexed_items += CoursewareSearchIndexer.do_course_reindex(store, course_key) or 0
+                self._record_checkpoint(checkpoint, unicode(course_key))
+
+        elapsed = max(time.time() - start_time, 0.001)
+        reindexed_courses = len(course_keys) - len(failed_course_ids)
+        self.stdout.write(
+            u"Reindexed {courses} courses ({items} items) in {elapsed} seconds: "
+            u"{courses_rate} courses/minute, {items_rate} items/second\n".format(
+                courses=reindexed_courses,
+                items=indexed_items,
+                elapsed=round(elapsed, 1),
+                courses_rate=round(reindexed_courses * 60 / elapsed, 1),
+                items_rate=round(indexed_items / elapsed, 1),
+            )
+        )
+        if failed_course_ids:
+            raise CommandError(u"Failed to reindex courses: {}".format(u", ".join(failed_course_ids)))
+
+    def _read_checkpoint(self, checkpoint):
+        """ Returns the set of course ids recorded in the checkpoint file """
+        if not os.path.exists(checkpoint):
+            return set()
+        with open(checkpoint) as checkpoint_file:
+            return set(line.strip().decode('utf-8') for line in checkpoint_file if line.strip())
+
+    def _record_checkpoint(self, checkpoint, course_id):
+        """ Records that the course was reindexed in the checkpoint file, if any """
+        if checkpoint:
+            with open(checkpoint, 'a') as checkpoint_file:
+                checkpoint_file.write(course_id.encode('utf-8') + '\n')
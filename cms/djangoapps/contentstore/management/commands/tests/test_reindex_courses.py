@@ -1,4 +1,8 @@
 """ Tests for course reindex command """
+import os
+import shutil
+import tempfile
+
 import ddt
 from django.core.management import call_command, CommandError
 import mock
@@ -9,7 +13,9 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from common.test.utils import nostderr
 from xmodule.modulestore.tests.factories import CourseFactory, LibraryFactory
 
-from contentstore.management.commands.reindex_course import Command as ReindexCommand
+from contentstore.management.commands.reindex_course import (
+    Command as ReindexCommand, _init_process, _reindex_course_in_process
+)
 from contentstore.courseware_index import SearchIndexingError
 
 
@@ -129,3 +135,63 @@ class TestReindexCourse(ModuleStoreTestCase):
 
             with self.assertRaises(SearchIndexingError):
                 call_command('reindex_course', unicode(self.second_course.id))
+
+    def test_checkpoint(self):
+        """ Test that courses recorded in the checkpoint file are skipped, and reindexed ones recorded """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        checkpoint = os.path.join(directory, 'checkpoint')
+        with open(checkpoint, 'w') as checkpoint_file:
+            checkpoint_file.write(unicode(self.first_course.id) + '\n')
+
+        with mock.patch(self.REINDEX_PATH_LOCATION) as patched_index, \
+                mock.patch(self.MODULESTORE_PATCH_LOCATION, mock.Mock(return_value=self.store)):
+            call_command(
+                'reindex_course',
+                unicode(self.first_course.id),
+                unicode(self.second_course.id),
+                checkpoint=checkpoint
+            )
+            self.assertEqual(patched_index.mock_calls, self._build_calls(self.second_course))
+
+        with open(checkpoint) as checkpoint_file:
+            self.assertEqual(
+                checkpoint_file.read().split(),
+                [unicode(self.first_course.id), unicode(self.second_course.id)]
+            )
+
+    def test_reindex_in_process(self):
+        """ Test that reindexing in a process of the pool reports failures rather than raising them """
+        course_id = unicode(self.first_course.id)
+        with mock.patch(self.REINDEX_PATH_LOCATION) as patched_index:
+            patched_index.return_value = 3
+            self.assertEqual(_reindex_course_in_process(course_id), (course_id, 3, None))
+
+            patched_index.side_effect = SearchIndexingError("message", [])
+            self.assertEqual(_reindex_course_in_process(course_id), (course_id, 0, "message"))
+
+    def test_processes_do_not_inherit_connections(self):
+        """ Test that the database connections are closed before the pool of processes is started """
+        manager = mock.Mock()
+        manager.Pool.return_value.imap_unordered.return_value = [(unicode(self.first_course.id), 3, None)]
+        with mock.patch('contentstore.management.commands.reindex_course.db.close_connection',
+                        manager.close_connection), \
+                mock.patch('contentstore.management.commands.reindex_course.multiprocessing.Pool', manager.Pool):
+            call_command('reindex_course', unicode(self.first_course.id), processes=2)
+        self.assertEqual(
+            [name for name, __, __ in manager.mock_calls[:2]],
+            ['close_connection', 'Pool'],
+        )
+
+    def test_init_process_forgets_connections(self):
+        """ Test that processes of the pool drop the connections they inherited without closing them """
+        connection = mock.Mock()
+        raw_connection = connection.connection
+        with mock.patch('contentstore.management.commands.reindex_course.db.connections.all',
+                        mock.Mock(return_value=[connection])), \
+                mock.patch('contentstore.management.commands.reindex_course.clear_existing_modulestores'), \
+                mock.patch('contentstore.management.commands.reindex_course.contentstore_django._CONTENTSTORE'):
+            _init_process()
+        self.assertIsNone(connection.connection)
+        self.assertFalse(raw_connection.close.called)
+        self.assertFalse(connection.close.called)
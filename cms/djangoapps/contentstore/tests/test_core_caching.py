@@ -1,4 +1,7 @@
-from cache_toolbox.core import get_cached_content, set_cached_content, del_cached_content
+from cache_toolbox.core import (
+    get_cached_content, set_cached_content, del_cached_content,
+    get_cached_content_metadata, set_cached_content_metadata
+)
 from opaque_keys.edx.locations import Location
 from django.test import TestCase
 
@@ -38,3 +41,11 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+    def test_delete_metadata(self):
+        set_cached_content(self.mockAsset)
+        set_cached_content_metadata(self.mockAsset)
+        self.assertEqual(self.mockAsset.content, get_cached_content_metadata(self.unicodeLocation).content)
+        del_cached_content(self.nonUnicodeLocation)
+        self.assertEqual(None, get_cached_content_metadata(self.unicodeLocation),
+                         'metadata should be deleted along with the content')
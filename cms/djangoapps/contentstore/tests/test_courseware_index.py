@@ -1,6 +1,7 @@
 """
 Testing indexing of the courseware as it is changed
 """
+from bson.objectid import ObjectId
 import ddt
 import json
 from lazy.lazy import lazy
@@ -13,6 +14,9 @@ from uuid import uuid4
 from unittest import skip
 
 from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
 
 from course_modes.models import CourseMode
 from xmodule.library_tools import normalize_key_for_search
@@ -40,6 +44,7 @@ from xmodule.partitions.partitions import UserPartition
 from search.search_engine_base import SearchEngine
 
 from contentstore.courseware_index import (
+    INDEXED_STATE_CACHE_KEY,
     CoursewareSearchIndexer,
     LibrarySearchIndexer,
     SearchIndexingError,
@@ -445,13 +450,92 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
         # index based on time, will include an index of the origin sequential
         # because it is in a common subtree but not of the original vertical
         # because the original sequential's subtree is too old
+        # split courses only index the changes to their structure: the chapter and the new subtree
         new_indexed_count = self.index_recent_changes(store, before_time)
-        self.assertEqual(new_indexed_count, 5)
+        self.assertEqual(new_indexed_count, 4 if store.get_modulestore_type() == ModuleStoreEnum.Type.split else 5)
 
         # full index again
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_indexing_changes(self, store):
+        """ Make sure that indexing a publish of a split course only indexes what changed """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 4)
+        # Long enough ago that a time based index would include everything
+        since_time = datetime(2015, 1, 1, tzinfo=UTC)
+
+        # Changing the content of a component only indexes the component
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            html_unit = store.get_item(self.html_unit.location)
+        html_unit.data = "<p>Changed content</p>"
+        self.update_item(store, html_unit)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 1)
+        self.assertEqual(self.search(query_string="Changed content")["total"], 1)
+
+        # Renaming a chapter indexes its subtree, whose location changed
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            chapter = store.get_item(self.chapter.location)
+        chapter.display_name = "Week One"
+        self.update_item(store, chapter)
+        self.publish_item(store, self.chapter.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 4)
+        response = self.search(query_string="Changed content")
+        self.assertEqual(response["results"][0]["data"]["location"], ["Week One", "Lesson 1", "Subsection 1"])
+
+        # Deleting a component only indexes its parent, and removes the component
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 1)
+        self.assertEqual(self.search()["total"], 3)
+
+        # Nothing changed
+        self.assertEqual(self.index_recent_changes(store, since_time), 0)
+
+    def _test_indexing_changes_missing_version(self, store):
+        """ Make sure that the whole course is indexed if the last indexed version is gone """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 4)
+        since_time = datetime(2015, 1, 1, tzinfo=UTC)
+        indexed_state_key = INDEXED_STATE_CACHE_KEY.format(self.course.id)
+        indexed_state = cache.get(indexed_state_key)
+        indexed_state['version'] = ObjectId()
+        cache.set(indexed_state_key, indexed_state)
+
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            html_unit = store.get_item(self.html_unit.location)
+        html_unit.data = "<p>Changed content</p>"
+        self.update_item(store, html_unit)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 4)
+        self.assertEqual(self.search(query_string="Changed content")["total"], 1)
+
+    def _test_indexing_changes_course_settings(self, store):
+        """ Make sure that changing the course settings indexes the items inheriting them """
+        chapter2 = ItemFactory.create(
+            parent_location=self.course.location,
+            category='chapter',
+            display_name="Week 2",
+            modulestore=store,
+            publish_item=True,
+        )
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 5)
+        since_time = datetime(2015, 1, 1, tzinfo=UTC)
+
+        new_start = datetime(2015, 2, 1, tzinfo=UTC)
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            course = store.get_course(self.course.id)
+        course.start = new_start
+        self.update_item(store, course)
+        self.publish_item(store, self.course.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 5)
+        results = self.search()["results"]
+        start_dates = {result["data"]["id"]: result["data"]["start_date"] for result in results}
+        self.assertEqual(start_dates[unicode(chapter2.location)], new_start)
+        self.assertEqual(start_dates[unicode(self.chapter.location)], datetime(2015, 3, 1, tzinfo=UTC))
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -584,6 +668,15 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
 
+    def test_indexing_changes(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_indexing_changes)
+
+    def test_indexing_changes_missing_version(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_indexing_changes_missing_version)
+
+    def test_indexing_changes_course_settings(self):
+        self._perform_test_using_store(ModuleStoreEnum.Type.split, self._test_indexing_changes_course_settings)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_course_about_property_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_course_about_property_index)
@@ -776,6 +869,30 @@ class TestTaskExecution(ModuleStoreTestCase):
         self.assertEqual(response["total"], 2)
 
 
+class TestIndexBatches(TestCase):
+    """ Tests the batching of items sent to the search engine """
+
+    ITEMS = [{"id": "a", "content": "x" * 40}, {"id": "b", "content": "y" * 40}, {"id": "c", "content": "z" * 40}]
+
+    @override_settings(SEARCH_INDEX_BATCH_MAX_BYTES=140)
+    def test_batches(self):
+        batches = CoursewareSearchIndexer._batch_items_index(self.ITEMS)  # pylint: disable=protected-access
+        self.assertEqual(batches, [self.ITEMS[:2], self.ITEMS[2:]])
+
+    @override_settings(SEARCH_INDEX_BATCH_MAX_BYTES=10)
+    def test_large_items(self):
+        batches = CoursewareSearchIndexer._batch_items_index(self.ITEMS)  # pylint: disable=protected-access
+        self.assertEqual(batches, [[item] for item in self.ITEMS])
+
+    @override_settings(SEARCH_INDEX_BATCH_MAX_BYTES=None)
+    def test_unbatched(self):
+        batches = CoursewareSearchIndexer._batch_items_index(self.ITEMS)  # pylint: disable=protected-access
+        self.assertEqual(batches, [self.ITEMS])
+
+    def test_no_items(self):
+        self.assertEqual(CoursewareSearchIndexer._batch_items_index([]), [[]])  # pylint: disable=protected-access
+
+
 @ddt.ddt
 class TestLibrarySearchIndexer(MixedWithOptionsTestCase):
     """ Tests the operation of the CoursewareSearchIndexer """
@@ -140,6 +140,14 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES', COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES
+)
+CONTENTSERVER_DISK_CACHE = ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', CONTENTSERVER_DISK_CACHE)
+CONTENTSERVER_ASSET_CACHE_TTL = ENV_TOKENS.get('CONTENTSERVER_ASSET_CACHE_TTL', CONTENTSERVER_ASSET_CACHE_TTL)
+CONTENTSERVER_COURSE_ASSET_CACHE_TTLS = ENV_TOKENS.get(
+    'CONTENTSERVER_COURSE_ASSET_CACHE_TTLS', CONTENTSERVER_COURSE_ASSET_CACHE_TTLS
+)
 
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
@@ -346,6 +354,7 @@ VIDEO_CDN_URL = ENV_TOKENS.get('VIDEO_CDN_URL', {})
 if FEATURES['ENABLE_COURSEWARE_INDEX'] or FEATURES['ENABLE_LIBRARY_INDEX']:
     # Use ElasticSearch for the search engine
     SEARCH_ENGINE = "search.elastic.ElasticSearchEngine"
+SEARCH_INDEX_BATCH_MAX_BYTES = ENV_TOKENS.get('SEARCH_INDEX_BATCH_MAX_BYTES', SEARCH_INDEX_BATCH_MAX_BYTES)
 
 XBLOCK_SETTINGS = ENV_TOKENS.get('XBLOCK_SETTINGS', {})
 XBLOCK_SETTINGS.setdefault("VideoDescriptor", {})["licensing_enabled"] = FEATURES.get("LICENSING", False)
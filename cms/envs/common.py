@@ -385,6 +385,22 @@ MODULESTORE = {
     }
 }
 
+# Maximum total size, in bytes, of the serialized split modulestore course structures
+# each process keeps in memory in front of the 'course_structure_cache'. 0 disables it.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+
+# Local directory in which the StaticContentServer keeps the contents of assets that are
+# too large for memcached or requested by byte range, shared by the processes of a server,
+# e.g. {'DIRECTORY': '/edx/var/contentserver_cache', 'MAX_SIZE': 1024 * 1024 * 1024}.
+# None disables it.
+CONTENTSERVER_DISK_CACHE = None
+
+# Number of seconds for which public caches (browsers, CDNs) may keep unlocked assets,
+# by default and by course id. Courses are matched on organization and course number.
+# 0 sends no Cache-Control header for them.
+CONTENTSERVER_ASSET_CACHE_TTL = 0
+CONTENTSERVER_COURSE_ASSET_CACHE_TTLS = {}
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1054,6 +1070,9 @@ FILES_AND_UPLOAD_TYPE_FILTERS = {
 
 # Default to no Search Engine
 SEARCH_ENGINE = None
+# Size in bytes (of their JSON) of the batches in which the items of a course or library
+# are sent to the search engine when indexing it. None sends them all at once.
+SEARCH_INDEX_BATCH_MAX_BYTES = 5 * 1024 * 1024
 ELASTIC_FIELD_MAPPINGS = {
     "start_date": {
         "type": "date"
@@ -171,6 +171,9 @@ CACHES = {
     },
 }
 
+# Keep the course structure cache a no-op in tests, in-process tier included
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 0
+
 # Add external_auth to Installed apps for testing
 INSTALLED_APPS += ('external_auth', )
 
@@ -0,0 +1,301 @@
+"""
+On-disk cache of the contents of course assets.
+
+Assets too large for memcached, and byte ranges of any asset, are otherwise
+read from GridFS on every request. `AssetDiskCache` keeps their contents in a
+local directory, which all the processes of a server can share.
+"""
+import errno
+import hashlib
+import logging
+import os
+from threading import Lock, Thread
+import time
+
+from django.conf import settings
+
+from xmodule.contentstore.content import StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Prefix of the files being written into the cache directory.
+TEMP_FILE_PREFIX = '.tmp-'
+
+# Temporary files older than this (in seconds) were left behind by processes
+# that died while writing them, and are deleted on eviction or replaced.
+TEMP_FILE_MAX_AGE = 60 * 60
+
+# Size of the reads from cached files when streaming them.
+FILE_READ_SIZE = 64 * 1024
+
+# Entries are evicted once a process has added this fraction of the maximum
+# size of the cache, or this many seconds after its last eviction.
+EVICTION_SIZE_FRACTION = 0.1
+EVICTION_INTERVAL = 60
+
+_asset_disk_caches = {}
+
+
+def get_asset_disk_cache():
+    """
+    Return the AssetDiskCache configured by the CONTENTSERVER_DISK_CACHE
+    setting, or None if it isn't enabled.
+    """
+    config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', None)
+    if not config:
+        return None
+    key = (config['DIRECTORY'], config['MAX_SIZE'])
+    if key not in _asset_disk_caches:
+        _asset_disk_caches[key] = AssetDiskCache(*key)
+    return _asset_disk_caches[key]
+
+
+class AssetDiskCache(object):
+    """
+    A directory holding the contents of assets, bounded in total size, from
+    which the least recently used entries are evicted first.
+
+    Entries are keyed by asset location and last modification time, so an
+    asset that is uploaded again gets a new entry rather than being served
+    stale, and its old entry ages out. Entries are written to temporary files
+    named after them, that are renamed into place once complete: the
+    processes sharing the directory never see partial entries, and only one
+    of them writes a given entry at a time. Reading an entry updates its
+    modification time, which is what eviction orders entries by.
+
+    Eviction lists the whole directory, so it only runs once enough data was
+    added since the last one (see EVICTION_SIZE_FRACTION and
+    EVICTION_INTERVAL), and the cache may briefly exceed its maximum size.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self._eviction_lock = Lock()
+        self._size_added = 0
+        self._last_eviction = time.time()
+        try:
+            os.makedirs(directory)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+
+    def _path(self, content):
+        """
+        Return the path of the entry for `content`.
+        """
+        key = u'{}@{}'.format(content.location, content.last_modified_at.isoformat())
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def _temp_path(self, content):
+        """
+        Return the path of the temporary file the entry for `content` is written to.
+        """
+        return os.path.join(self.directory, TEMP_FILE_PREFIX + os.path.basename(self._path(content)))
+
+    def get(self, content):
+        """
+        Return a StaticContentStream of the data of `content` (a StaticContent
+        whose data may or may not be loaded) read from the cache, or None if
+        it isn't cached.
+        """
+        path = self._path(content)
+        try:
+            stream = open(path, 'rb')
+        except IOError as error:
+            if error.errno == errno.ENOENT:
+                return None
+            raise
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            # Evicted by another process since it was opened, which doesn't prevent reading it.
+            pass
+        return StaticContentStream(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=getattr(content, 'content_digest', None), chunk_size=FILE_READ_SIZE
+        )
+
+    def stream_and_fill(self, content):
+        """
+        Yield the data of `content`, copying it into the cache as it is read.
+
+        The data is yielded as it comes even if it can't be cached: because it
+        doesn't fit in the cache, another process is already writing its entry,
+        or writing failed. The entry is only kept if all the data was read.
+        """
+        temp_file = self._open_temp_file(content)
+        complete = False
+        try:
+            for chunk in content.stream_data():
+                if temp_file is not None:
+                    try:
+                        temp_file.write(chunk)
+                    except (IOError, OSError):
+                        log.exception(u"Could not store content: %s in the disk cache", unicode(content.location))
+                        self._discard_temp_file(content, temp_file)
+                        temp_file = None
+                yield chunk
+            complete = True
+        finally:
+            if temp_file is not None:
+                if complete:
+                    self._commit_temp_file(content, temp_file)
+                else:
+                    self._discard_temp_file(content, temp_file)
+
+    def fill_in_background(self, content, open_content):
+        """
+        Copy the data of an asset into the cache from a background thread,
+        unless it doesn't fit in the cache or another process is already
+        writing its entry.
+
+        `content` is the asset's StaticContent, whose data isn't read.
+        `open_content` is called by the thread to get a StaticContentStream of
+        the asset to read the data from.
+
+        Returns the thread, or None if none was started.
+        """
+        temp_file = self._open_temp_file(content)
+        if temp_file is None:
+            return None
+        thread = Thread(target=self._fill, args=(content, open_content, temp_file))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _fill(self, content, open_content, temp_file):
+        """
+        Write the data of the StaticContentStream returned by `open_content`
+        to `temp_file`, and move it into place as the entry for `content`.
+        """
+        try:
+            source = open_content()
+            try:
+                for chunk in source.stream_data():
+                    temp_file.write(chunk)
+            finally:
+                source.close()
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Could not store content: %s in the disk cache", unicode(content.location))
+            self._discard_temp_file(content, temp_file)
+        else:
+            self._commit_temp_file(content, temp_file)
+
+    def _open_temp_file(self, content):
+        """
+        Create the temporary file of the entry for `content`, and return it
+        open for writing.
+
+        Returns None if the content doesn't fit in the cache, or if another
+        process is writing the entry, or if the file couldn't be created.
+        """
+        if content.length is None or content.length > self.max_size:
+            return None
+
+        temp_path = self._temp_path(content)
+        for __ in xrange(2):
+            try:
+                handle = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0644)
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    log.exception(u"Could not store content: %s in the disk cache", unicode(content.location))
+                    return None
+                # Take over the entry if the process writing it died
+                try:
+                    is_stale = time.time() - os.stat(temp_path).st_mtime > TEMP_FILE_MAX_AGE
+                except OSError:
+                    is_stale = True
+                if not is_stale:
+                    return None
+                self._delete(temp_path)
+            else:
+                return os.fdopen(handle, 'wb')
+        return None
+
+    def _commit_temp_file(self, content, temp_file):
+        """
+        Move the complete temporary file of the entry for `content` into place.
+        """
+        try:
+            temp_file.close()
+            os.rename(self._temp_path(content), self._path(content))
+        except (IOError, OSError):
+            log.exception(u"Could not store content: %s in the disk cache", unicode(content.location))
+            self._discard_temp_file(content, temp_file)
+            return
+        self._entry_added(content.length)
+
+    def _discard_temp_file(self, content, temp_file):
+        """
+        Close and delete the temporary file of the entry for `content`.
+        """
+        try:
+            temp_file.close()
+        except (IOError, OSError):
+            pass
+        try:
+            self._delete(self._temp_path(content))
+        except OSError:
+            log.exception(u"Could not delete the temporary file of content: %s", unicode(content.location))
+
+    def _entry_added(self, size):
+        """
+        Record that an entry of `size` bytes was added, and evict entries if it's time to.
+        """
+        with self._eviction_lock:
+            self._size_added += size
+            now = time.time()
+            if self._size_added < self.max_size * EVICTION_SIZE_FRACTION and \
+                    now - self._last_eviction < EVICTION_INTERVAL:
+                return
+            self._size_added = 0
+            self._last_eviction = now
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the total size of the
+        cache is within its maximum size.
+        """
+        now = time.time()
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted by another process
+                continue
+            if name.startswith(TEMP_FILE_PREFIX):
+                if now - stat.st_mtime > TEMP_FILE_MAX_AGE:
+                    self._delete(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        entries.sort()
+        evicted = 0
+        for __, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            self._delete(path)
+            total_size -= size
+            evicted += 1
+        log.info(u"Evicted %d assets from the disk cache in %s", evicted, self.directory)
+
+    def _delete(self, path):
+        """
+        Delete the file at `path`, if another process hasn't already.
+        """
+        try:
+            os.unlink(path)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
@@ -2,27 +2,43 @@
 Middleware to serve assets.
 """
 
+import calendar
+from functools import partial
 import logging
+from uuid import uuid4
 
+from django.conf import settings
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import AssetLocator
-from cache_toolbox.core import get_cached_content, set_cached_content
+from cache_toolbox.core import (
+    get_cached_content, set_cached_content, get_cached_content_metadata, set_cached_content_metadata
+)
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
+from .caching import get_asset_disk_cache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
 log = logging.getLogger(__name__)
 
+# Assets smaller than this (in bytes) are cached in memcached
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+# Requests for more byte ranges than this get the full content
+MAX_RANGES = 20
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -41,27 +57,25 @@ class StaticContentServer(object):
                 response.status_code = 400
                 return response
 
-            # first look in our cache so we don't have to round-trip to the DB
-            content = get_cached_content(loc)
+            # First look for the asset's metadata in our cache, so that requests that can be
+            # answered without its data (forbidden or not modified) never fetch the data
+            content = get_cached_content_metadata(loc)
             if content is None:
-                # nope, not in cache, let's fetch from DB
-                try:
-                    content = AssetManager.find(loc, as_stream=True)
-                except (ItemNotFoundError, NotFoundError):
-                    response = HttpResponse()
-                    response.status_code = 404
-                    return response
-
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
-                if content.length is not None:
-                    if content.length < 1048576:
-                        # since we've queried as a stream, let's read in the stream into memory to set in cache
-                        content = content.copy_to_in_mem()
-                        set_cached_content(content)
-            else:
-                # NOP here, but we may wish to add a "cache-hit" counter in the future
-                pass
+                # then for the whole asset, so we don't have to round-trip to the DB
+                content = get_cached_content(loc)
+                if content is None:
+                    # nope, not in cache, let's fetch from DB. As a stream, only the metadata
+                    # of the asset is read until its data is
+                    try:
+                        content = AssetManager.find(loc, as_stream=True)
+                    except (ItemNotFoundError, NotFoundError):
+                        response = HttpResponse()
+                        response.status_code = 404
+                        return response
+                # Cache the metadata of the assets whose data is cached, so that they are
+                # invalidated together
+                if content.length is not None and content.length < MAX_CACHED_CONTENT_LENGTH:
+                    set_cached_content_metadata(content.copy_without_data())
 
             # Check that user has access to content
             if getattr(content, "locked", False):
@@ -77,29 +91,40 @@ class StaticContentServer(object):
                     ):
                         return HttpResponseForbidden('Unauthorized')
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # see if the client has cached this content, if so then
+            # just return a 304 (Not Modified)
+            if is_not_modified(request, content):
+                response = HttpResponseNotModified()
+                set_caching_headers(response, loc, content)
+                return response
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            try:
+                content = self.load_content(loc, content)
+            except (ItemNotFoundError, NotFoundError):
+                response = HttpResponse()
+                response.status_code = 404
+                return response
+
+            # Serve assets that aren't cached in memory from the disk cache,
+            # or from GridFS while they're copied into it
+            disk_cache = get_asset_disk_cache()
+            fill_disk_cache = False
+            if disk_cache is not None and type(content) != StaticContent:
+                cached_content = self.get_from_disk_cache(disk_cache, loc, content)
+                if cached_content is None:
+                    fill_disk_cache = True
+                else:
+                    content.close()
+                    content = cached_content
 
-            # *** File streaming within a byte range ***
+            # *** File streaming within byte ranges ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
+            # Request -> Range attribute structure: "Range: bytes=first-[last][, first-[last]...]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,42 +137,224 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_RANGES:
+                        # Many small ranges cost more to serve than the full content
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
+                        # Unsatisfiable ranges are ignored, unless all of them are
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
+                        if len(ranges) == 1:
+                            first, last = ranges[0]
                             response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
+                            response['Content-Type'] = content.content_type
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges should be sent as a multipart
+                            # message. http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_byteranges_response(content, ranges)
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if fill_disk_cache:
+                    response = HttpResponse(disk_cache.stream_and_fill(content))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
+            elif fill_disk_cache:
+                # The ranges were read from GridFS, copy the whole asset separately
+                disk_cache.fill_in_background(content, partial(AssetManager.find, loc, as_stream=True))
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
-            response['Last-Modified'] = last_modified_at_str
+            set_caching_headers(response, loc, content)
 
             return response
 
+    @staticmethod
+    def load_content(loc, content):
+        """
+        Return `content` if its data is available, otherwise (only its metadata
+        was cached) the asset with its data.
+
+        Raises ItemNotFoundError or NotFoundError if the asset no longer exists.
+        """
+        if type(content) == StaticContent and content.data is None:
+            content = get_cached_content(loc)
+            if content is None:
+                content = AssetManager.find(loc, as_stream=True)
+
+        # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
+        # this is because I haven't been able to find a means to stream data out of memcached
+        if type(content) != StaticContent and content.length is not None:
+            if content.length < MAX_CACHED_CONTENT_LENGTH:
+                # since we've queried as a stream, let's read in the stream into memory to set in cache
+                content = content.copy_to_in_mem()
+                set_cached_content(content)
+        return content
+
+    @staticmethod
+    def get_from_disk_cache(disk_cache, loc, content):
+        """
+        Return `content` read from the disk cache, or None if it isn't cached
+        or can't be read from it.
+        """
+        try:
+            return disk_cache.get(content)
+        except (IOError, OSError):
+            log.exception(u"Could not read content: %s from the disk cache", unicode(loc))
+            return None
+
+
+def get_last_modified_timestamp(content):
+    """
+    Return the last modification time of `content` as seconds since the epoch.
+    """
+    # Naive datetimes from the contentstore are in UTC
+    return calendar.timegm(content.last_modified_at.utctimetuple())
+
+
+def get_etag(content):
+    """
+    Return the (quoted) ETag of `content`, based on the hash of its data, or
+    None if the hash isn't known.
+    """
+    content_digest = getattr(content, 'content_digest', None)
+    if content_digest is None:
+        return None
+    return quote_etag(content_digest)
+
+
+def is_not_modified(request, content):
+    """
+    Return whether the conditional headers of `request` match `content`, so
+    that the client's copy can be used.
+
+    If-None-Match takes precedence over If-Modified-Since, as per
+    http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        content_digest = getattr(content, 'content_digest', None)
+        etags = parse_etags(if_none_match)
+        return '*' in etags or (content_digest is not None and content_digest in etags)
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is None:
+        return False
+    return get_last_modified_timestamp(content) <= if_modified_since
+
+
+def get_cache_ttl(course_key):
+    """
+    Return the number of seconds for which public caches may keep the unlocked
+    assets of the course, or 0 if they shouldn't.
+
+    Courses are matched on organization and course number only, since the
+    run isn't part of the deprecated (c4x) asset URLs.
+    """
+    return get_course_cache_ttls().get(
+        (course_key.org, course_key.course),
+        settings.CONTENTSERVER_ASSET_CACHE_TTL
+    )
+
+
+# The CONTENTSERVER_COURSE_ASSET_CACHE_TTLS setting, and what it was parsed into
+_COURSE_CACHE_TTLS = (None, {})
+
+
+def get_course_cache_ttls():
+    """
+    Return a dict mapping (org, course number) to the cache TTL configured for
+    the course in CONTENTSERVER_COURSE_ASSET_CACHE_TTLS.
+
+    The setting is only parsed again when it changes. Invalid course ids in
+    it are logged and skipped.
+    """
+    global _COURSE_CACHE_TTLS  # pylint: disable=global-statement
+    configured_ttls, course_cache_ttls = _COURSE_CACHE_TTLS
+    if configured_ttls is not settings.CONTENTSERVER_COURSE_ASSET_CACHE_TTLS:
+        configured_ttls = settings.CONTENTSERVER_COURSE_ASSET_CACHE_TTLS
+        course_cache_ttls = {}
+        for course_id, cache_ttl in configured_ttls.iteritems():
+            try:
+                configured_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                log.warning(u"Invalid course id in CONTENTSERVER_COURSE_ASSET_CACHE_TTLS: %s", course_id)
+                continue
+            course_cache_ttls[(configured_key.org, configured_key.course)] = cache_ttl
+        _COURSE_CACHE_TTLS = (configured_ttls, course_cache_ttls)
+    return course_cache_ttls
+
+
+def set_caching_headers(response, loc, content):
+    """
+    Set the Last-Modified, ETag and Cache-Control headers of `response` for
+    `content`.
+    """
+    response['Last-Modified'] = http_date(get_last_modified_timestamp(content))
+    etag = get_etag(content)
+    if etag is not None:
+        response['ETag'] = etag
+
+    if getattr(content, "locked", False):
+        # Only the browser of a user who has access may keep the asset
+        response['Cache-Control'] = 'private'
+    else:
+        cache_ttl = get_cache_ttl(loc.course_key)
+        if cache_ttl:
+            response['Cache-Control'] = 'public, max-age={}'.format(cache_ttl)
+
+
+def multipart_byteranges_response(content, ranges):
+    """
+    Returns a multipart/byteranges response with the data of `content` in
+    each of the (first, last) byte `ranges`.
+    """
+    boundary = uuid4().hex
+    end = '\r\n--{}--\r\n'.format(boundary)
+    parts = []
+    for first, last in ranges:
+        # Each part is preceded by its headers, and the CRLF ending the previous part
+        headers = (
+            '\r\n--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n'
+            '\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        parts.append((headers, first, last))
+
+    def stream_parts():
+        """
+        Yields the body of the response.
+        """
+        for headers, first, last in parts:
+            yield headers
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+        yield end
+
+    response = HttpResponse(stream_parts())
+    response['Content-Type'] = 'multipart/byteranges; boundary={}'.format(boundary)
+    response['Content-Length'] = str(
+        sum(len(headers) + last - first + 1 for headers, first, last in parts) + len(end)
+    )
+    return response
+
 
 def parse_range_header(header_value, content_length):
     """
@@ -4,20 +4,29 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
+from django.utils.http import parse_http_date_safe
 
+from mock import patch
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
-from contentserver.middleware import parse_range_header
+from contentserver.middleware import get_cache_ttl, parse_range_header
 from student.models import CourseEnrollment
 
 log = logging.getLogger(__name__)
@@ -146,16 +155,50 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart response with each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
+        full_content = self.client.get(self.url_unlocked).content
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        parts = resp.content.split('--{}'.format(boundary))
+        self.assertEqual(parts[-1], '--\r\n')
+        expected_ranges = [(first_byte, last_byte), (self.length_unlocked - 100, self.length_unlocked - 1)]
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, data = part.split('\r\n\r\n', 1)
+            self.assertIn(
+                'Content-Range: bytes {first}-{last}/{length}'.format(
+                    first=first, last=last, length=self.length_unlocked
+                ),
+                headers
+            )
+            self.assertEqual(data, full_content[first:last + 1] + '\r\n')
+
+    def test_range_request_unsatisfiable_ranges_ignored(self):
+        """
+        Test that unsatisfiable ranges are ignored when others can be satisfied.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked)
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-9/{}'.format(self.length_unlocked))
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that requests for too many ranges get the full content.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=' + ', '.join(['0-0'] * 21))
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
     @ddt.data(
@@ -192,6 +235,138 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         )
         self.assertEqual(resp.status_code, 416)
 
+    def test_etag_and_last_modified(self):
+        """
+        Test that the ETag is based on the md5 of the asset, and that the Last-Modified date is valid.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['ETag'], '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5')))
+        self.assertIsNotNone(parse_http_date_safe(resp['Last-Modified']))
+
+    @ddt.data(
+        ('HTTP_IF_NONE_MATCH', 'ETag'),
+        ('HTTP_IF_MODIFIED_SINCE', 'Last-Modified'),
+    )
+    @ddt.unpack
+    def test_not_modified(self, request_header, response_header):
+        """
+        Test that a conditional request matching the asset gets a 304 without its data being loaded.
+        """
+        resp = self.client.get(self.url_unlocked)
+        with patch('contentserver.middleware.StaticContentServer.load_content') as mock_load_content:
+            resp = self.client.get(self.url_unlocked, **{request_header: resp[response_header]})
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(mock_load_content.called)
+
+    @ddt.data(
+        ('HTTP_IF_NONE_MATCH', '"not-the-md5"'),
+        ('HTTP_IF_MODIFIED_SINCE', 'Thu, 01 Jan 1970 00:00:00 GMT'),
+        ('HTTP_IF_MODIFIED_SINCE', 'not a date'),
+    )
+    @ddt.unpack
+    def test_modified(self, request_header, value):
+        """
+        Test that a conditional request that doesn't match the asset gets the asset.
+        """
+        resp = self.client.get(self.url_unlocked, **{request_header: value})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_none_match_takes_precedence(self):
+        """
+        Test that If-Modified-Since is ignored when If-None-Match is given.
+        """
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH='"not-the-md5"', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified']
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_cache_control_unlocked(self):
+        """
+        Test that unlocked assets are only cached publicly when configured.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertNotIn('Cache-Control', resp)
+
+        with override_settings(CONTENTSERVER_ASSET_CACHE_TTL=60):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp['Cache-Control'], 'public, max-age=60')
+
+            with override_settings(CONTENTSERVER_COURSE_ASSET_CACHE_TTLS={unicode(self.course_key): 3600}):
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp['Cache-Control'], 'public, max-age=3600')
+
+    @override_settings(CONTENTSERVER_ASSET_CACHE_TTL=60)
+    def test_cache_control_locked(self):
+        """
+        Test that locked assets are never cached publicly.
+        """
+        self.client.login(username=self.staff_usr, password=self.staff_pwd)
+        resp = self.client.get(self.url_locked)
+        self.assertEqual(resp['Cache-Control'], 'private')
+
+
+@override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
+class ContentStoreDiskCacheTest(ContentStoreToyCourseTest):
+    """
+    Run the toy course tests with assets served from the disk cache.
+    """
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        override = override_settings(CONTENTSERVER_DISK_CACHE={
+            'DIRECTORY': self.cache_directory,
+            'MAX_SIZE': 10 * 1024 * 1024,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        # Otherwise the small assets of the toy course are cached in memory
+        patcher = patch('contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(ContentStoreDiskCacheTest, self).setUp()
+
+    def test_range_request_served_from_disk_cache(self):
+        """
+        Test that the asset is stored in the disk cache after the first range
+        request, and served from it afterwards.
+        """
+        with patch('contentserver.caching.Thread', SynchronousThread):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-')
+        self.assertEqual(resp.status_code, 206)
+        content = resp.content
+        self.assertEqual(len(os.listdir(self.cache_directory)), 1)
+
+        with patch('contentserver.middleware.AssetManager.find', wraps=AssetManager.find) as mock_find:
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, content[1:])
+            # At most the metadata of the asset is read from the contentstore (it may be cached in memory).
+            self.assertLessEqual(mock_find.call_count, 1)
+
+    def test_request_fills_disk_cache(self):
+        """
+        Test that the asset is stored in the disk cache as it is served.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        content = resp.content
+        self.assertEqual(len(os.listdir(self.cache_directory)), 1)
+
+        with patch('contentserver.middleware.AssetManager.find', wraps=AssetManager.find) as mock_find:
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, content[1:])
+            self.assertLessEqual(mock_find.call_count, 1)
+
+
+class SynchronousThread(threading.Thread):
+    """
+    A thread which runs as soon as it's started, and finishes before `start` returns.
+    """
+    def start(self):
+        self.run()
+
 
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
@@ -237,3 +412,25 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class GetCacheTTLTestCase(unittest.TestCase):
+    """
+    Tests for the cache TTLs of course assets.
+    """
+    def test_course_cache_ttls(self):
+        course_key = CourseKey.from_string('edX/toy/2012_Fall')
+        other_run_key = CourseKey.from_string('edX/toy/2013_Spring')
+        other_course_key = CourseKey.from_string('edX/other/2012_Fall')
+        with override_settings(
+            CONTENTSERVER_ASSET_CACHE_TTL=60,
+            CONTENTSERVER_COURSE_ASSET_CACHE_TTLS={unicode(course_key): 3600, 'not a course id': 10},
+        ):
+            with patch('contentserver.middleware.log') as mock_log:
+                with patch('contentserver.middleware.CourseKey.from_string', wraps=CourseKey.from_string) as mock_parse:
+                    self.assertEqual(get_cache_ttl(course_key), 3600)
+                    self.assertEqual(get_cache_ttl(other_run_key), 3600)
+                    self.assertEqual(get_cache_ttl(other_course_key), 60)
+        # The setting is parsed once, and the invalid course id skipped
+        self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual(mock_log.warning.call_count, 1)
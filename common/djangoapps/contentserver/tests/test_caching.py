@@ -0,0 +1,177 @@
+"""
+Tests for the disk cache of asset contents
+"""
+from cStringIO import StringIO
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+import pytz
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+
+from contentserver.caching import AssetDiskCache, TEMP_FILE_PREFIX
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = AssetDiskCache(self.directory, 100)
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+
+    def make_content(self, name, data, last_modified_at=None):
+        """
+        Return a StaticContent holding `data`.
+        """
+        return StaticContent(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', data,
+            last_modified_at=last_modified_at or datetime.datetime(2015, 10, 1, tzinfo=pytz.utc),
+            length=len(data), locked=True
+        )
+
+    def make_stream_content(self, name, data):
+        """
+        Return a StaticContentStream of `data`, read 4 bytes at a time.
+        """
+        return StaticContentStream(
+            self.course_key.make_asset_key('asset', name), name, 'text/plain', StringIO(data),
+            last_modified_at=datetime.datetime(2015, 10, 1, tzinfo=pytz.utc), length=len(data), chunk_size=4
+        )
+
+    def fill(self, content):
+        """
+        Copy `content` into the cache, and return the data read meanwhile.
+        """
+        return ''.join(self.cache.stream_and_fill(content))
+
+    def cached_files(self):
+        """
+        Return the names of the entries in the cache directory.
+        """
+        return os.listdir(self.directory)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(self.make_content('a.txt', 'a' * 10)))
+
+    def test_fill_and_get(self):
+        content = self.make_content('a.txt', 'abcdefghij')
+        self.assertEqual(self.fill(content), 'abcdefghij')
+
+        cached_content = self.cache.get(content)
+        self.assertEqual(''.join(cached_content.stream_data_in_range(2, 4)), 'cde')
+        self.assertEqual(cached_content.location, content.location)
+        self.assertEqual(cached_content.content_type, 'text/plain')
+        self.assertEqual(cached_content.length, 10)
+        self.assertTrue(cached_content.locked)
+
+    def test_keyed_by_last_modified_at(self):
+        self.fill(self.make_content('a.txt', 'old'))
+        content = self.make_content('a.txt', 'new', last_modified_at=datetime.datetime(2015, 10, 2, tzinfo=pytz.utc))
+        self.assertIsNone(self.cache.get(content))
+        self.fill(content)
+        self.assertEqual(''.join(self.cache.get(content).stream_data()), 'new')
+
+    def test_too_large(self):
+        self.assertEqual(self.fill(self.make_content('a.txt', 'a' * 101)), 'a' * 101)
+        self.assertEqual(self.cached_files(), [])
+
+    def test_streams_before_filling(self):
+        content = self.make_stream_content('a.txt', 'abcdefghij')
+        data = self.cache.stream_and_fill(content)
+        self.assertEqual(next(data), 'abcd')
+        self.assertIsNone(self.cache.get(content))
+        self.assertEqual(''.join(data), 'efghij')
+        self.assertEqual(''.join(self.cache.get(content).stream_data()), 'abcdefghij')
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_interrupted_fill(self):
+        content = self.make_stream_content('a.txt', 'abcdefghij')
+        data = self.cache.stream_and_fill(content)
+        next(data)
+        data.close()
+        self.assertIsNone(self.cache.get(content))
+        self.assertEqual(self.cached_files(), [])
+
+    def test_concurrent_fill(self):
+        content = self.make_stream_content('a.txt', 'abcdefghij')
+        first_data = self.cache.stream_and_fill(content)
+        next(first_data)
+
+        # A concurrent request gets the data without writing the entry again
+        other_content = self.make_stream_content('a.txt', 'abcdefghij')
+        self.assertEqual(self.fill(other_content), 'abcdefghij')
+        self.assertIsNone(self.cache.fill_in_background(other_content, lambda: other_content))
+        self.assertEqual(len(self.cached_files()), 1)
+        self.assertIsNone(self.cache.get(content))
+
+        ''.join(first_data)
+        self.assertEqual(''.join(self.cache.get(content).stream_data()), 'abcdefghij')
+
+    def test_stale_temporary_file_replaced(self):
+        content = self.make_stream_content('a.txt', 'abcdefghij')
+        data = self.cache.stream_and_fill(content)
+        next(data)
+        temp_path = self.cache._temp_path(content)  # pylint: disable=protected-access
+        os.utime(temp_path, (1, 1))
+
+        self.assertEqual(self.fill(self.make_content('a.txt', 'abcdefghij')), 'abcdefghij')
+        self.assertIsNotNone(self.cache.get(content))
+
+    def test_fill_in_background(self):
+        content = self.make_content('a.txt', 'abcdefghij')
+        thread = self.cache.fill_in_background(content, lambda: self.make_stream_content('a.txt', 'abcdefghij'))
+        thread.join()
+        self.assertEqual(''.join(self.cache.get(content).stream_data()), 'abcdefghij')
+
+    def test_fill_in_background_failure(self):
+        content = self.make_content('a.txt', 'abcdefghij')
+
+        def open_content():
+            """ Fail to find the asset. """
+            raise IOError("gone")
+
+        self.cache.fill_in_background(content, open_content).join()
+        self.assertIsNone(self.cache.get(content))
+        self.assertEqual(self.cached_files(), [])
+
+    def test_evicts_least_recently_used(self):
+        first = self.make_content('first.txt', 'a' * 40)
+        second = self.make_content('second.txt', 'b' * 40)
+        self.fill(first)
+        self.fill(second)
+        # Make `first` the most recently used
+        os.utime(self.cache._path(second), (1, 1))  # pylint: disable=protected-access
+
+        third = self.make_content('third.txt', 'c' * 40)
+        self.fill(third)
+        self.assertIsNotNone(self.cache.get(first))
+        self.assertIsNone(self.cache.get(second))
+        self.assertIsNotNone(self.cache.get(third))
+
+    def test_evicts_once_enough_was_added(self):
+        cache = AssetDiskCache(self.directory, 1000)
+        with patch.object(cache, 'evict') as mock_evict:
+            for name in ('first.txt', 'second.txt'):
+                ''.join(cache.stream_and_fill(self.make_content(name, 'a' * 40)))
+            self.assertFalse(mock_evict.called)
+            ''.join(cache.stream_and_fill(self.make_content('third.txt', 'a' * 40)))
+            self.assertEqual(mock_evict.call_count, 1)
+
+    def test_evicts_stale_temporary_files(self):
+        handle, path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, dir=self.directory)
+        os.close(handle)
+        self.cache.evict()
+        self.assertEqual(self.cached_files(), [os.path.basename(path)])
+
+        os.utime(path, (1, 1))
+        self.cache.evict()
+        self.assertEqual(self.cached_files(), [])
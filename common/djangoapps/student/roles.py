@@ -39,20 +39,53 @@ class RoleCache(object):
     A cache of the CourseAccessRoles held by a particular user
     """
     def __init__(self, user):
+        # Stored as tuples, rather than django models, so that roles can be looked up in the set
         self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
+            (access_role.role, access_role.course_id, access_role.org)
+            for access_role in CourseAccessRole.objects.filter(user=user).all()
         )
+        self._course_roles = {}
 
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
         """
-        return any(
-            access_role.role == role and
-            access_role.course_id == course_id and
-            access_role.org == org
-            for access_role in self._roles
-        )
+        return (role, course_id, org) in self._roles
+
+    def course_roles(self, course_key):
+        """
+        Return the set of the names of the roles held in the course with
+        `course_key`, or in its org.
+        """
+        if course_key not in self._course_roles:
+            self._course_roles[course_key] = frozenset(
+                role for role, course_id, org in self._roles
+                if org == course_key.org and course_id in (course_key, None)
+            )
+        return self._course_roles[course_key]
+
+
+def get_role_cache(user):
+    """
+    Return the RoleCache of the supplied django user, loading it if it hasn't been yet.
+    """
+    # pylint: disable=protected-access
+    if not hasattr(user, '_roles'):
+        user._roles = RoleCache(user)
+    return user._roles
+
+
+def get_course_roles(user, course_key):
+    """
+    Return the set of the names of the roles (e.g. 'staff', 'instructor') the
+    supplied django user holds in the course with `course_key`, or in its org.
+
+    This answers for all of the course and org roles of the user at once, from
+    the roles cached on the user.
+    """
+    if not (user.is_authenticated() and user.is_active):
+        return frozenset()
+    return get_role_cache(user).course_roles(course_key)
 
 
 class AccessRole(object):
@@ -137,13 +170,7 @@ class RoleBase(AccessRole):
         if not (user.is_authenticated() and user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(user, '_roles'):
-            # Cache a list of tuples identifying the particular roles that a user has
-            # Stored as tuples, rather than django models, to make it cheaper to construct objects for comparison
-            user._roles = RoleCache(user)
-
-        return user._roles.has_role(self._role_name, self.course_key, self.org)
+        return get_role_cache(user).has_role(self._role_name, self.course_key, self.org)
 
     def add_users(self, *users):
         """
@@ -339,11 +366,7 @@ class UserBasedRole(object):
         if not (self.user.is_authenticated() and self.user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(self.user, '_roles'):
-            self.user._roles = RoleCache(self.user)
-
-        return self.user._roles.has_role(self.role, course_key, course_key.org)
+        return get_role_cache(self.user).has_role(self.role, course_key, course_key.org)
 
     def add_course(self, *course_keys):
         """
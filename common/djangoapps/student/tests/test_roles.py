@@ -9,7 +9,7 @@ from student.tests.factories import AnonymousUserFactory
 
 from student.roles import (
     GlobalStaff, CourseRole, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole
+    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole, get_course_roles
 )
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -193,3 +193,29 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+    @ddt.data(*ROLES)
+    @ddt.unpack
+    def test_course_roles(self, role, target):
+        role.add_users(self.user)
+        cache = RoleCache(self.user)
+        self.assertEqual(cache.course_roles(self.IN_KEY), frozenset([target[0]]))
+        if target[1] is None:
+            # Org roles apply to every course of the org
+            self.assertEqual(cache.course_roles(self.NOT_IN_KEY), frozenset([target[0]]))
+        else:
+            self.assertEqual(cache.course_roles(self.NOT_IN_KEY), frozenset())
+
+    def test_get_course_roles(self):
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        OrgInstructorRole(self.IN_KEY.org).add_users(self.user)
+        self.assertEqual(get_course_roles(self.user, self.IN_KEY), frozenset(['staff', 'instructor']))
+
+        # Roles are loaded once, and reloaded when they change
+        with self.assertNumQueries(0):
+            self.assertEqual(get_course_roles(self.user, self.NOT_IN_KEY), frozenset(['instructor']))
+        CourseStaffRole(self.IN_KEY).remove_users(self.user)
+        self.assertEqual(get_course_roles(self.user, self.IN_KEY), frozenset(['instructor']))
+
+        self.user.is_active = False
+        self.assertEqual(get_course_roles(self.user, self.IN_KEY), frozenset())
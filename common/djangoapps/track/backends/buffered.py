@@ -0,0 +1,188 @@
+"""
+Event tracker backend that sends events to another backend from a background thread.
+
+Sending events to a backend in the thread of the request that emits them
+makes users wait on the backend, and stalls of the backend stall requests.
+`BufferedBackend` instead puts events on a bounded queue, from which a worker
+thread sends them to the backend it wraps in batches (with its `send_batch`,
+for backends derived from `BaseBackend`). For example::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'overflow': 'drop',
+          }
+      }
+  }
+
+Events must not be modified once sent, since they are sent to the wrapped
+backend later.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+from importlib import import_module
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+# What to do with events sent while the queue is full: drop them, or wait for
+# the worker thread to make room for them.
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+# Seconds to wait for queued events to be sent when the process exits.
+EXIT_FLUSH_TIMEOUT = 5
+
+
+def _instantiate_backend(config):
+    """
+    Instantiate the backend described by `config`, a dict with the full path
+    to the backend class as its 'ENGINE', and its keyword arguments as its
+    'OPTIONS', like the entries of TRACKING_BACKENDS.
+    """
+    module_name, __, class_name = config['ENGINE'].rpartition('.')
+    try:
+        cls = getattr(import_module(module_name), class_name)
+    except (ValueError, AttributeError, ImportError):
+        raise ValueError('Cannot find event track backend %s' % config['ENGINE'])
+    return cls(**config.get('OPTIONS', {}))
+
+
+class BufferedBackend(BaseBackend):
+    """Event tracker backend that sends events to a backend from a worker thread."""
+
+    def __init__(self, backend, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 overflow=OVERFLOW_DROP, **kwargs):
+        """
+        Wrap a backend.
+
+        :Parameters:
+
+          - `backend`: the backend to send events to, as a dict with its
+            'ENGINE' and 'OPTIONS'
+          - `max_queue_size`: the number of events that can wait to be sent
+          - `batch_size`: the largest number of events sent at once
+          - `flush_interval`: the longest time, in seconds, the worker waits
+            for more events to fill a batch
+          - `overflow`: 'drop' to drop events sent while the queue is full,
+            or 'block' to wait for room in the queue
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy %s' % overflow)
+
+        self.backend = _instantiate_backend(backend)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.queue = Queue.Queue(max_queue_size)
+        self.tags = ['backend:{}'.format(type(self.backend).__name__)]
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        atexit.register(self.flush, EXIT_FLUSH_TIMEOUT)
+
+    def send(self, event):
+        """Queue the event to be sent by the worker thread."""
+        self._start_worker()
+        item = (time.time(), event)
+        if self.overflow == OVERFLOW_BLOCK:
+            self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except Queue.Full:
+                dog_stats_api.increment('track.buffered.dropped', tags=self.tags)
+
+    def flush(self, timeout=None):
+        """
+        Wait for the queued events to be sent, for at most `timeout` seconds
+        (None waits as long as it takes). Returns whether they were all sent.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                if self._worker_pid != os.getpid():
+                    # Nothing will send the events queued before this process was forked.
+                    return False
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _start_worker(self):
+        """
+        Start the worker thread of the current process, if it isn't running.
+        """
+        if self._worker_pid == os.getpid():
+            return
+        with self._worker_lock:
+            # Threads don't survive forking, so processes forked from the one
+            # that started the worker need their own.
+            if self._worker_pid != os.getpid():
+                self._worker = threading.Thread(target=self._run, name='track-buffered-backend')
+                self._worker.daemon = True
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self):
+        """
+        Send the queued events, in batches, forever.
+        """
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except Queue.Empty:
+                    break
+
+            try:
+                self._send_batch(batch)
+            finally:
+                for __ in batch:
+                    self.queue.task_done()
+
+    def _send_batch(self, batch):
+        """
+        Send a batch of (queue time, event) items to the backend.
+        """
+        dog_stats_api.histogram('track.buffered.queue_size', self.queue.qsize(), tags=self.tags)
+        dog_stats_api.histogram('track.buffered.batch_size', len(batch), tags=self.tags)
+        dog_stats_api.histogram('track.buffered.latency', time.time() - batch[0][0], tags=self.tags)
+
+        events = [event for __, event in batch]
+        try:
+            with dog_stats_api.timer('track.buffered.send', tags=self.tags):
+                if hasattr(self.backend, 'send_batch'):
+                    self.backend.send_batch(events)
+                else:
+                    for event in events:
+                        self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            # Keep the worker alive for later events.
+            log.exception('Error sending %d events to event tracker backend %s', len(events), self.backend)
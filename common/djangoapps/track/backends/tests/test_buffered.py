@@ -0,0 +1,95 @@
+from __future__ import absolute_import
+
+import threading
+
+from dogapi import dog_stats_api
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend recording the batches of events it's sent, after waiting for `release`."""
+    instances = []
+
+    def __init__(self, **options):
+        super(RecordingBackend, self).__init__(**options)
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+        self.instances.append(self)
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.release.wait()
+        self.batches.append(events)
+
+
+def buffered_backend(**options):
+    """Returns a BufferedBackend sending to a RecordingBackend, and the latter."""
+    backend = BufferedBackend(backend={'ENGINE': 'track.backends.tests.test_buffered.RecordingBackend'}, **options)
+    return backend, RecordingBackend.instances.pop()
+
+
+class TestBufferedBackend(TestCase):
+    def test_events_sent_in_batches(self):
+        backend, recording_backend = buffered_backend(batch_size=2, flush_interval=0.5)
+        recording_backend.release.clear()
+        events = [{'test': number} for number in range(5)]
+        for event in events:
+            backend.send(event)
+        recording_backend.release.set()
+
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(sum(recording_backend.batches, []), events)
+        self.assertTrue(all(len(batch) <= 2 for batch in recording_backend.batches))
+        self.assertEqual(recording_backend.batches[-1], [events[-1]])
+
+    def test_drop_when_full(self):
+        backend, recording_backend = buffered_backend(max_queue_size=1, batch_size=1)
+        recording_backend.release.clear()
+        with patch.object(dog_stats_api, 'increment') as mock_increment:
+            backend.send({'test': 1})
+            # Wait for the worker to pick up the first event, and fill the queue
+            while backend.queue.qsize():
+                pass
+            backend.send({'test': 2})
+            backend.send({'test': 3})
+        recording_backend.release.set()
+
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(recording_backend.batches, [[{'test': 1}], [{'test': 2}]])
+        mock_increment.assert_called_once_with('track.buffered.dropped', tags=['backend:RecordingBackend'])
+
+    def test_block_when_full(self):
+        backend, recording_backend = buffered_backend(max_queue_size=1, batch_size=1, overflow='block')
+        for number in range(5):
+            backend.send({'test': number})
+
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(len(recording_backend.batches), 5)
+
+    def test_backend_errors(self):
+        backend, recording_backend = buffered_backend()
+        with patch.object(recording_backend, 'send_batch', side_effect=[ValueError, None]) as mock_send_batch:
+            backend.send({'test': 1})
+            self.assertTrue(backend.flush(5))
+            backend.send({'test': 2})
+            self.assertTrue(backend.flush(5))
+        mock_send_batch.assert_called_with([{'test': 2}])
+
+    def test_flush_timeout(self):
+        backend, recording_backend = buffered_backend()
+        recording_backend.release.clear()
+        backend.send({'test': 1})
+        self.assertFalse(backend.flush(0.1))
+        recording_backend.release.set()
+        self.assertTrue(backend.flush(5))
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            buffered_backend(overflow='wait')
@@ -0,0 +1,114 @@
+"""
+Performance test for the number of events per second tracking backends send.
+
+Reports the throughput of each backend for typical and oversized events,
+sent as plain dicts, which each backend serializes on its own, and as the
+`TrackingEvent`s `track.tracker.send` fans out, which share their JSON.
+"""
+from __future__ import absolute_import
+
+import datetime
+import itertools
+import json
+import logging
+import time
+import unittest
+
+import ddt
+from django.conf import settings
+from django.test import TestCase
+from mock import patch
+#from nose.plugins.attrib import attr
+
+from track.backends.django import DjangoBackend
+from track.backends.logger import LoggerBackend
+from track.backends.mongodb import MongoBackend
+from track.utils import TrackingEvent
+
+# Number of events sent to a backend per timing.
+EVENT_AMOUNT = 10000
+
+
+def make_event(answer_size):
+    """
+    Make an event like those of problem checks, with an answer of `answer_size` characters.
+    """
+    return {
+        'username': 'student',
+        'ip': '127.0.0.1',
+        'event_source': 'browser',
+        'event_type': 'problem_check',
+        'event': json.dumps({'answers': {'i4x-edX-toy-problem-test_2_1': 'x' * answer_size}, 'attempts': 1}),
+        'agent': 'Mozilla/5.0 (X11; Linux x86_64)',
+        'page': 'https://courses.example.com/courses/edX/toy/2012_Fall/courseware/Overview/',
+        'time': datetime.datetime.utcnow(),
+        'host': 'courses.example.com',
+        'context': {'course_id': 'edX/toy/2012_Fall', 'org_id': 'edX', 'user_id': 1, 'path': '/event'},
+    }
+
+
+def make_logger_backend():
+    """A LoggerBackend whose logger drops the events."""
+    logger = logging.getLogger('track.backends.tests.throughput')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.NullHandler())
+    return LoggerBackend(name=logger.name)
+
+
+def make_mongo_backend():
+    """A MongoBackend without a database, which only measures the backend itself."""
+    with patch('track.backends.mongodb.MongoClient'):
+        return MongoBackend()
+
+
+BACKENDS = (
+    ('logger', make_logger_backend),
+    ('mongo', make_mongo_backend),
+    ('django', DjangoBackend),
+)
+
+# Answer sizes of typical events, and of events longer than TRACK_MAX_EVENT.
+ANSWER_SIZES = (100, 10 * settings.TRACK_MAX_EVENT)
+
+EVENT_TYPES = (
+    ('dict', dict),
+    ('TrackingEvent', TrackingEvent),
+)
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class TrackingBackendThroughput(TestCase):
+    """
+    Report the number of events per second tracking backends send.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(BACKENDS, ANSWER_SIZES, EVENT_TYPES))
+    @ddt.unpack
+    def test_throughput(self, backend_type, answer_size, event_type):
+        """
+        Send events of one size and type to a backend.
+        """
+        backend_name, make_backend = backend_type
+        event_type_name, event_class = event_type
+        backend = make_backend()
+        event = make_event(answer_size)
+        events = [event_class(event) for __ in xrange(EVENT_AMOUNT)]
+
+        start = time.time()
+        for event in events:
+            # Sent twice, as when two backends share events
+            backend.send(event)
+            backend.send(event)
+        duration = time.time() - start
+
+        print "TrackingBackendThroughput:{}:{}:{}: {:.0f} events per second".format(
+            backend_name, answer_size, event_type_name, 2 * EVENT_AMOUNT / duration
+        )
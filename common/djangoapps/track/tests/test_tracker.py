@@ -4,6 +4,7 @@ from django.test.utils import override_settings
 
 import track.tracker as tracker
 from track.backends import BaseBackend
+from track.utils import TrackingEvent
 
 
 SIMPLE_SETTINGS = {
@@ -88,6 +89,18 @@ class TestTrackerDjangoInstantiation(TestCase):
         self.assertEqual(backends[0].count, event_count)
         self.assertEqual(backends[1].count, event_count)
 
+    @override_settings(TRACKING_BACKENDS=MULTI_SETTINGS)
+    def test_backends_share_event(self):
+        """Test that backends are sent the same event, which caches its serialization."""
+
+        backends = self._reload_backends().values()
+
+        tracker.send({'event_type': 'test'})
+
+        self.assertIsInstance(backends[0].last_event, TrackingEvent)
+        self.assertEqual(backends[0].last_event, {'event_type': 'test'})
+        self.assertIs(backends[0].last_event, backends[1].last_event)
+
     @override_settings(TRACKING_BACKENDS=MULTI_SETTINGS)
     def test_django_remove_settings(self):
         """Test if a backend can be remove by setting it to None."""
@@ -112,7 +125,8 @@ class DummyBackend(BaseBackend):
         super(DummyBackend, self).__init__(**options)
         self.flag = options.get('flag', False)
         self.count = 0
+        self.last_event = None
 
-    # pylint: disable=unused-argument
     def send(self, event):
         self.count += 1
+        self.last_event = event
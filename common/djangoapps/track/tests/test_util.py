@@ -1,11 +1,12 @@
 from datetime import datetime
 import json
 
+from mock import patch
 from pytz import UTC
 
 from django.test import TestCase
 
-from track.utils import DateTimeJSONEncoder
+from track.utils import DateTimeJSONEncoder, DATETIME_JSON_ENCODER, encode_event, TrackingEvent
 
 
 class TestDateTimeJSONEncoder(TestCase):
@@ -35,3 +36,48 @@ class TestDateTimeJSONEncoder(TestCase):
         self.assertEqual(from_json['a_datetime'], an_iso_datetime)
         self.assertEqual(from_json['a_tz_datetime'], an_iso_datetime)
         self.assertEqual(from_json['a_date'], an_iso_date)
+
+
+class TestEncodeEvent(TestCase):
+    def setUp(self):
+        super(TestEncodeEvent, self).setUp()
+        self.event = {
+            'event_type': 'problem_check',
+            'time': datetime(2012, 05, 01, 07, 27, 10, 20000),
+            'event': {'answers': {'input_1': 'x' * 100}},
+        }
+
+    def test_encode_event(self):
+        self.assertEqual(encode_event(self.event), json.dumps(self.event, cls=DateTimeJSONEncoder))
+
+    def test_truncation(self):
+        full_json = encode_event(self.event)
+        self.assertEqual(encode_event(self.event, 50), full_json[:50])
+
+    def test_truncation_of_long_strings(self):
+        # Strings longer than the limit are cut before being encoded
+        event = {'event': u'"\u00e9t\u00e9" ' * 20}
+        full_json = encode_event(event)
+        with patch.object(DATETIME_JSON_ENCODER, 'encode', wraps=DATETIME_JSON_ENCODER.encode) as mock_encode:
+            self.assertEqual(encode_event(event, 50), full_json[:50])
+        self.assertEqual(mock_encode.call_args[0][0], {'event': event['event'][:50]})
+
+        event = {'event': event['event'].encode('utf-8')}
+        self.assertEqual(encode_event(event, 50), full_json[:50])
+
+    def test_tracking_event_encoded_once(self):
+        event = TrackingEvent(self.event)
+        with patch.object(DATETIME_JSON_ENCODER, 'encode', wraps=DATETIME_JSON_ENCODER.encode) as mock_encode:
+            full_json = encode_event(event)
+            self.assertEqual(encode_event(event), full_json)
+            self.assertEqual(encode_event(event, 50), full_json[:50])
+        self.assertEqual(mock_encode.call_count, 1)
+        self.assertEqual(json.loads(full_json), json.loads(encode_event(self.event)))
+
+    def test_tracking_event_modified(self):
+        event = TrackingEvent(self.event)
+        encode_event(event)
+        event['event_type'] = 'problem_save'
+        self.assertEqual(json.loads(encode_event(event))['event_type'], 'problem_save')
+        del event['event_type']
+        self.assertNotIn('event_type', json.loads(encode_event(event)))
@@ -26,6 +26,7 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.utils import TrackingEvent
 
 
 __all__ = ['send']
@@ -91,6 +92,8 @@ def send(event):
     """
     dog_stats_api.increment('track.send.count')
 
+    # Backends share the serialization of the event
+    event = TrackingEvent(event)
     for name, backend in backends.iteritems():
         with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
             backend.send(event)
@@ -28,3 +28,86 @@ class DateTimeJSONEncoder(json.JSONEncoder):
             return obj.isoformat()
 
         return super(DateTimeJSONEncoder, self).default(obj)
+
+
+# Encoders keep no state between calls, so a single one can encode all events.
+DATETIME_JSON_ENCODER = DateTimeJSONEncoder()
+
+
+def encode_event(event, max_length=None):
+    """
+    Serialize an event to JSON, truncated to `max_length` characters if given.
+
+    The JSON of a `TrackingEvent` is only computed once.
+    """
+    if isinstance(event, TrackingEvent):
+        return event.to_json(max_length)
+    return _encode_event(event, max_length)
+
+
+def _encode_event(event, max_length):
+    """
+    Serialize an event to JSON, truncated to `max_length` characters if given.
+
+    Top-level strings longer than `max_length` are cut to `max_length`
+    characters before encoding the event: the JSON of a string is at least as
+    long as the string, so the truncated JSON of the event stays the same
+    (besides the order of its fields), without encoding the whole string.
+    """
+    if max_length is not None:
+        long_strings = [
+            (name, value) for name, value in event.iteritems()
+            if isinstance(value, basestring) and len(value) > max_length
+        ]
+        if long_strings:
+            event = dict(event)
+            for name, value in long_strings:
+                if isinstance(value, str):
+                    # Decoded as the encoder does, but only as far as needed: characters take at most 4
+                    # bytes in UTF-8. Only the character cut at the end of that part can fail to decode.
+                    value = value[:4 * max_length].decode('utf-8', 'ignore')
+                event[name] = value[:max_length]
+
+    return DATETIME_JSON_ENCODER.encode(event)[:max_length]
+
+
+class TrackingEvent(dict):
+    """
+    An event sent to several tracking backends, which caches its JSON
+    serialization so that they can share it.
+
+    Setting or removing its fields resets the cache, but backends must not
+    modify the values of its fields.
+    """
+
+    def to_json(self, max_length=None):
+        """
+        Serialize the event to JSON, truncated to `max_length` characters if given.
+        """
+        cached_json = self.__dict__.setdefault('_json', {})
+        if max_length not in cached_json:
+            if None in cached_json:
+                cached_json[max_length] = cached_json[None][:max_length]
+            else:
+                cached_json[max_length] = _encode_event(self, max_length)
+        return cached_json[max_length]
+
+    def _modified(method):  # pylint: disable=no-self-argument
+        """
+        Wraps a method of dict that modifies the event to reset the cached JSON.
+        """
+        def modify(self, *args, **kwargs):
+            """Reset the cached JSON, and modify the event."""
+            self.__dict__.pop('_json', None)
+            return method(self, *args, **kwargs)  # pylint: disable=not-callable
+        return modify
+
+    __setitem__ = _modified(dict.__setitem__)
+    __delitem__ = _modified(dict.__delitem__)
+    clear = _modified(dict.clear)
+    pop = _modified(dict.pop)
+    popitem = _modified(dict.popitem)
+    setdefault = _modified(dict.setdefault)
+    update = _modified(dict.update)
+
+    del _modified
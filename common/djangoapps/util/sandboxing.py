@@ -1,9 +1,17 @@
+import json
+import logging
 import re
+
 from django.conf import settings
+from django.core.cache import get_cache
+
+log = logging.getLogger(__name__)
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+_safe_exec_cache_backends = {}
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -38,3 +46,58 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the SafeExecCache configured by the SAFE_EXEC_CACHE setting, which
+    the runtime passes to capa's safe_exec, or None if it isn't enabled.
+    """
+    config = getattr(settings, 'SAFE_EXEC_CACHE', None)
+    if not config:
+        return None
+    if config['CACHE'] not in _safe_exec_cache_backends:
+        _safe_exec_cache_backends[config['CACHE']] = get_cache(config['CACHE'])
+    return SafeExecCache(
+        _safe_exec_cache_backends[config['CACHE']],
+        timeout=config.get('TIMEOUT'),
+        error_timeout=config.get('ERROR_TIMEOUT'),
+        max_result_size=config.get('MAX_RESULT_SIZE'),
+    )
+
+
+class SafeExecCache(object):
+    """
+    Cache of the results of capa's safe_exec, over a Django cache backend.
+
+    Results are the (exception message, globals) pairs that safe_exec caches.
+    Results of executions that raised an exception are kept for
+    `error_timeout` seconds rather than `timeout`, so that failures caused by
+    the sandbox (e.g. running out of time under load) don't stick around.
+    Results whose JSON is larger than `max_result_size` bytes aren't cached.
+    Timeouts of None use the backend's default timeout.
+    """
+    def __init__(self, cache, timeout=None, error_timeout=None, max_result_size=None):
+        self.cache = cache
+        self.timeout = timeout
+        self.error_timeout = error_timeout
+        self.max_result_size = max_result_size
+
+    def get(self, key):
+        """
+        Return the result cached under `key`, or None.
+        """
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        """
+        Cache the result `value` under `key`, unless it's too large.
+        """
+        emsg, __ = value
+        if self.max_result_size is not None:
+            size = len(json.dumps(value))
+            if size > self.max_result_size:
+                log.info(u"Not caching safe_exec result of %d bytes under %s", size, key)
+                return
+        timeout = self.error_timeout if emsg else self.timeout
+        self.cache.set(key, value, timeout)
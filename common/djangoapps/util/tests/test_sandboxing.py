@@ -2,9 +2,10 @@
 Tests for sandboxing.py in util app
 """
 
+import mock
 from django.test import TestCase
 from opaque_keys.edx.locator import LibraryLocator
-from util.sandboxing import can_execute_unsafe_code
+from util.sandboxing import can_execute_unsafe_code, get_safe_exec_cache, SafeExecCache
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -37,3 +38,35 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+
+class SafeExecCacheTest(TestCase):
+    """
+    Test the cache of safe_exec results
+    """
+    def setUp(self):
+        super(SafeExecCacheTest, self).setUp()
+        self.backend = mock.Mock()
+        self.cache = SafeExecCache(self.backend, timeout=600, error_timeout=60, max_result_size=100)
+
+    def test_timeouts(self):
+        self.cache.set('success', (None, {'a': 1}))
+        self.backend.set.assert_called_with('success', (None, {'a': 1}), 600)
+        self.cache.set('failure', ('ZeroDivisionError', {}))
+        self.backend.set.assert_called_with('failure', ('ZeroDivisionError', {}), 60)
+
+    def test_too_large(self):
+        self.cache.set('large', (None, {'a': 'a' * 100}))
+        self.assertFalse(self.backend.set.called)
+
+    @override_settings(SAFE_EXEC_CACHE=None)
+    def test_disabled(self):
+        self.assertIsNone(get_safe_exec_cache())
+
+    @override_settings(SAFE_EXEC_CACHE={'CACHE': 'default', 'TIMEOUT': 600})
+    def test_configured(self):
+        cache = get_safe_exec_cache()
+        cache.set('key', (None, {'a': 1}))
+        self.assertEqual(cache.get('key'), (None, {'a': 1}))
+        self.assertEqual(cache.timeout, 600)
+        self.assertIsNone(cache.max_result_size)
@@ -1,12 +1,15 @@
 """
 Parser and evaluator for FormulaResponse and NumericalResponse
 
-Uses pyparsing to parse. Main function as of now is evaluator().
+Uses pyparsing to parse. Main functions as of now are evaluator() and
+evaluate_samples().
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +76,11 @@ SUFFIXES = {
 }
 
 
+# The types of the values of (sub)expressions: numbers, or arrays of them when
+# evaluating several samples at once.
+NUMERIC_TYPES = (numbers.Number, numpy.ndarray)
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -121,8 +129,8 @@ def eval_atom(parse_result):
 
     In the case of parenthesis, ignore them.
     """
-    # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    # Find first number (or array of numbers) in the list
+    result = next(k for k in parse_result if isinstance(k, NUMERIC_TYPES))
     return result
 
 
@@ -136,7 +144,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if isinstance(k, NUMERIC_TYPES)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -173,12 +181,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +199,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -232,30 +240,187 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     math_interpreter = ParseAugmenter(math_expr, case_sensitive)
     math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    return math_interpreter.evaluate(variables, functions)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+def evaluate_samples(samples, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for several sets of variables, parsing it once.
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+    -Samples are passed as a list of dictionaries from string to value, which
+     must all define the same variables.
+    -Unary functions are passed as a dictionary from string to function.
+
+    Return a list of the results `evaluator` gives for each of the samples
+    (or raise the error it raises for the first sample it fails on).
+
+    The samples are evaluated together, with each variable holding a NumPy
+    array of its values, unless that raises an error or warning (e.g.
+    division by zero, or functions that only take numbers, like factorial).
+    Then they are evaluated one at a time, so that each gets the exact
+    result or error of `evaluator`.
+    """
+    if not samples:
+        return []
+    if math_expr.strip() == "":
+        return [float('nan')] * len(samples)
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    if len(samples) > 1 and all(set(sample) == set(samples[0]) for sample in samples):
+        variables = {
+            name: numpy.array([sample[name] for sample in samples])
+            for name in samples[0]
+        }
+        try:
+            with numpy.errstate(all='raise', under='ignore'):
+                results = math_interpreter.evaluate(variables, functions)
+        except UndefinedVariable:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            pass
+        else:
+            if numpy.shape(results) == (len(samples),):
+                return list(results)
+            if numpy.ndim(results) == 0 and not math_interpreter.variables_used:
+                # The expression is a constant
+                return [results] * len(samples)
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+    return [math_interpreter.evaluate(sample, functions) for sample in samples]
+
+
+def _build_grammar():
+    """
+    Build the pyparsing grammar of math expressions.
+
+    The groups and result names of the grammar make up the tree that
+    `ParseAugmenter.parse_algebra` produces.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+# The grammar is built once, and shared by all parses.
+GRAMMAR = _build_grammar()
+
+# Number of parsed expressions kept by each process, see `ParsedExpressionCache`.
+PARSED_EXPRESSION_CACHE_SIZE = 2000
+
+
+class ParsedExpressionCache(object):
+    """
+    A thread-safe, process-local LRU cache of parsed math expressions.
+
+    Maps expression strings to the (tree, variables used, functions used)
+    that parsing them gives. Parsing doesn't depend on case sensitivity,
+    which only matters when variables and functions are looked up, so the
+    entries serve both. The trees are only read once parsed, so they are
+    shared by all users of an entry.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, math_expr):
+        """
+        Return the parse of `math_expr`, or None if it isn't cached.
+        """
+        with self._lock:
+            parse = self._entries.pop(math_expr, None)
+            if parse is not None:
+                # Re-insert to mark as most recently used
+                self._entries[math_expr] = parse
+            return parse
+
+    def set(self, math_expr, parse):
+        """
+        Store the `parse` of `math_expr`.
+        """
+        with self._lock:
+            self._entries.pop(math_expr, None)
+            self._entries[math_expr] = parse
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+PARSED_EXPRESSIONS = ParsedExpressionCache(PARSED_EXPRESSION_CACHE_SIZE)
+
+
+def find_names_used(tree):
+    """
+    Return the sets of the names of the variables and of the functions used
+    in a parse tree.
+    """
+    variables_used = set()
+    functions_used = set()
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if not isinstance(node, ParseResults):
+            continue
+        node_name = node.getName()
+        if node_name == 'variable':
+            variables_used.add(node[0])
+        elif node_name == 'function':
+            functions_used.add(node[0])
+        nodes.extend(node)
+    return variables_used, functions_used
 
 
 class ParseAugmenter(object):
@@ -278,23 +443,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -303,61 +451,53 @@ class ParseAugmenter(object):
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
 
+        Expressions that have been parsed before are taken from
+        `PARSED_EXPRESSIONS` rather than parsed again.
+
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        parse = PARSED_EXPRESSIONS.get(self.math_expr)
+        if parse is None:
+            tree = GRAMMAR.parseString(self.math_expr)[0]
+            parse = (tree,) + find_names_used(tree)
+            PARSED_EXPRESSIONS.set(self.math_expr, parse)
+
+        self.tree, variables_used, functions_used = parse
+        self.variables_used = set(variables_used)
+        self.functions_used = set(functions_used)
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the parsed expression with the given variables and functions.
+
+        Call `parse_algebra` first; see `evaluator` for the arguments.
+        """
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.check_variables(all_variables, all_functions)
+
+        # Create a recursion to evaluate the tree.
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+        return self.reduce_tree(evaluate_actions)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -0,0 +1,77 @@
+"""
+Benchmarks of calc's parsing, evaluation and previews.
+
+Reports how many expressions per second `evaluator` and `latex_preview`
+handle, with every expression parsed anew (as before parsed expressions were
+cached) and with the parses cached.
+"""
+import timeit
+import unittest
+
+import numpy
+
+import calc
+from calc.preview import latex_preview
+
+# Expressions like those students enter in formula problems.
+EXPRESSIONS = (
+    '3.14',
+    'x^2+2*x*y+y^2',
+    '(R1||R2)*I',
+    'sin(omega*t+phi)*exp(-t/tau)',
+    'sqrt(x^2+y^2)/(4*pi*e0*r^2)',
+    '1/2*m*v^2+m*g*h',
+)
+
+VARIABLES = {
+    'x': 1.5, 'y': -0.5, 'R1': 1e3, 'R2': 2.2e3, 'I': 0.01, 'omega': 6.28, 't': 0.5,
+    'phi': 0.1, 'tau': 2.0, 'e0': 8.85e-12, 'r': 0.3, 'm': 2.0, 'v': 3.0, 'g': 9.8, 'h': 10.0,
+}
+
+# Number of times each expression is handled per timing.
+REPETITIONS = 200
+
+
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class CalcBenchmark(unittest.TestCase):
+    """
+    Report the throughput of evaluator and latex_preview.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(CalcBenchmark, self).setUp()
+        calc.PARSED_EXPRESSIONS.clear()
+        self.addCleanup(calc.PARSED_EXPRESSIONS.clear)
+        numpy.seterr(all='ignore')
+
+    def report(self, name, function):
+        """
+        Time `function` on every expression, uncached and cached, and print
+        the expressions handled per second.
+        """
+        def run(clear_cache):
+            """Handle every expression REPETITIONS times."""
+            for __ in xrange(REPETITIONS):
+                for expression in EXPRESSIONS:
+                    if clear_cache:
+                        calc.PARSED_EXPRESSIONS.clear()
+                    function(expression)
+
+        count = REPETITIONS * len(EXPRESSIONS)
+        uncached = timeit.timeit(lambda: run(True), number=1)
+        cached = timeit.timeit(lambda: run(False), number=1)
+        print "CalcBenchmark:{}: {:.0f}/s uncached, {:.0f}/s cached".format(
+            name, count / uncached, count / cached
+        )
+
+    def test_evaluator(self):
+        self.report('evaluator', lambda expression: calc.evaluator(VARIABLES, {}, expression))
+
+    def test_latex_preview(self):
+        self.report('latex_preview', lambda expression: latex_preview(expression, VARIABLES.keys()))
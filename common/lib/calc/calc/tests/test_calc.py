@@ -3,6 +3,7 @@ Unit tests for calc.py
 """
 
 import unittest
+import mock
 import numpy
 import calc
 from pyparsing import ParseException
@@ -559,3 +560,94 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which should give the same results
+    as calc.evaluator for each of the samples.
+    """
+    SAMPLES = [{'x': 0.5, 'y': 2.0}, {'x': 1.5, 'y': -3.0}, {'x': 4.0, 'y': 0.25}]
+
+    def assert_same_as_evaluator(self, math_expr, samples=None, functions=None, case_sensitive=False):
+        """
+        Assert that evaluate_samples gives the results of evaluator for `math_expr`.
+        """
+        samples = self.SAMPLES if samples is None else samples
+        functions = functions or {}
+        expected = [calc.evaluator(sample, functions, math_expr, case_sensitive) for sample in samples]
+        actual = calc.evaluate_samples(samples, functions, math_expr, case_sensitive)
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_expressions(self):
+        for math_expr in ['x', 'x+y', '-x*y/2', 'x^y^2', '(x+1)*(y-1)', 'sin(x)*sqrt(abs(y))', 'X*Y', 'x*i', '7']:
+            self.assert_same_as_evaluator(math_expr)
+
+    def test_vectorized(self):
+        """
+        Test that expressions are only parsed once, and evaluated once for all samples.
+        """
+        functions = {'f': numpy.cos}
+        parse_algebra = calc.ParseAugmenter.parse_algebra
+        evaluate = calc.ParseAugmenter.evaluate
+        with mock.patch.object(calc.ParseAugmenter, 'parse_algebra', autospec=True) as mock_parse:
+            mock_parse.side_effect = parse_algebra
+            with mock.patch.object(calc.ParseAugmenter, 'evaluate', autospec=True) as mock_evaluate:
+                mock_evaluate.side_effect = evaluate
+                calc.evaluate_samples(self.SAMPLES, functions, 'f(x)+y')
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(mock_evaluate.call_count, 1)
+
+    def test_falls_back_to_each_sample(self):
+        # Division by zero, and functions of numbers only
+        self.assert_same_as_evaluator('1/(x-1.5)')
+        self.assert_same_as_evaluator('fact(3)*y')
+        self.assert_same_as_evaluator('x||y')
+        with self.assertRaises(ValueError):
+            calc.evaluate_samples(self.SAMPLES, {}, 'fact(x)')
+
+    def test_errors(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.SAMPLES, {}, 'x+z')
+        with self.assertRaises(ParseException):
+            calc.evaluate_samples(self.SAMPLES, {}, 'x+')
+
+    def test_empty(self):
+        self.assertEqual(calc.evaluate_samples([], {}, 'x'), [])
+        self.assertTrue(all(numpy.isnan(value) for value in calc.evaluate_samples(self.SAMPLES, {}, '')))
+
+
+class ParsedExpressionCacheTest(unittest.TestCase):
+    """
+    Test that parsed expressions are cached and shared.
+    """
+    def setUp(self):
+        super(ParsedExpressionCacheTest, self).setUp()
+        calc.PARSED_EXPRESSIONS.clear()
+        self.addCleanup(calc.PARSED_EXPRESSIONS.clear)
+
+    def test_parsed_once(self):
+        with mock.patch('calc.calc.GRAMMAR', wraps=calc.GRAMMAR) as mock_grammar:
+            self.assertEqual(calc.evaluator({'x': 2.0}, {}, 'x^2'), 4.0)
+            self.assertEqual(calc.evaluator({'X': 3.0}, {}, 'x^2'), 9.0)
+            with self.assertRaisesRegexp(calc.UndefinedVariable, 'x'):
+                calc.evaluator({'X': 3.0}, {}, 'x^2', case_sensitive=True)
+        self.assertEqual(mock_grammar.parseString.call_count, 1)
+
+    def test_names_used(self):
+        interpreter = calc.ParseAugmenter('f(x)*sin(y^z)+2*pi')
+        interpreter.parse_algebra()
+        self.assertEqual(interpreter.variables_used, set(['x', 'y', 'z', 'pi']))
+        self.assertEqual(interpreter.functions_used, set(['f', 'sin']))
+
+    def test_evicts_least_recently_used(self):
+        cache = calc.ParsedExpressionCache(2)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        cache.get('first')
+        cache.set('third', 3)
+        self.assertEqual(cache.get('first'), 1)
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('third'), 3)
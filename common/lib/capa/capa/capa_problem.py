@@ -13,11 +13,13 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +60,57 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Number of parsed problems kept by each process, see `ParsedProblemCache`.
+PARSED_PROBLEM_CACHE_SIZE = 500
+
+
+class ParsedProblemCache(object):
+    """
+    A process-local LRU cache of parsed problem XML, keyed by problem text.
+
+    Parsing doesn't depend on the seed or on the student, so the problems
+    shown or graded by a process are only parsed once per distinct text.
+    Problems modify their trees in place, so each problem gets its own copy of
+    the cached tree.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, problem_text):
+        """
+        Return a copy of the tree parsed from `problem_text`, or None if it isn't cached.
+        """
+        with self._lock:
+            tree = self._entries.pop(problem_text, None)
+            if tree is None:
+                return None
+            # Re-insert to mark as most recently used
+            self._entries[problem_text] = tree
+        return deepcopy(tree)
+
+    def set(self, problem_text, tree):
+        """
+        Store a copy of the `tree` parsed from `problem_text`.
+        """
+        tree = deepcopy(tree)
+        with self._lock:
+            self._entries.pop(problem_text, None)
+            self._entries[problem_text] = tree
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+PARSED_PROBLEMS = ParsedProblemCache(PARSED_PROBLEM_CACHE_SIZE)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -161,10 +214,12 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
+        # parse problem XML file into an element tree, unless it's been parsed before
+        self.tree = PARSED_PROBLEMS.get(problem_text)
+        if self.tree is None:
+            self.tree = etree.XML(problem_text)
+            self.make_xml_compatible(self.tree)
+            PARSED_PROBLEMS.set(problem_text, self.tree)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -4,9 +4,11 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import sandbox_pool
 from dogapi import dog_stats_api
 
 import hashlib
+import time
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -47,6 +49,17 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
+def configure_sandbox_pool(size, max_jobs):
+    """
+    Execute code in a pool of up to `size` warm sandboxed processes per
+    process, replaced after `max_jobs` executions, rather than in a new
+    sandboxed process each time.  A size of 0 disables the pool.
+
+    The processes of the pool import the modules of ASSUMED_IMPORTS when they start.
+    """
+    sandbox_pool.configure(size, max_jobs, [modname for __, modname in ASSUMED_IMPORTS])
+
+
 def update_hash(hasher, obj):
     """
     Update a `hashlib` hasher with a nested object.
@@ -70,6 +83,25 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def safe_exec_cache_key(code, globals_dict, random_seed=None, python_path=None, extra_files=None):
+    """
+    Return the key under which the result of executing `code` is cached.
+
+    The key accounts for everything that can change the result: the code, the
+    values of the globals, the random seed, and the Python path along with the
+    contents of the extra files (such as a course's python_lib.zip).
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    update_hash(md5er, json_safe(globals_dict))
+    update_hash(md5er, python_path or [])
+    for filename, contents in extra_files or []:
+        update_hash(md5er, filename)
+        md5er.update(hashlib.md5(contents).hexdigest())
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -99,7 +131,10 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed and the files on the Python path.  Executions that raise an
+    exception are cached too.  Cache hits and misses are counted in the
+    `capa.safe_exec.cache` metric, and the time spent executing in
+    `capa.safe_exec.execution_time`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,13 +144,10 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = safe_exec_cache_key(code, globals_dict, random_seed, python_path, extra_files)
         cached = cache.get(key)
         if cached is not None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:hit'])
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
             emsg, cleaned_results = cached
@@ -123,17 +155,22 @@ def safe_exec(
             if emsg:
                 raise SafeExecException(emsg)
             return
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
 
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
+    pool = None if unsafely else sandbox_pool.get_pool()
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif pool is not None:
+        exec_fn = pool.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start_time = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
@@ -143,6 +180,11 @@ def safe_exec(
         emsg = e.message
     else:
         emsg = None
+    dog_stats_api.histogram(
+        'capa.safe_exec.execution_time',
+        time.time() - start_time,
+        tags=['unsafely:{}'.format(bool(unsafely))],
+    )
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
@@ -0,0 +1,315 @@
+"""
+Pool of warm sandboxed Python processes for capa's safe_exec.
+
+Executing code with codejail starts a new sandboxed Python for each
+execution, which then imports the modules problem code uses (numpy, scipy...)
+before it can run anything. The processes of a SandboxPool are started once,
+import those modules once, and then execute many pieces of code, each in a
+process forked from them with its own codejail resource limits. A process is
+replaced after executing `max_jobs` pieces of code.
+
+The pool is local to each process using it, and only used once configured
+with a size.
+"""
+import functools
+import json
+import logging
+import os
+import resource
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+log = logging.getLogger(__name__)
+
+# Source of the program run by the processes of the pool.
+WORKER_FILE_NAME = 'sandbox_worker.py'
+WORKER_PY = open(os.path.join(os.path.dirname(__file__), WORKER_FILE_NAME)).read()
+
+# Seconds to wait for a process of the pool beyond the real time limit of the
+# code it executes (it enforces the limit itself), before giving up on it.
+WORKER_GRACE_TIME = 5
+
+# Seconds to wait for a process of the pool to exit once its stdin is closed, before killing it.
+WORKER_EXIT_TIME = 1
+
+# Size of the reads of results from the processes of the pool.
+READ_SIZE = 64 * 1024
+
+_config = {'size': 0}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(size, max_jobs, preload_modules=()):
+    """
+    Configure the pool of the current process to hold up to `size` sandboxed
+    processes, that import `preload_modules` when they start and are replaced
+    after executing code `max_jobs` times. A size of 0 disables the pool.
+    """
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        _config.update(size=size, max_jobs=max_jobs, preload_modules=list(preload_modules))
+
+
+def get_pool():
+    """
+    Return the SandboxPool of the current process, or None if it's disabled or
+    codejail has no sandboxed Python configured.
+    """
+    global _pool  # pylint: disable=global-statement
+    if not _config['size'] or not jail_code.is_configured('python'):
+        return None
+    with _pool_lock:
+        # Processes forked from the one that started the pool can't share its sandboxed processes.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = SandboxPool(
+                sandbox_command('python'),
+                _config['size'],
+                _config['max_jobs'],
+                _config['preload_modules'],
+            )
+        return _pool
+
+
+def sandbox_command(command):
+    """
+    Return the command line codejail runs the sandboxed `command` with: as the
+    sandbox user configured for it, if any, with TMPDIR pointing at the "tmp"
+    directory of the directory it runs in.
+    """
+    user = jail_code.COMMANDS[command].get('user')
+    prefix = ['sudo', '-u', user, 'TMPDIR=tmp'] if user else []
+    return prefix + list(jail_code.COMMANDS[command]['cmdline_start'])
+
+
+def worker_limits(limits, max_jobs):
+    """
+    Return the resource limits of a worker running `max_jobs` jobs with the
+    codejail `limits`: the same memory and file size limits, and enough CPU
+    time to start and to pass on all of its jobs, whose own CPU time is limited
+    in the processes they run in.
+    """
+    process_limits = {'VMEM': limits.get('VMEM'), 'FSIZE': limits.get('FSIZE', 0)}
+    if limits.get('CPU'):
+        process_limits['CPU'] = limits['CPU'] * (max_jobs + 1)
+    return process_limits
+
+
+def _set_process_limits(limits):
+    """
+    Apply `limits` to the current process, like codejail does to the processes it starts.
+    """
+    # A new session, so that the process and the jobs it forks are in their own process group
+    os.setsid()
+    if limits.get('CPU'):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits['CPU'], limits['CPU'] + 1))
+    if limits.get('VMEM'):
+        resource.setrlimit(resource.RLIMIT_AS, (limits['VMEM'], limits['VMEM']))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits['FSIZE'], limits['FSIZE']))
+
+
+class SandboxWorkerError(Exception):
+    """
+    A process of the pool stopped responding, or exited.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed Python process running sandbox_worker.py, with the resource
+    `limits` returned by `worker_limits`.
+    """
+    def __init__(self, command, preload_modules, limits):
+        self.jobs = 0
+        self.directory = tempfile.mkdtemp(prefix='codejail-pool-')
+        os.chmod(self.directory, 0755)
+        with open(os.path.join(self.directory, WORKER_FILE_NAME), 'w') as worker_file:
+            worker_file.write(WORKER_PY)
+        with open(os.devnull, 'w') as devnull:
+            self.process = subprocess.Popen(
+                command + [WORKER_FILE_NAME] + list(preload_modules),
+                cwd=self.directory, env={'TMPDIR': 'tmp'}, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=devnull, close_fds=True, preexec_fn=functools.partial(_set_process_limits, limits),
+            )
+        self._buffer = ''
+
+    def run(self, job, timeout):
+        """
+        Send `job` to the process, and return its result, waiting at most
+        `timeout` seconds (None waits as long as it takes).
+        """
+        self.jobs += 1
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except IOError as error:
+            raise SandboxWorkerError(u"Couldn't send job: {}".format(error))
+        return json.loads(self._read_line(timeout))
+
+    def _read_line(self, timeout):
+        """
+        Return the next line written by the process.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        stdout_fd = self.process.stdout.fileno()
+        while '\n' not in self._buffer:
+            wait_time = max(deadline - time.time(), 0) if deadline is not None else None
+            readable, __, __ = select.select([stdout_fd], [], [], wait_time)
+            if not readable:
+                raise SandboxWorkerError(u"No result after {} seconds".format(timeout))
+            chunk = os.read(stdout_fd, READ_SIZE)
+            if not chunk:
+                raise SandboxWorkerError(u"Exited with status {}".format(self.process.poll()))
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split('\n', 1)
+        return line
+
+    def close(self):
+        """
+        Stop the process, and delete its directory.
+        """
+        try:
+            # The process exits once its stdin is closed.
+            self.process.stdin.close()
+            self.process.stdout.close()
+        except IOError:
+            pass
+        deadline = time.time() + WORKER_EXIT_TIME
+        while self.process.poll() is None and time.time() < deadline:
+            time.sleep(0.01)
+        if self.process.poll() is None:
+            try:
+                self.process.kill()
+            except OSError:
+                # Running as the sandbox user, which closing stdin will stop.
+                pass
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class SandboxPool(object):
+    """
+    Up to `size` SandboxWorkers, started with `command` when needed.
+
+    `safe_exec` falls back to codejail's when all of them are busy.
+    """
+    def __init__(self, command, size, max_jobs, preload_modules=()):
+        self.command = command
+        self.size = size
+        self.max_jobs = max_jobs
+        self.preload_modules = preload_modules
+        self.pid = os.getpid()
+        self._idle = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        """
+        Return an idle worker, or a new one, or None if the pool is full.
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            if self._count >= self.size:
+                return None
+            self._count += 1
+        try:
+            return SandboxWorker(
+                self.command, self.preload_modules, worker_limits(jail_code.LIMITS, self.max_jobs)
+            )
+        except (IOError, OSError):
+            with self._lock:
+                self._count -= 1
+            raise
+
+    def _release(self, worker, broken=False):
+        """
+        Return `worker` to the pool, or replace it if it's `broken` or has run enough jobs.
+        """
+        if broken or worker.jobs >= self.max_jobs:
+            worker.close()
+            with self._lock:
+                self._count -= 1
+        else:
+            with self._lock:
+                self._idle.append(worker)
+
+    def close(self):
+        """
+        Stop the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.close()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute `code` like codejail's safe_exec, in a worker of the pool.
+        """
+        worker = self._acquire()
+        if worker is None:
+            log.info(u"Sandbox pool is busy, starting a new sandbox for %s", slug)
+            return codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
+
+        directory = tempfile.mkdtemp(prefix='codejail-')
+        try:
+            os.chmod(directory, 0755)
+            # Temporary files of the job, which the sandbox user needs to be able to write
+            os.mkdir(os.path.join(directory, 'tmp'))
+            os.chmod(os.path.join(directory, 'tmp'), 0777)
+            job_python_path = self._copy_files(directory, python_path or [], extra_files or [])
+            job = {
+                'code': code,
+                'globals': json_safe(globals_dict),
+                'directory': directory,
+                'python_path': job_python_path,
+                'limits': dict(jail_code.LIMITS),
+            }
+            realtime = job['limits'].get('REALTIME')
+            try:
+                result = worker.run(job, realtime + WORKER_GRACE_TIME if realtime else None)
+            except (SandboxWorkerError, ValueError) as error:
+                log.warning(u"Sandbox pool worker failed running %s: %s", slug, error)
+                self._release(worker, broken=True)
+                raise SafeExecException(u"Couldn't execute jailed code: {}".format(error))
+            self._release(worker)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        if 'error' in result:
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(result['error']))
+        globals_dict.update(result['globals'])
+
+    def _copy_files(self, directory, python_path, extra_files):
+        """
+        Write `extra_files` to `directory`, along with the files and
+        directories of `python_path` that aren't among them, the way codejail
+        does, and return the entries of the Python path relative to it.
+        """
+        for filename, contents in extra_files:
+            with open(os.path.join(directory, filename), 'wb') as extra_file:
+                extra_file.write(contents)
+        extra_file_names = set(filename for filename, __ in extra_files)
+        job_python_path = []
+        for path in python_path:
+            name = os.path.basename(path)
+            if path not in extra_file_names:
+                if os.path.isdir(path):
+                    shutil.copytree(path, os.path.join(directory, name))
+                else:
+                    shutil.copy(path, directory)
+            job_python_path.append(name)
+        return job_python_path
@@ -0,0 +1,157 @@
+"""
+Worker run in a sandboxed Python by capa's SandboxPool.
+
+It imports the modules given on its command line once, then reads jobs, one
+JSON object per line, from stdin, and writes the result of each, one JSON
+object per line, to stdout. Each job runs in a child forked from the worker, so
+it starts with the modules already imported but can't affect later jobs, and
+is subject to its own resource limits.
+
+This file is run by the sandboxed Python on its own, so it only uses the
+standard library.
+"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+# Size of the reads of results from job processes.
+READ_SIZE = 64 * 1024
+
+
+def jsonable(value):
+    """
+    Return whether `value` can be serialized as JSON.
+    """
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def set_limits(limits):
+    """
+    Apply the resource limits of a job to the current process.
+    """
+    if limits.get('CPU'):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits['CPU'], limits['CPU']))
+    if limits.get('VMEM'):
+        resource.setrlimit(resource.RLIMIT_AS, (limits['VMEM'], limits['VMEM']))
+    if limits.get('FSIZE'):
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits['FSIZE'], limits['FSIZE']))
+    # Jobs can't start processes.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def run_job(job, result_fd, channel_fds):
+    """
+    Run `job` in the current (forked) process, writing its result to `result_fd`.
+    """
+    for channel_fd in channel_fds:
+        os.close(channel_fd)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    set_limits(job['limits'])
+
+    # Reseed the generators inherited from the worker, so that jobs don't share a sequence.
+    if 'numpy' in sys.modules:
+        sys.modules['numpy'].random.seed()
+
+    os.chdir(job['directory'])
+    sys.path.insert(0, job['directory'])
+    sys.path.extend(job['python_path'])
+
+    globals_dict = job['globals']
+    try:
+        exec compile(job['code'], 'jailed_code', 'exec') in globals_dict  # pylint: disable=exec-used
+    except Exception:  # pylint: disable=broad-except
+        result = {'error': traceback.format_exc()}
+    else:
+        result = {'globals': {
+            name: value for name, value in globals_dict.iteritems()
+            if name != '__builtins__' and jsonable(value)
+        }}
+
+    with os.fdopen(result_fd, 'w') as result_file:
+        result_file.write(json.dumps(result))
+
+
+def execute(job, channel_fds):
+    """
+    Run `job` in a child process, and return its result.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            run_job(job, write_fd, channel_fds)
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    realtime = job['limits'].get('REALTIME')
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    timed_out = False
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline is not None else None
+        readable, __, __ = select.select([read_fd], [], [], timeout)
+        if not readable:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, READ_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    __, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {'error': 'Killed: job ran longer than {} seconds'.format(realtime)}
+    if os.WIFSIGNALED(status):
+        return {'error': 'Killed by signal {}'.format(os.WTERMSIG(status))}
+    try:
+        return json.loads(''.join(chunks))
+    except ValueError:
+        return {'error': 'Job exited without a result'}
+
+
+def main(preload_modules):
+    """
+    Import `preload_modules`, then run jobs until stdin is closed.
+    """
+    # Keep the channel with the pool away from the standard streams, which
+    # module imports and jobs might write to.
+    requests = os.fdopen(os.dup(0), 'r')
+    responses = os.fdopen(os.dup(1), 'w')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for module_name in preload_modules:
+        try:
+            __import__(module_name)
+        except Exception:  # pylint: disable=broad-except
+            # The job will fail to import it too, and report why.
+            pass
+
+    channel_fds = [requests.fileno(), responses.fileno()]
+    while True:
+        line = requests.readline()
+        if not line:
+            break
+        result = execute(json.loads(line), channel_fds)
+        responses.write(json.dumps(result) + '\n')
+        responses.flush()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
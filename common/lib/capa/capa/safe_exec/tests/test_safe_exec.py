@@ -7,9 +7,11 @@ import random
 import textwrap
 import unittest
 
+import mock
+from dogapi import dog_stats_api
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, safe_exec_cache_key, update_hash
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -166,6 +168,36 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_keyed_by_python_path_files(self):
+        # A course that uploads a new python_lib.zip mustn't get the results
+        # computed with the old one.
+        code = "a = 1"
+        key = safe_exec_cache_key(code, {}, 1, ["python_lib.zip"], [("python_lib.zip", "old zip")])
+        self.assertEqual(
+            key, safe_exec_cache_key(code, {}, 1, ["python_lib.zip"], [("python_lib.zip", "old zip")])
+        )
+        self.assertNotEqual(
+            key, safe_exec_cache_key(code, {}, 1, ["python_lib.zip"], [("python_lib.zip", "new zip")])
+        )
+        self.assertNotEqual(key, safe_exec_cache_key(code, {}, 1))
+        self.assertNotEqual(key, safe_exec_cache_key(code, {}, 2, ["python_lib.zip"], [("python_lib.zip", "old zip")]))
+
+    @mock.patch.object(dog_stats_api, 'histogram')
+    @mock.patch.object(dog_stats_api, 'increment')
+    def test_cache_metrics(self, mock_increment, mock_histogram):
+        cache = DictCache({})
+        safe_exec("a = 1", {}, cache=cache)
+        safe_exec("a = 1", {}, cache=cache)
+        self.assertEqual(
+            mock_increment.call_args_list,
+            [
+                mock.call('capa.safe_exec.cache', tags=['result:miss']),
+                mock.call('capa.safe_exec.cache', tags=['result:hit']),
+            ]
+        )
+        # Only the miss executed the code
+        self.assertEqual(mock_histogram.call_count, 1)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
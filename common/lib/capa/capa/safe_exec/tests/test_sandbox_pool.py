@@ -0,0 +1,113 @@
+"""Test sandbox_pool.py"""
+
+import os.path
+import sys
+import unittest
+
+import mock
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+from capa.safe_exec import sandbox_pool
+from capa.safe_exec.sandbox_pool import SandboxPool
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Test SandboxPool, with unsandboxed Python processes.
+    """
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = SandboxPool([sys.executable, '-E', '-B'], size=1, max_jobs=3, preload_modules=['decimal'])
+        self.addCleanup(self.pool.close)
+        patcher = mock.patch.dict(jail_code.LIMITS, {'CPU': 1, 'REALTIME': 1})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g, {'a': 17, 'b': 18})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_jobs_are_isolated(self):
+        self.pool.safe_exec("import decimal; decimal.changed = True", {})
+        g = {}
+        self.pool.safe_exec("import decimal; changed = hasattr(decimal, 'changed')", g)
+        self.assertEqual(g['changed'], False)
+
+    def test_workers_are_reused_then_replaced(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle, [worker])  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle, [])  # pylint: disable=protected-access
+        self.assertEqual(worker.process.wait(), 0)
+
+    def test_realtime_limit(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("import time; time.sleep(10)", {})
+        self.assertIn("longer than 1 seconds", cm.exception.message)
+        # The worker survives the job
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_python_path(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        self.pool.safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(g['a'], 23)
+
+    def test_worker_limits(self):
+        limits = {'CPU': 1, 'VMEM': 100000000, 'FSIZE': 0, 'REALTIME': 1}
+        self.assertEqual(
+            sandbox_pool.worker_limits(limits, max_jobs=3),
+            {'CPU': 4, 'VMEM': 100000000, 'FSIZE': 0}
+        )
+        with mock.patch('capa.safe_exec.sandbox_pool.subprocess.Popen') as mock_popen:
+            worker = sandbox_pool.SandboxWorker([sys.executable], [], {'CPU': 4, 'FSIZE': 0})
+        self.addCleanup(worker.close)
+        self.assertEqual(mock_popen.call_args[1]['preexec_fn'].args, ({'CPU': 4, 'FSIZE': 0},))
+        self.assertEqual(mock_popen.call_args[1]['env'], {'TMPDIR': 'tmp'})
+
+    def test_busy_pool_falls_back_to_codejail(self):
+        self.pool.size = 0
+        with mock.patch('capa.safe_exec.sandbox_pool.codejail_safe_exec') as mock_safe_exec:
+            self.pool.safe_exec("a = 1", {})
+        self.assertTrue(mock_safe_exec.called)
+
+
+class TestGetPool(unittest.TestCase):
+    """
+    Test the configuration of the pool.
+    """
+    def setUp(self):
+        super(TestGetPool, self).setUp()
+        self.addCleanup(sandbox_pool.configure, 0, 0)
+
+    @mock.patch.dict(jail_code.COMMANDS, {'python': {'cmdline_start': [sys.executable]}})
+    def test_configured(self):
+        self.assertIsNone(sandbox_pool.get_pool())
+        sandbox_pool.configure(2, 10, ['math'])
+        pool = sandbox_pool.get_pool()
+        self.assertEqual((pool.command, pool.size, pool.max_jobs), ([sys.executable], 2, 10))
+        self.assertIs(sandbox_pool.get_pool(), pool)
+
+    @mock.patch.dict(jail_code.COMMANDS, {'python': {'cmdline_start': [sys.executable, '-E'], 'user': 'sandbox'}})
+    def test_sandbox_user(self):
+        sandbox_pool.configure(2, 10)
+        self.assertEqual(
+            sandbox_pool.get_pool().command,
+            ['sudo', '-u', 'sandbox', 'TMPDIR=tmp', sys.executable, '-E']
+        )
+
+    @mock.patch.dict(jail_code.COMMANDS, clear=True)
+    def test_not_sandboxed(self):
+        sandbox_pool.configure(2, 10)
+        self.assertIsNone(sandbox_pool.get_pool())
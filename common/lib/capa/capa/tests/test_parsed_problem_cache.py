@@ -0,0 +1,85 @@
+"""
+Tests for the cache of parsed problem XML.
+"""
+import textwrap
+import unittest
+
+import mock
+from lxml import etree
+
+from capa.capa_problem import PARSED_PROBLEMS, ParsedProblemCache
+from . import new_loncapa_problem
+from .response_xml_factory import MultipleChoiceResponseXMLFactory
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Tests of ParsedProblemCache.
+    """
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        self.cache = ParsedProblemCache(2)
+
+    def test_get_returns_copies(self):
+        tree = etree.XML('<problem><p>Text</p></problem>')
+        self.cache.set('problem', tree)
+        tree.find('p').text = 'Changed'
+
+        cached_tree = self.cache.get('problem')
+        self.assertEqual(cached_tree.find('p').text, 'Text')
+        cached_tree.find('p').text = 'Changed'
+        self.assertEqual(self.cache.get('problem').find('p').text, 'Text')
+
+    def test_missing(self):
+        self.assertIsNone(self.cache.get('problem'))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('first', etree.XML('<problem/>'))
+        self.cache.set('second', etree.XML('<problem/>'))
+        self.cache.get('first')
+        self.cache.set('third', etree.XML('<problem/>'))
+
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertIsNotNone(self.cache.get('third'))
+
+
+class LoncapaProblemParsingTest(unittest.TestCase):
+    """
+    Tests that LoncapaProblems parse identical problem XML once.
+    """
+    def setUp(self):
+        super(LoncapaProblemParsingTest, self).setUp()
+        PARSED_PROBLEMS.clear()
+        self.addCleanup(PARSED_PROBLEMS.clear)
+
+    def test_parsed_once(self):
+        xml = MultipleChoiceResponseXMLFactory().build_xml(
+            choices=[False, True, False], choice_names=['a', 'b', 'c']
+        )
+        with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            first_problem = new_loncapa_problem(xml, seed=1)
+            second_problem = new_loncapa_problem(xml, seed=2)
+        self.assertEqual(mock_xml.call_count, 1)
+
+        # Each problem preprocesses its own tree
+        self.assertIsNot(first_problem.tree, second_problem.tree)
+        self.assertEqual(first_problem.get_question_answers(), second_problem.get_question_answers())
+        self.assertEqual(first_problem.get_html(), second_problem.get_html())
+
+    def test_compatibility_translations_cached(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <optionresponse>
+                    <optioninput>
+                        <option correct="False">red</option>
+                        <option correct="True">blue</option>
+                    </optioninput>
+                </optionresponse>
+            </problem>
+        """)
+        new_loncapa_problem(xml)
+        problem = new_loncapa_problem(xml)
+        optioninput = problem.tree.find('.//optioninput')
+        self.assertEqual(optioninput.get('options'), "('red','blue')")
+        self.assertEqual(optioninput.get('correct'), 'blue')
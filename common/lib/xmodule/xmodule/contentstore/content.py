@@ -21,7 +21,7 @@ from PIL import Image
 
 class StaticContent(object):
     def __init__(self, loc, name, content_type, data, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         self.location = loc
         self.name = name  # a display string which can be edited, and thus not part of the location which needs to be fixed
         self.content_type = content_type
@@ -33,6 +33,8 @@ class StaticContent(object):
         # cycles
         self.import_path = import_path
         self.locked = locked
+        # hex digest of a hash of the data (e.g. the md5 GridFS computes), if known
+        self.content_digest = content_digest
 
     @property
     def is_thumbnail(self):
@@ -71,6 +73,15 @@ class StaticContent(object):
     def data(self):
         return self._data
 
+    def copy_without_data(self):
+        """
+        Return a StaticContent with the same metadata as this one, but no data.
+        """
+        return StaticContent(self.location, self.name, self.content_type, None,
+                             last_modified_at=self.last_modified_at, thumbnail_location=self.thumbnail_location,
+                             import_path=self.import_path, length=self.length, locked=self.locked,
+                             content_digest=getattr(self, 'content_digest', None))
+
     ASSET_URL_RE = re.compile(r"""
         /?c4x/
         (?P<org>[^/]+)/
@@ -157,6 +168,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -171,15 +188,25 @@ class StaticContent(object):
 
 class StaticContentStream(StaticContent):
     def __init__(self, loc, name, content_type, stream, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None, chunk_size=None):
         super(StaticContentStream, self).__init__(loc, name, content_type, None, last_modified_at=last_modified_at,
                                                   thumbnail_location=thumbnail_location, import_path=import_path,
-                                                  length=length, locked=locked)
+                                                  length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
+        self._chunk_size = chunk_size
+
+    @property
+    def chunk_size(self):
+        """
+        The size of the reads from the stream: by default the size of its chunks for GridFS
+        files, so that each read returns exactly one chunk rather than slicing and joining chunks.
+        """
+        return self._chunk_size or getattr(self._stream, 'chunk_size', None) or STREAM_DATA_CHUNK_SIZE
 
     def stream_data(self):
+        chunk_size = self.chunk_size
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._stream.read(chunk_size)
             if len(chunk) == 0:
                 break
             yield chunk
@@ -188,15 +215,15 @@ class StaticContentStream(StaticContent):
         """
         Stream the data between first_byte and last_byte (included)
         """
+        chunk_size = self.chunk_size
         self._stream.seek(first_byte)
         position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        while position <= last_byte:
+            # Read up to the end of the current chunk at most, so that the following reads are aligned on chunks.
+            chunk = self._stream.read(min(chunk_size - position % chunk_size, last_byte - position + 1))
+            if len(chunk) == 0:
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            position += len(chunk)
             yield chunk
 
     def close(self):
@@ -206,7 +233,8 @@ class StaticContentStream(StaticContent):
         self._stream.seek(0)
         content = StaticContent(self.location, self.name, self.content_type, self._stream.read(),
                                 last_modified_at=self.last_modified_at, thumbnail_location=self.thumbnail_location,
-                                import_path=self.import_path, length=self.length, locked=self.locked)
+                                import_path=self.import_path, length=self.length, locked=self.locked,
+                                content_digest=self.content_digest)
         return content
 
 
@@ -328,10 +328,61 @@ class BulkOperationsMixin(object):
             bulk_ops_record.has_library_updated_item = False
 
 
-class EditInfo(object):
+# Canonical instances of the field names used as keys in BlockData's fields and
+# defaults, so that the thousands of blocks in a structure share one string
+# per field name instead of each holding its own copy.
+_FIELD_NAMES = {}
+
+
+def intern_field_names(fields):
+    """
+    Replace the keys of the dict `fields` by the shared instances of the field
+    names, in place, and return it.
+    """
+    shared_name = _FIELD_NAMES.setdefault
+    for name in fields.keys():
+        shared = shared_name(name, name)
+        if shared is not name:
+            fields[shared] = fields.pop(name)
+    return fields
+
+
+class SlotsStateMixin(object):
+    """
+    Pickling support for classes that use __slots__ (and so have no __dict__).
+
+    The state is pickled as a dict of slot names to values. Unpickling also
+    accepts the state of instances pickled before the class used __slots__.
+    """
+    __slots__ = ()
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # (dict state, slots state), as produced by the default protocol 2 pickling
+            state = dict(state[0] or {}, **(state[1] or {}))
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
+
+class EditInfo(SlotsStateMixin):
     """
     Encapsulates the editing info of a block.
     """
+    __slots__ = (
+        'previous_version',
+        'update_version',
+        'source_version',
+        'edited_on',
+        'edited_by',
+        'original_usage',
+        'original_usage_version',
+        '_subtree_edited_on',
+        '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -408,12 +459,17 @@ class EditInfo(object):
         return not self == edit_info
 
 
-class BlockData(object):
+class BlockData(SlotsStateMixin):
     """
     Wrap the block data in an object instead of using a straight Python dictionary.
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
+
+    A loaded course holds one of these per block, so they use __slots__ to keep
+    their memory footprint down, and share the strings of their field names.
     """
+    __slots__ = ('definition_loaded', 'fields', 'block_type', 'definition', 'defaults', 'edit_info')
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
@@ -437,7 +493,7 @@ class BlockData(object):
         """
         # Contains the Scope.settings and 'children' field values.
         # 'children' are stored as a list of (block_type, block_id) pairs.
-        self.fields = block_data.get('fields', {})
+        self.fields = intern_field_names(block_data.get('fields', {}))
 
         # XBlock type ID.
         self.block_type = block_data.get('block_type', None)
@@ -447,7 +503,7 @@ class BlockData(object):
 
         # Scope.settings default values copied from a template block (used e.g. when
         # blocks are copied from a library to a course)
-        self.defaults = block_data.get('defaults', {})
+        self.defaults = intern_field_names(block_data.get('defaults', {}))
 
         # EditInfo object containing all versioning/editing data.
         self.edit_info = EditInfo(**block_data.get('edit_info', {}))
@@ -843,7 +899,7 @@ class ModuleStoreRead(ModuleStoreAssetBase):
             xblock, fields = (block, block.fields)
         elif isinstance(block, BlockData):
             # BlockData is an object - compare its attributes in dict form.
-            xblock, fields = (None, block.__dict__)
+            xblock, fields = (None, block.__getstate__())
         else:
             xblock, fields = (None, block)
 
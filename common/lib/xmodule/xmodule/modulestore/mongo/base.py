@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -171,6 +170,125 @@ class MongoKeyValueStore(InheritanceKeyValueStore):
         )
 
 
+class MetadataInheritanceTree(object):
+    """
+    The metadata that the blocks of a course inherit, and their parents, as
+    computed by MongoModuleStore._compute_metadata_inheritance_tree.
+
+    Blocks don't each hold a copy of the metadata they inherit. The tree holds
+    a frame for the course and for each container that sets inheritable
+    metadata, made of that metadata and the index of its parent frame, and
+    each block only refers to the frame it inherits from. The metadata of a
+    frame is resolved the first time a block inheriting it is loaded, and is
+    then shared (read-only) by all of them.
+    """
+    def __init__(self):
+        # (index of the parent frame or None, metadata set by the frame's container)
+        self._frames = []
+        # block url -> (frame index, branch, parent url)
+        self._blocks = {}
+        self._resolved = {}
+
+    def __getstate__(self):
+        # Resolved frames are rebuilt as needed, rather than stored in the caches.
+        return {'_frames': self._frames, '_blocks': self._blocks}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._resolved = {}
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __contains__(self, url):
+        return url in self._blocks
+
+    def keys(self):
+        """
+        Returns the urls of the blocks in the tree.
+        """
+        return self._blocks.keys()
+
+    def add_frame(self, parent_frame, metadata):
+        """
+        Adds a frame setting `metadata` on top of `parent_frame` (None for the
+        course), and returns its index.
+        """
+        self._frames.append((parent_frame, metadata))
+        return len(self._frames) - 1
+
+    def add_block(self, url, frame, branch, parent_url):
+        """
+        Records that the block at `url` inherits the metadata of `frame`, and
+        that its parent in `branch` is at `parent_url`.
+        """
+        self._blocks[url] = (frame, branch, parent_url)
+
+    def get_inherited_metadata(self, url):
+        """
+        Returns the dict of the metadata the block at `url` inherits, which
+        must not be modified.
+        """
+        if url not in self._blocks:
+            return {}
+        return self._resolve(self._blocks[url][0])
+
+    def get_parent_url(self, url, branch):
+        """
+        Returns the url of the parent of the block at `url` in `branch`, if known.
+        """
+        __, parent_branch, parent_url = self._blocks.get(url, (None, None, None))
+        return parent_url if parent_branch == branch else None
+
+    def update(self, other):
+        """
+        Adds the blocks of the tree `other` to this one, replacing those they
+        have in common, like dict.update.
+        """
+        if other is self:
+            return
+        own_blocks = [(url, block) for url, block in self._blocks.iteritems() if url not in other._blocks]
+        own_frames = self._frames
+        # trees aren't modified once computed, so they can share their frames and blocks
+        self._frames, self._blocks, self._resolved = other._frames, other._blocks, other._resolved
+        if not own_blocks:
+            return
+
+        self._frames, self._blocks, self._resolved = list(self._frames), dict(self._blocks), {}
+        new_frames = {}
+
+        def _copy_frame(frame):
+            """
+            Copies `frame` and its ancestors from this tree's previous frames, and returns its new index.
+            """
+            if frame is None:
+                return None
+            if frame not in new_frames:
+                parent_frame, metadata = own_frames[frame]
+                new_frames[frame] = self.add_frame(_copy_frame(parent_frame), metadata)
+            return new_frames[frame]
+
+        for url, (frame, branch, parent_url) in own_blocks:
+            self.add_block(url, _copy_frame(frame), branch, parent_url)
+
+    def _resolve(self, frame):
+        """
+        Returns the metadata of `frame` combined with that of its ancestors.
+        """
+        unresolved = []
+        while frame is not None and frame not in self._resolved:
+            unresolved.append(frame)
+            frame = self._frames[frame][0]
+        metadata = self._resolved.get(frame, {})
+        for frame in reversed(unresolved):
+            frame_metadata = self._frames[frame][1]
+            if frame_metadata:
+                metadata = metadata.copy()
+                metadata.update(frame_metadata)
+            self._resolved[frame] = metadata
+        return metadata
+
+
 class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
     """
     A system that has a cache of module json that it will use to load modules
@@ -261,7 +379,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 parent = None
                 if self.cached_metadata is not None:
                     # fish the parent out of here if it's available
-                    parent_url = self.cached_metadata.get(unicode(location), {}).get('parent', {}).get(
+                    parent_url = self.cached_metadata.get_parent_url(
+                        unicode(location),
                         ModuleStoreEnum.Branch.published_only if location.revision is None
                         else ModuleStoreEnum.Branch.draft_preferred
                     )
@@ -300,7 +419,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
                     # Convert the serialized fields values in self.cached_metadata
                     # to python values
-                    metadata_to_inherit = self.cached_metadata.get(unicode(non_draft_loc), {})
+                    metadata_to_inherit = self.cached_metadata.get_inherited_metadata(unicode(non_draft_loc))
                     inherit_metadata(module, metadata_to_inherit)
 
                 module._edit_info = json_data.get('edit_info')
@@ -728,35 +847,31 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 root = location_url
 
         # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        metadata_to_inherit = MetadataInheritanceTree()
+        branch = self.get_branch_setting()
 
-        def _compute_inherited_metadata(url):
+        def _compute_inherited_metadata(url, frame):
             """
-            Helper method for computing inherited metadata for a specific location url
+            Helper method for computing inherited metadata for a specific location url,
+            whose own metadata is part of `frame`
             """
-            my_metadata = results_by_url[url].get('metadata', {})
-
             # go through all the children and recurse, but only if we have
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
+                    # only containers setting inheritable metadata need a frame of their own
+                    child_metadata = results_by_url[child].get('metadata')
+                    child_frame = metadata_to_inherit.add_frame(frame, child_metadata) if child_metadata else frame
+                    metadata_to_inherit.add_block(child, child_frame, branch, url)
+                    _compute_inherited_metadata(child, child_frame)
                 else:
                     # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+                    # (along with its parent, as we're traversing the tree anyway)
+                    metadata_to_inherit.add_block(child, frame, branch, url)
 
         if root is not None:
-            _compute_inherited_metadata(root)
+            root_frame = metadata_to_inherit.add_frame(None, results_by_url[root].get('metadata', {}))
+            _compute_inherited_metadata(root, root_frame)
 
         return metadata_to_inherit
 
@@ -775,6 +890,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
                 tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                if not isinstance(tree, MetadataInheritanceTree):
+                    # cached in the layout used before MetadataInheritanceTree
+                    tree = {}
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
@@ -907,7 +1025,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         root = self.fs_root / data_dir
         resource_fs = _OSFS_INSTANCE.setdefault(root, OSFS(root, create=True))
 
-        cached_metadata = {}
+        cached_metadata = MetadataInheritanceTree()
         if apply_cached_metadata:
             cached_metadata = self._get_cached_metadata_inheritance_tree(course_key)
 
@@ -1283,7 +1401,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 resources_fs=None,
                 error_tracker=self.error_tracker,
                 render_template=self.render_template,
-                cached_metadata={},
+                cached_metadata=MetadataInheritanceTree(),
                 mixins=self.xblock_mixins,
                 select=self.xblock_select,
                 services=services,
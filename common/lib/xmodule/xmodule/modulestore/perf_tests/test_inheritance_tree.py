@@ -0,0 +1,232 @@
+"""
+Performance test for the metadata inheritance tree of the old Mongo modulestore.
+
+Computes the tree of generated draft and published courses of increasing
+size, and compares its time to compute, size in memory and pickled size (as
+stored in the metadata inheritance cache) with those of the tree that
+`_compute_metadata_inheritance_tree` used to return, where each block held its
+own copy of the metadata it inherits.
+"""
+import copy
+import cPickle as pickle
+import itertools
+import unittest
+
+import ddt
+import mock
+#from nose.plugins.attrib import attr
+
+from nose.plugins.skip import SkipTest
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.mongo.base import MongoModuleStore
+from xmodule.modulestore.perf_tests.test_structure_memory import deep_getsizeof
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of blocks in each generated course.
+BLOCK_AMOUNT_PER_TEST = (1000, 10000, 50000)
+
+# The block types making up each level of the generated courses, how many
+# children each block has on the level below, and the inheritable metadata
+# they set.
+COURSE_SHAPE = (
+    ('chapter', 10, {'start': '2015-01-01T00:00:00Z'}),
+    ('sequential', 5, {'due': '2015-06-01T00:00:00Z', 'graded': True}),
+    ('vertical', 4, {}),
+)
+COURSE_METADATA = {
+    'start': '2014-09-01T00:00:00Z',
+    'end': '2015-09-01T00:00:00Z',
+    'graceperiod': '2 days 5 hours',
+    'showanswer': 'finished',
+    'rerandomize': 'never',
+    'days_early_for_beta': 7.0,
+    'static_asset_path': '',
+    'xqa_key': 'qaijS3UatK020Wc0sfCtFe0V6jpB4d64',
+    'video_speed_optimizations': True,
+    'user_partitions': [{'id': 0, 'name': 'Cohorts', 'scheme': 'cohort', 'groups': [{'id': 1, 'name': 'A'}]}],
+}
+LEAF_TYPES = ('problem', 'html', 'video', 'discussion')
+COURSE_KEY = SlashSeparatedCourseKey('perf', 'inheritance', 'run')
+
+
+def make_records(num_blocks):
+    """
+    Make the records of the containers of a course with about `num_blocks`
+    blocks, as returned by the query of `_compute_metadata_inheritance_tree`:
+    all of them published, with a draft of each vertical.
+    """
+    ids = itertools.count()
+    records = []
+    leaf_types = itertools.cycle(LEAF_TYPES)
+    lowest_level_blocks = 1
+    for __, count, __ in COURSE_SHAPE:
+        lowest_level_blocks *= count
+    leaves_per_parent = max(1, num_blocks // lowest_level_blocks)
+
+    def make_record(category, name, metadata, children, revision=None):
+        """Make the record of a container."""
+        records.append({
+            '_id': {
+                'tag': 'i4x', 'org': COURSE_KEY.org, 'course': COURSE_KEY.course,
+                'category': category, 'name': name, 'revision': revision,
+            },
+            'metadata': copy.deepcopy(metadata),
+            'definition': {'children': children},
+        })
+        return unicode(COURSE_KEY.make_usage_key(category, name))
+
+    def make_subtree(level):
+        """Make the records below a container at `level`, returning the urls of its children."""
+        if level == len(COURSE_SHAPE):
+            return [
+                unicode(COURSE_KEY.make_usage_key(next(leaf_types), u'block{}'.format(next(ids))))
+                for __ in xrange(leaves_per_parent)
+            ]
+
+        category, count, metadata = COURSE_SHAPE[level]
+        children = []
+        for __ in xrange(count):
+            name = u'block{}'.format(next(ids))
+            grandchildren = make_subtree(level + 1)
+            if level == len(COURSE_SHAPE) - 1:
+                make_record(category, name, metadata, grandchildren, revision='draft')
+            children.append(make_record(category, name, metadata, grandchildren))
+        return children
+
+    make_record('course', COURSE_KEY.run, COURSE_METADATA, make_subtree(0))
+    return records
+
+
+def make_store(records):
+    """
+    Make a stand-in for a MongoModuleStore whose collection returns `records`.
+    """
+    store = mock.Mock()
+    store.fill_in_run.side_effect = lambda course_key: course_key
+    store.get_branch_setting.return_value = ModuleStoreEnum.Branch.draft_preferred
+    store.collection.find.side_effect = lambda query, record_filter: copy.deepcopy(records)
+    return store
+
+
+def compute_tree(store):
+    """
+    Compute the metadata inheritance tree of the course of `store`.
+    """
+    return MongoModuleStore._compute_metadata_inheritance_tree.im_func(store, COURSE_KEY)
+
+
+def compute_copied_tree(store):
+    """
+    Compute the metadata inheritance tree the way `_compute_metadata_inheritance_tree`
+    used to, as a dict of the metadata each block inherits, with its parent.
+    """
+    results_by_url = {}
+    root = None
+    for result in store.collection.find(None, None):
+        location_url = unicode(COURSE_KEY.make_usage_key(result['_id']['category'], result['_id']['name']))
+        if location_url in results_by_url:
+            existing_children = results_by_url[location_url]['definition']['children']
+            results_by_url[location_url]['definition']['children'] = set(
+                existing_children + result['definition']['children']
+            )
+        else:
+            results_by_url[location_url] = result
+        if result['_id']['category'] == 'course':
+            root = location_url
+
+    metadata_to_inherit = {}
+
+    def _compute_inherited_metadata(url):
+        """Compute the metadata inherited by the children of `url`."""
+        my_metadata = results_by_url[url].get('metadata', {})
+        for child in results_by_url[url]['definition']['children']:
+            if child in results_by_url:
+                new_child_metadata = copy.deepcopy(my_metadata)
+                new_child_metadata.update(results_by_url[child].get('metadata', {}))
+                results_by_url[child]['metadata'] = new_child_metadata
+                metadata_to_inherit[child] = new_child_metadata
+                _compute_inherited_metadata(child)
+            else:
+                metadata_to_inherit[child] = my_metadata.copy()
+            metadata_to_inherit[child].setdefault('parent', {})[ModuleStoreEnum.Branch.draft_preferred] = url
+
+    _compute_inherited_metadata(root)
+    return metadata_to_inherit
+
+
+TREES = (
+    ('copied', compute_copied_tree, lambda tree, url: tree.get(url, {})),
+    ('shared', compute_tree, lambda tree, url: tree.get_inherited_metadata(url)),
+)
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class InheritanceTreeTiming(unittest.TestCase):
+    """
+    Time the computation of metadata inheritance trees and the lookup of
+    the metadata of each of their blocks, and report their size.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(TREES, BLOCK_AMOUNT_PER_TEST))
+    @ddt.unpack
+    def test_inheritance_tree(self, tree_type, num_blocks):
+        """
+        Generate timings and sizes for a type of tree and an amount of blocks.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        name, compute, get_inherited_metadata = tree_type
+        store = make_store(make_records(num_blocks))
+        desc = "InheritanceTree:{}:{}".format(name, num_blocks)
+
+        with CodeBlockTimer(desc):
+            with CodeBlockTimer("compute"):
+                tree = compute(store)
+
+            with CodeBlockTimer("pickle"):
+                data = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+
+            with CodeBlockTimer("unpickle"):
+                tree = pickle.loads(data)
+
+            with CodeBlockTimer("inherit"):
+                for url in tree.keys():
+                    get_inherited_metadata(tree, url)
+
+        print "{}: {} blocks, {} bytes in memory, {} bytes pickled".format(
+            desc, len(tree), deep_getsizeof(tree), len(data)
+        )
+
+    @ddt.data(*BLOCK_AMOUNT_PER_TEST)
+    def test_same_inherited_metadata(self, num_blocks):
+        """
+        Check that both trees give blocks the same metadata and parents.
+        """
+        store = make_store(make_records(num_blocks))
+        copied_tree = compute_copied_tree(store)
+        tree = compute_tree(store)
+
+        self.assertEqual(sorted(tree.keys()), sorted(copied_tree.keys()))
+        for url, metadata in copied_tree.iteritems():
+            metadata = dict(metadata)
+            parents = metadata.pop('parent')
+            self.assertEqual(tree.get_inherited_metadata(url), metadata)
+            self.assertEqual(
+                tree.get_parent_url(url, ModuleStoreEnum.Branch.draft_preferred),
+                parents[ModuleStoreEnum.Branch.draft_preferred]
+            )
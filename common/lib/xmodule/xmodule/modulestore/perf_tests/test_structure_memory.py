@@ -0,0 +1,97 @@
+"""
+Performance test for the memory used by split modulestore course structures.
+
+Measures the memory held by the blocks of a generated course, and compares it
+with the memory the same blocks take when their `BlockData` and `EditInfo`
+objects keep their attributes in a per-instance `__dict__`, as they did before
+using `__slots__`.
+"""
+import sys
+import unittest
+
+import ddt
+#from nose.plugins.attrib import attr
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.perf_tests.test_structure_serialization import make_structure
+
+# Number of blocks in each generated course structure.
+BLOCK_AMOUNT_PER_TEST = (1000, 20000)
+
+
+def deep_getsizeof(obj, seen=None):
+    """
+    Return the number of bytes used by `obj` and everything it references,
+    counting each object only once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_getsizeof(key, seen) + deep_getsizeof(value, seen) for key, value in obj.iteritems())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_getsizeof(item, seen) for item in obj)
+    elif isinstance(obj, (BlockData, EditInfo)):
+        size += sum(deep_getsizeof(value, seen) for value in obj.__getstate__().itervalues())
+    elif hasattr(obj, '__dict__'):
+        size += deep_getsizeof(obj.__dict__, seen)
+    return size
+
+
+def unshared_names(fields):
+    """
+    Return a copy of `fields` whose keys are new strings, like those of the
+    dicts of documents read from Mongo.
+    """
+    return {(name + ' ')[:-1]: value for name, value in fields.iteritems()}
+
+
+class DictBlockState(object):
+    """
+    Stand-in for a `BlockData` or `EditInfo` that stores its attributes in an
+    instance `__dict__`, and doesn't share the strings of its field names.
+    """
+    def __init__(self, obj):
+        for name, value in obj.__getstate__().iteritems():
+            if isinstance(value, EditInfo):
+                value = DictBlockState(value)
+            elif name in ('fields', 'defaults'):
+                value = unshared_names(value)
+            setattr(self, name, value)
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureMemoryUsage(unittest.TestCase):
+    """
+    Report the memory used by the blocks of course structures.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*BLOCK_AMOUNT_PER_TEST)
+    def test_structure_memory(self, num_blocks):
+        """
+        Compare the memory used by slotted blocks with that of dict based blocks.
+        """
+        blocks = make_structure(num_blocks)['blocks']
+        slotted_size = deep_getsizeof(blocks)
+        dict_size = deep_getsizeof({block_key: DictBlockState(block) for block_key, block in blocks.iteritems()})
+
+        message = "StructureMemory:{}: {} bytes with __slots__ ({} per block), {} bytes with __dict__ ({} per block)"
+        print message.format(
+            len(blocks),
+            slotted_size,
+            slotted_size // len(blocks),
+            dict_size,
+            dict_size // len(blocks),
+        )
+        self.assertLess(slotted_size, dict_size)
@@ -0,0 +1,171 @@
+"""
+Performance test for the serialization of split modulestore course structures.
+
+Compares the compact format of `structure_serialization` against pickling
+whole structures, which is what `CourseStructureCache` used to do, for
+generated courses of increasing size.
+"""
+import cPickle as pickle
+import datetime
+import itertools
+import unittest
+import zlib
+
+import ddt
+import pytz
+from bson.objectid import ObjectId
+#from nose.plugins.attrib import attr
+
+from nose.plugins.skip import SkipTest
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_serialization import serialize_structure, deserialize_structure
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of blocks in each generated course structure.
+BLOCK_AMOUNT_PER_TEST = (100, 1000, 10000, 50000)
+
+# Number of times each structure is serialized and deserialized per timing.
+REPETITIONS = 10
+
+# The block types making up each level of the generated courses, and how many
+# children each block has on the level below.
+COURSE_SHAPE = (('chapter', 10), ('sequential', 5), ('vertical', 4))
+LEAF_TYPES = ('problem', 'html', 'video', 'discussion')
+
+
+def make_block(block_type, children=None):
+    """
+    Make a BlockData with fields roughly like those of a real course.
+    """
+    fields = {
+        'display_name': u'{} {}'.format(block_type, ObjectId()),
+        'xml_attributes': {'filename': [u'{}/{}.xml'.format(block_type, ObjectId()), None]},
+    }
+    if children is not None:
+        fields['children'] = children
+    if block_type == 'problem':
+        fields.update({'weight': 1.0, 'max_attempts': 3, 'showanswer': u'past_due'})
+    return BlockData(
+        block_type=block_type,
+        definition=ObjectId(),
+        fields=fields,
+        defaults={},
+        edit_info={
+            'edited_on': datetime.datetime.now(pytz.utc),
+            'edited_by': 12345,
+            'previous_version': ObjectId(),
+            'update_version': ObjectId(),
+            'source_version': None,
+            'original_usage': None,
+            'original_usage_version': None,
+        },
+    )
+
+
+def make_structure(num_blocks):
+    """
+    Make a course structure, as returned by `structure_from_mongo`, with
+    about `num_blocks` blocks.
+    """
+    ids = itertools.count()
+    blocks = {}
+    leaf_types = itertools.cycle(LEAF_TYPES)
+    lowest_level_blocks = 1
+    for __, count in COURSE_SHAPE:
+        lowest_level_blocks *= count
+    leaves_per_parent = max(1, num_blocks // lowest_level_blocks)
+
+    def make_subtree(level):
+        """Make the blocks below a block at `level`, returning the keys of its children."""
+        if level == len(COURSE_SHAPE):
+            children = [BlockKey(next(leaf_types), u'block{}'.format(next(ids))) for __ in xrange(leaves_per_parent)]
+            for child in children:
+                blocks[child] = make_block(child.type)
+            return children
+
+        block_type, count = COURSE_SHAPE[level]
+        children = []
+        for __ in xrange(count):
+            child = BlockKey(block_type, u'block{}'.format(next(ids)))
+            blocks[child] = make_block(block_type, make_subtree(level + 1))
+            children.append(child)
+        return children
+
+    root = BlockKey('course', 'course')
+    blocks[root] = make_block('course', make_subtree(0))
+    return {
+        '_id': ObjectId(),
+        'original_version': ObjectId(),
+        'previous_version': ObjectId(),
+        'edited_by': 12345,
+        'edited_on': datetime.datetime.now(pytz.utc),
+        'schema_version': 1,
+        'root': root,
+        'blocks': blocks,
+    }
+
+
+def pickle_structure(structure):
+    """Serialize a structure the way `CourseStructureCache` used to."""
+    return pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+
+
+SERIALIZERS = (
+    ('pickle', pickle_structure, pickle.loads),
+    ('compact', serialize_structure, deserialize_structure),
+)
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureSerializationTiming(unittest.TestCase):
+    """
+    Time the serialization and deserialization of course structures, and
+    report the size of the (compressed) results.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(SERIALIZERS, BLOCK_AMOUNT_PER_TEST))
+    @ddt.unpack
+    def test_serialization_timings(self, serializer, num_blocks):
+        """
+        Generate timings and sizes for a serializer and an amount of blocks.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        name, dumps, loads = serializer
+        structure = make_structure(num_blocks)
+        desc = "StructureSerialization:{}:{}".format(name, len(structure['blocks']))
+
+        with CodeBlockTimer(desc):
+            with CodeBlockTimer("serialize"):
+                for __ in xrange(REPETITIONS):
+                    data = dumps(structure)
+
+            with CodeBlockTimer("compress"):
+                for __ in xrange(REPETITIONS):
+                    compressed_data = zlib.compress(data, 1)
+
+            with CodeBlockTimer("decompress"):
+                for __ in xrange(REPETITIONS):
+                    zlib.decompress(compressed_data)
+
+            with CodeBlockTimer("deserialize"):
+                for __ in xrange(REPETITIONS):
+                    loaded = loads(data)
+
+        self.assertEqual(loaded, structure)
+        print "{}: {} bytes serialized, {} bytes compressed".format(desc, len(data), len(compressed_data))
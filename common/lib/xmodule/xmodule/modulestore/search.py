@@ -6,7 +6,7 @@ from .exceptions import (ItemNotFoundError, NoPathToItem)
 LOGGER = getLogger(__name__)
 
 
-def path_to_location(modulestore, usage_key):
+def path_to_location(modulestore, usage_key, course_navigation_index=None):
     '''
     Try to find a course_id/chapter/section[/position] path to location in
     modulestore.  The courseware insists that the first level in the course is
@@ -15,6 +15,9 @@ def path_to_location(modulestore, usage_key):
     Args:
         modulestore: which store holds the relevant objects
         usage_key: :class:`UsageKey` the id of the location to which to generate the path
+        course_navigation_index: optionally, an index of the published course which answers
+            `has_item`, `get_parent_location` and `get_child_locations` without loading
+            the course's blocks. Blocks the index doesn't know are looked up in modulestore.
 
     Raises
         ItemNotFoundError if the location doesn't exist.
@@ -58,7 +61,7 @@ def path_to_location(modulestore, usage_key):
             (next_usage, path) = queue.pop()  # Takes from the end
 
             # get_parent_location raises ItemNotFoundError if location isn't found
-            parent = modulestore.get_parent_location(next_usage)
+            parent = get_parent_location(next_usage)
 
             # print 'Processing loc={0}, path={1}'.format(next_usage, path)
             if next_usage.block_type == "course":
@@ -73,8 +76,21 @@ def path_to_location(modulestore, usage_key):
             newpath = (next_usage, path)
             queue.append((parent, newpath))
 
+    def get_child_locations(parent_usage_key):
+        '''Return the locations of the children of a block, in order.'''
+        if course_navigation_index is not None:
+            return course_navigation_index.get_child_locations(parent_usage_key)
+        section_desc = modulestore.get_item(parent_usage_key)
+        # this calls get_children rather than just children b/c old mongo includes private children
+        # in children but not in get_children
+        return [c.location for c in section_desc.get_children()]
+
+    if course_navigation_index is not None and not course_navigation_index.has_item(usage_key):
+        course_navigation_index = None
+    get_parent_location = (course_navigation_index or modulestore).get_parent_location
+
     with modulestore.bulk_operations(usage_key.course_key):
-        if not modulestore.has_item(usage_key):
+        if course_navigation_index is None and not modulestore.has_item(usage_key):
             raise ItemNotFoundError(usage_key)
 
         path = find_path_to_course()
@@ -101,10 +117,7 @@ def path_to_location(modulestore, usage_key):
             for path_index in range(2, n - 1):
                 category = path[path_index].block_type
                 if category == 'sequential' or category == 'videosequence':
-                    section_desc = modulestore.get_item(path[path_index])
-                    # this calls get_children rather than just children b/c old mongo includes private children
-                    # in children but not in get_children
-                    child_locs = [c.location for c in section_desc.get_children()]
+                    child_locs = get_child_locations(path[path_index])
                     # positions are 1-indexed, and should be strings to be consistent with
                     # url parsing.
                     position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
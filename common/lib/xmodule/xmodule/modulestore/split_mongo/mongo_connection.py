@@ -2,12 +2,13 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import datetime
-import cPickle as pickle
 import math
 import zlib
 import pymongo
 import pytz
 import re
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -15,6 +16,7 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import get_cache, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -27,6 +29,9 @@ from mongodb_proxy import autoretry_read, MongoProxy
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_serialization import (
+    serialize_structure, deserialize_structure, StructureSerializationError
+)
 
 
 new_contract('BlockData', BlockData)
@@ -213,58 +218,168 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class LocalStructureCache(object):
+    """
+    A process-local LRU cache of serialized course structures, bounded by the
+    total size of the values it holds.
+
+    Structures are immutable once written, so entries never need to be
+    invalidated; they are only evicted to make room. The serialized form is
+    kept (rather than the structure itself) because split hands out structures
+    that its callers mutate, e.g. when merging in definitions, so each get
+    must return a fresh copy.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the serialized structure stored for `key`, or None."""
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                # Re-insert to mark as most recently used
+                self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Store `value` for `key`, evicting least recently used entries to keep
+        within `max_size`. Returns the number of entries evicted.
+        """
+        if len(value) > self.max_size:
+            return 0
+
+        evicted = 0
+        with self._lock:
+            old_value = self._entries.pop(key, None)
+            if old_value is not None:
+                self.size -= len(old_value)
+            while self._entries and self.size + len(value) > self.max_size:
+                __, evicted_value = self._entries.popitem(last=False)
+                self.size -= len(evicted_value)
+                evicted += 1
+            self._entries[key] = value
+            self.size += len(value)
+        return evicted
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_LOCAL_STRUCTURE_CACHE = None
+_LOCAL_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+
+def local_structure_cache():
+    """
+    Return this process's LocalStructureCache, or None if it is disabled.
+
+    Its size is set by the COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES setting;
+    it is disabled if that is 0 or missing, or if Django isn't available.
+    """
+    global _LOCAL_STRUCTURE_CACHE  # pylint: disable=global-statement
+    if _LOCAL_STRUCTURE_CACHE is None:
+        max_size = getattr(settings, 'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES', 0) if DJANGO_AVAILABLE else 0
+        if not max_size:
+            return None
+        with _LOCAL_STRUCTURE_CACHE_LOCK:
+            if _LOCAL_STRUCTURE_CACHE is None:
+                _LOCAL_STRUCTURE_CACHE = LocalStructureCache(max_size)
+    return _LOCAL_STRUCTURE_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are serialized (see `structure_serialization`) and
+    compressed when cached.
+
+    Serialized structures are also kept in a process-local LRU cache (see
+    :func:`local_structure_cache`) in front of the django cache, which saves
+    the round trip and decompression for the structures a process uses most.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
     def __init__(self):
         self.cache = None
+        self.local_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            else:
+                self.local_cache = local_structure_cache()
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """Pull the compressed, serialized struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+            serialized_data = None
+            if self.local_cache is not None:
+                serialized_data = self.local_cache.get(key)
+                tagger.tag(from_local_cache=str(serialized_data is not None).lower())
 
-            if compressed_pickled_data is None:
-                # Always log cache misses, because they are unexpected
-                tagger.sample_rate = 1
-                return None
+            if serialized_data is None:
+                compressed_data = self.cache.get(key)
+                tagger.tag(from_cache=str(compressed_data is not None).lower())
+
+                if compressed_data is None:
+                    # Always log cache misses, because they are unexpected
+                    tagger.sample_rate = 1
+                    return None
+
+                tagger.measure('compressed_size', len(compressed_data))
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+                serialized_data = zlib.decompress(compressed_data)
 
-            pickled_data = zlib.decompress(compressed_pickled_data)
-            tagger.measure('uncompressed_size', len(pickled_data))
+            tagger.measure('uncompressed_size', len(serialized_data))
 
-            return pickle.loads(pickled_data)
+            try:
+                structure = deserialize_structure(serialized_data)
+            except StructureSerializationError:
+                # Written in a format we don't know; treat it as a miss so
+                # that it gets replaced.
+                tagger.tag(unknown_format='true')
+                tagger.sample_rate = 1
+                return None
+
+            self._set_local(key, serialized_data, tagger)
+            return structure
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """Given a structure, will serialize, compress, and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
-            tagger.measure('uncompressed_size', len(pickled_data))
+            serialized_data = serialize_structure(structure)
+            tagger.measure('uncompressed_size', len(serialized_data))
 
             # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            compressed_data = zlib.compress(serialized_data, 1)
+            tagger.measure('compressed_size', len(compressed_data))
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self.cache.set(key, compressed_data, None)
+            self._set_local(key, serialized_data, tagger)
+
+    def _set_local(self, key, serialized_data, tagger):
+        """Store `serialized_data` in the local cache, if there is one, recording evictions."""
+        if self.local_cache is None:
+            return
+        evicted = self.local_cache.set(key, serialized_data)
+        tagger.measure('local_cache_evictions', evicted)
+        tagger.measure('local_cache_size', self.local_cache.size)
 
 
 class MongoConnection(object):
@@ -0,0 +1,214 @@
+"""
+Compact serialization of split modulestore course structures.
+
+Course structures are cached as bytes (see `CourseStructureCache`), and for
+courses with many thousands of blocks, pickling and unpickling all of their
+`BlockData`, `EditInfo` and `BlockKey` objects is expensive in both time and
+space. The format here instead flattens a structure into builtin types that
+`marshal` can write and read natively:
+
+* block types are stored once in a table and referenced by index,
+* every block's key is stored once, and children are referenced by the index
+  of the child block rather than repeating its type and id,
+* `EditInfo`s are stored as tuples rather than dicts of field names,
+* `ObjectId`s and datetimes are stored as tagged tuples.
+
+The objects are rebuilt directly on load, without going through the (contract
+checked) constructors.
+
+Serialized data starts with a header naming the format version, so that
+entries written by other versions are detected rather than misread. If a
+structure holds values that `marshal` can't write, it is pickled instead;
+data that is simply a pickle (which is what `CourseStructureCache` used to
+store) is also read back.
+"""
+import cPickle as pickle
+import datetime
+import marshal
+
+import pytz
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData, EditInfo, intern_field_names
+from xmodule.modulestore.split_mongo import BlockKey
+
+# Bumped whenever the layout of serialized structures changes.
+FORMAT_VERSION = 1
+# The marshal format depends on the Python version, so it's part of the header.
+HEADER = 'SS{}{}'.format(chr(FORMAT_VERSION), chr(marshal.version))
+PICKLE_PREFIX = '\x80'
+
+# Tags for values that marshal can't write natively.
+_OBJECT_ID = 0
+_NAIVE_DATETIME = 1
+_UTC_DATETIME = 2
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+_EDIT_INFO_FIELDS = (
+    'previous_version',
+    'update_version',
+    'source_version',
+    'edited_on',
+    'edited_by',
+    'original_usage',
+    'original_usage_version',
+)
+
+
+class StructureSerializationError(Exception):
+    """
+    Raised when serialized data can't be read, e.g. because it was written with
+    another version of the format.
+    """
+    pass
+
+
+def serialize_structure(structure):
+    """
+    Return `structure` (as returned by `structure_from_mongo`) serialized to a
+    string.
+    """
+    try:
+        return HEADER + marshal.dumps(_flatten(structure), marshal.version)
+    except ValueError:
+        # The structure holds something marshal can't handle.
+        return pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize_structure(data):
+    """
+    Return the structure serialized in `data` by `serialize_structure`.
+
+    Raises StructureSerializationError if `data` is in an unknown format.
+    """
+    if data.startswith(HEADER):
+        return _unflatten(marshal.loads(data[len(HEADER):]))
+    elif data.startswith(PICKLE_PREFIX):
+        return pickle.loads(data)
+    raise StructureSerializationError("Unknown course structure format: {!r}".format(data[:len(HEADER)]))
+
+
+def _encode_value(value):
+    """Return `value`, or a tagged tuple for values marshal can't write."""
+    if isinstance(value, ObjectId):
+        return (_OBJECT_ID, value.binary)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            return (_NAIVE_DATETIME, _microseconds_since_epoch(value))
+        return (_UTC_DATETIME, _microseconds_since_epoch(value.astimezone(pytz.utc).replace(tzinfo=None)))
+    return value
+
+
+def _decode_value(value):
+    """Reverse `_encode_value`."""
+    if type(value) is not tuple:  # pylint: disable=unidiomatic-typecheck
+        return value
+    tag, encoded = value
+    if tag == _OBJECT_ID:
+        return ObjectId(encoded)
+    decoded = _EPOCH + datetime.timedelta(microseconds=encoded)
+    if tag == _UTC_DATETIME:
+        decoded = decoded.replace(tzinfo=pytz.utc)
+    return decoded
+
+
+def _microseconds_since_epoch(naive_datetime):
+    """Return the number of microseconds between the epoch and `naive_datetime`."""
+    delta = naive_datetime - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _flatten(structure):
+    """Return `structure` as a tuple of builtin types."""
+    block_types = []
+    block_type_indexes = {}
+    block_indexes = {}
+    block_keys = []
+
+    def type_index(block_type):
+        """Return the index of `block_type` in the block type table, adding it if needed."""
+        index = block_type_indexes.get(block_type)
+        if index is None:
+            index = block_type_indexes[block_type] = len(block_types)
+            block_types.append(block_type)
+        return index
+
+    blocks = structure['blocks']
+    for index, block_key in enumerate(blocks):
+        block_indexes[block_key] = index
+        block_keys.append((type_index(block_key.type), block_key.id))
+
+    def encode_key(block_key):
+        """Reference a block by index, or by type and id if it isn't in the structure."""
+        index = block_indexes.get(block_key)
+        if index is None:
+            return (type_index(block_key.type), block_key.id)
+        return index
+
+    flat_blocks = []
+    for block in blocks.itervalues():
+        fields = block.fields
+        children = None
+        if 'children' in fields:
+            fields = dict(fields)
+            children = [encode_key(child) for child in fields.pop('children')]
+        edit_info = block.edit_info
+        flat_blocks.append((
+            type_index(block.block_type) if block.block_type is not None else None,
+            _encode_value(block.definition),
+            fields,
+            children,
+            block.defaults,
+            tuple(_encode_value(getattr(edit_info, field)) for field in _EDIT_INFO_FIELDS),
+        ))
+
+    others = dict(
+        (key, _encode_value(value))
+        for key, value in structure.iteritems()
+        if key not in ('blocks', 'root')
+    )
+    return (others, block_types, block_keys, encode_key(structure['root']), flat_blocks)
+
+
+def _unflatten(flattened):
+    """Reverse `_flatten`."""
+    others, block_types, flat_keys, root, flat_blocks = flattened
+
+    new_key = tuple.__new__
+    block_keys = [new_key(BlockKey, (block_types[type_index], block_id)) for type_index, block_id in flat_keys]
+
+    def decode_key(encoded):
+        """Reverse `encode_key`."""
+        if type(encoded) is int:  # pylint: disable=unidiomatic-typecheck
+            return block_keys[encoded]
+        type_index, block_id = encoded
+        return new_key(BlockKey, (block_types[type_index], block_id))
+
+    blocks = {}
+    new_block_data = BlockData.__new__
+    new_edit_info = EditInfo.__new__
+    for block_key, flat_block in zip(block_keys, flat_blocks):
+        block_type, definition, fields, children, defaults, flat_edit_info = flat_block
+        if children is not None:
+            fields['children'] = [decode_key(child) for child in children]
+
+        edit_info = new_edit_info(EditInfo)
+        for field, value in zip(_EDIT_INFO_FIELDS, flat_edit_info):
+            setattr(edit_info, field, _decode_value(value))
+        edit_info._subtree_edited_on = None  # pylint: disable=protected-access
+        edit_info._subtree_edited_by = None  # pylint: disable=protected-access
+
+        block = new_block_data(BlockData)
+        block.definition_loaded = False
+        block.fields = intern_field_names(fields)
+        block.block_type = block_types[block_type] if block_type is not None else None
+        block.definition = _decode_value(definition)
+        block.defaults = intern_field_names(defaults)
+        block.edit_info = edit_info
+        blocks[block_key] = block
+
+    structure = dict((key, _decode_value(value)) for key, value in others.iteritems())
+    structure['root'] = decode_key(root)
+    structure['blocks'] = blocks
+    return structure
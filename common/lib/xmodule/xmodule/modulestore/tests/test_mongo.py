@@ -10,6 +10,7 @@ from nose.tools import assert_equals, assert_raises, \
 from path import Path as path
 import pymongo
 import logging
+import pickle
 import shutil
 from tempfile import mkdtemp
 from uuid import uuid4
@@ -35,11 +36,11 @@ from xmodule.modulestore.xml_exporter import export_course_to_xml
 from xmodule.modulestore.xml_importer import import_course_from_xml, perform_xlint
 from xmodule.contentstore.mongo import MongoContentStore
 
-from nose.tools import assert_in
+from nose.tools import assert_in, assert_not_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, MetadataInheritanceTree
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
@@ -758,6 +759,20 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_metadata_inheritance_tree(self):
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        course_metadata = self.draft_store.collection.find_one(
+            {'_id.course': 'toy', '_id.category': 'course'}
+        )['metadata']
+        tree = self.draft_store._compute_metadata_inheritance_tree(course_key)
+
+        chapter_url = unicode(course_key.make_usage_key('chapter', 'Overview'))
+        video_url = unicode(course_key.make_usage_key('video', 'Welcome'))
+        assert_equals(tree.get_inherited_metadata(video_url)['graceperiod'], course_metadata['graceperiod'])
+        assert_equals(tree.get_parent_url(video_url, ModuleStoreEnum.Branch.draft_preferred), chapter_url)
+        assert_is_none(tree.get_parent_url(video_url, ModuleStoreEnum.Branch.published_only))
+        assert_not_in(unicode(course_key.make_usage_key('course', '2012_Fall')), tree)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
@@ -863,6 +878,59 @@ class TestMongoKeyValueStore(unittest.TestCase):
                 self.kvs.delete(KeyValueStore.Key(scope, None, None, 'foo'))
 
 
+class TestMetadataInheritanceTree(unittest.TestCase):
+    """
+    Tests for MetadataInheritanceTree.
+    """
+    def setUp(self):
+        super(TestMetadataInheritanceTree, self).setUp()
+        self.branch = ModuleStoreEnum.Branch.draft_preferred
+        self.tree = MetadataInheritanceTree()
+        course_frame = self.tree.add_frame(None, {'graded': True, 'due': 'course due'})
+        self.tree.add_block('chapter', course_frame, self.branch, 'course')
+        sequential_frame = self.tree.add_frame(course_frame, {'due': 'sequential due'})
+        self.tree.add_block('sequential', sequential_frame, self.branch, 'chapter')
+        self.tree.add_block('problem', sequential_frame, self.branch, 'sequential')
+
+    def test_inherited_metadata(self):
+        assert_equals(self.tree.get_inherited_metadata('chapter'), {'graded': True, 'due': 'course due'})
+        assert_equals(self.tree.get_inherited_metadata('problem'), {'graded': True, 'due': 'sequential due'})
+        assert_true(self.tree.get_inherited_metadata('problem') is self.tree.get_inherited_metadata('sequential'))
+        assert_equals(self.tree.get_inherited_metadata('other'), {})
+
+    def test_parent_url(self):
+        assert_equals(self.tree.get_parent_url('problem', self.branch), 'sequential')
+        assert_is_none(self.tree.get_parent_url('problem', ModuleStoreEnum.Branch.published_only))
+        assert_is_none(self.tree.get_parent_url('other', self.branch))
+
+    def test_pickle(self):
+        self.tree.get_inherited_metadata('problem')
+        tree = pickle.loads(pickle.dumps(self.tree, pickle.HIGHEST_PROTOCOL))
+        assert_equals(tree.keys(), self.tree.keys())
+        assert_equals(tree.get_inherited_metadata('problem'), {'graded': True, 'due': 'sequential due'})
+        assert_equals(tree.get_parent_url('problem', self.branch), 'sequential')
+
+    def test_update(self):
+        other = MetadataInheritanceTree()
+        other.add_block('problem', other.add_frame(None, {'graded': False}), self.branch, 'vertical')
+        other.add_block('html', other.add_frame(None, {}), self.branch, 'vertical')
+        self.tree.update(other)
+
+        assert_equals(len(self.tree), 4)
+        assert_equals(self.tree.get_inherited_metadata('problem'), {'graded': False})
+        assert_equals(self.tree.get_parent_url('problem', self.branch), 'vertical')
+        assert_equals(self.tree.get_inherited_metadata('html'), {})
+        assert_equals(self.tree.get_inherited_metadata('sequential'), {'graded': True, 'due': 'sequential due'})
+        assert_equals(self.tree.get_parent_url('chapter', self.branch), 'course')
+
+    def test_update_with_same_blocks(self):
+        other = pickle.loads(pickle.dumps(self.tree))
+        for __ in range(3):
+            self.tree.update(pickle.loads(pickle.dumps(other)))
+        assert_equals(len(self.tree._frames), 2)
+        assert_equals(self.tree.get_inherited_metadata('problem'), {'graded': True, 'due': 'sequential due'})
+
+
 def _build_requested_filter(requested_filter):
     """
     Returns requested filter_params string.
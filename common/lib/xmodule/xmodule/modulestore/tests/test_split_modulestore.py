@@ -30,6 +30,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import LocalStructureCache
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -973,6 +974,40 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        local_cache = LocalStructureCache(10 * 1024 * 1024)
+
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.local_structure_cache', return_value=local_cache):
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # With the django cache emptied, the structure still comes from
+            # the process-local cache...
+            self.cache.clear()
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+            self.assertEqual(cached_structure, not_cached_structure)
+
+            # ... as a fresh copy each time, so that callers can't affect
+            # each other by modifying it.
+            self.assertIsNot(self._get_structure(self.new_course), cached_structure)
+
+    def test_local_structure_cache_eviction(self):
+        local_cache = LocalStructureCache(10)
+        self.assertEqual(local_cache.set('a', 'xxxx'), 0)
+        self.assertEqual(local_cache.set('b', 'xxxx'), 0)
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertEqual(local_cache.get('a'), 'xxxx')
+        self.assertEqual(local_cache.set('c', 'xxxx'), 1)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual(local_cache.get('a'), 'xxxx')
+        self.assertEqual(local_cache.size, 8)
+        # Values bigger than the whole cache are never stored
+        self.assertEqual(local_cache.set('d', 'x' * 11), 0)
+        self.assertIsNone(local_cache.get('d'))
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
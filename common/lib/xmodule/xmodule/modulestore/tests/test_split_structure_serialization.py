@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+""" Test split_mongo/structure_serialization """
+import copy
+import cPickle as pickle
+import datetime
+import unittest
+
+import pytz
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_serialization import (
+    HEADER,
+    serialize_structure,
+    deserialize_structure,
+    StructureSerializationError,
+)
+
+
+def make_block(block_type, fields=None, edited_on=None):
+    """ Return a BlockData like those produced by `structure_from_mongo`. """
+    return BlockData(
+        block_type=block_type,
+        definition=ObjectId(),
+        fields=fields or {},
+        defaults={},
+        edit_info={
+            'edited_on': edited_on or datetime.datetime(2015, 10, 1, 12, 30, 15, 123456, tzinfo=pytz.utc),
+            'edited_by': 42,
+            'previous_version': ObjectId(),
+            'update_version': ObjectId(),
+            'source_version': None,
+            'original_usage': None,
+            'original_usage_version': None,
+        },
+    )
+
+
+class TestStructureSerialization(unittest.TestCase):
+    """ Test round-tripping course structures through the compact format """
+    def setUp(self):
+        super(TestStructureSerialization, self).setUp()
+        course_key = BlockKey('course', 'course')
+        chapter_key = BlockKey('chapter', 'chapter1')
+        problem_key = BlockKey('problem', u'prøblem')
+        self.structure = {
+            '_id': ObjectId(),
+            'original_version': ObjectId(),
+            'previous_version': None,
+            'edited_by': 42,
+            'edited_on': datetime.datetime(2015, 10, 2, tzinfo=pytz.utc),
+            'schema_version': 1,
+            'root': course_key,
+            'blocks': {
+                course_key: make_block('course', {'children': [chapter_key], 'display_name': u'Cöurse'}),
+                # A child that isn't in the structure is kept as is.
+                chapter_key: make_block('chapter', {'children': [problem_key, BlockKey('html', 'missing')]}),
+                problem_key: make_block(
+                    'problem',
+                    {'weight': 2.5, 'xml_attributes': {'filename': ['a.xml', 'b.xml']}},
+                    edited_on=datetime.datetime(2015, 10, 3),
+                ),
+            },
+        }
+
+    def test_round_trip(self):
+        data = serialize_structure(self.structure)
+        self.assertTrue(data.startswith(HEADER))
+        structure = deserialize_structure(data)
+
+        self.assertEqual(structure, self.structure)
+        self.assertEqual(set(structure['blocks']), set(self.structure['blocks']))
+        for block_key, block in structure['blocks'].iteritems():
+            self.assertIsInstance(block_key, BlockKey)
+            self.assertFalse(block.definition_loaded)
+            expected_edit_info = self.structure['blocks'][block_key].edit_info
+            self.assertEqual(block.edit_info.edited_on, expected_edit_info.edited_on)
+            self.assertEqual(block.edit_info.edited_on.tzinfo, expected_edit_info.edited_on.tzinfo)
+        for child in structure['blocks'][BlockKey('chapter', 'chapter1')].fields['children']:
+            self.assertIsInstance(child, BlockKey)
+
+    def test_serialization_does_not_modify_structure(self):
+        serialize_structure(self.structure)
+        self.assertEqual(
+            self.structure['blocks'][self.structure['root']].fields['children'],
+            [BlockKey('chapter', 'chapter1')]
+        )
+
+    def test_unmarshallable_values_are_pickled(self):
+        self.structure['blocks'][self.structure['root']].fields['unexpected'] = UnmarshallableValue()
+        data = serialize_structure(self.structure)
+        self.assertFalse(data.startswith(HEADER))
+        self.assertEqual(deserialize_structure(data)['_id'], self.structure['_id'])
+
+    def test_reads_pickled_structures(self):
+        data = pickle.dumps(self.structure, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(deserialize_structure(data), self.structure)
+
+    def test_unknown_format(self):
+        with self.assertRaises(StructureSerializationError):
+            deserialize_structure('SS\xff\xff' + 'some other format')
+
+
+class TestSlottedBlockData(unittest.TestCase):
+    """ Test copying and pickling BlockData and EditInfo, which use __slots__ """
+    def setUp(self):
+        super(TestSlottedBlockData, self).setUp()
+        self.block = make_block('problem', {'weight': 2.5, 'children': [BlockKey('html', 'html1')]})
+
+    def assert_blocks_equal(self, block, expected):
+        """ Assert that `block` has the same state as `expected` """
+        self.assertEqual(block, expected)
+        self.assertEqual(block.__getstate__(), expected.__getstate__())
+        self.assertEqual(block.edit_info.__getstate__(), expected.edit_info.__getstate__())
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.block, '__dict__'))
+        self.assertFalse(hasattr(self.block.edit_info, '__dict__'))
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assert_blocks_equal(pickle.loads(pickle.dumps(self.block, protocol)), self.block)
+
+    def test_deepcopy(self):
+        block = copy.deepcopy(self.block)
+        self.assert_blocks_equal(block, self.block)
+        self.assertIsNot(block.fields, self.block.fields)
+        self.assertIsNot(block.edit_info, self.block.edit_info)
+
+    def test_unpickle_dict_state(self):
+        # Instances pickled before BlockData and EditInfo used __slots__ had their __dict__ as state
+        edit_info = EditInfo.__new__(EditInfo)
+        edit_info.__setstate__((self.block.edit_info.__getstate__(), None))
+        block = BlockData.__new__(BlockData)
+        block.__setstate__(dict(self.block.__getstate__(), edit_info=edit_info))
+        self.assert_blocks_equal(block, self.block)
+
+    def test_field_names_are_shared(self):
+        other_block = make_block('problem', {'weight'[:3] + 'ght': 1.0})
+        self.assertIs(
+            next(name for name in other_block.fields if name == 'weight'),
+            next(name for name in self.block.fields if name == 'weight'),
+        )
+
+
+class UnmarshallableValue(object):
+    """ A picklable class that marshal can't write """
+    def __eq__(self, other):
+        return isinstance(other, UnmarshallableValue)
@@ -83,6 +83,21 @@ class FakeGridFsItem(object):
         return chunk
 
 
+class FakeChunkedGridFsItem(FakeGridFsItem):
+    """
+    A FakeGridFsItem stored in chunks, which records the reads made from it
+    """
+    chunk_size = 100
+
+    def __init__(self, string_data):
+        super(FakeChunkedGridFsItem, self).__init__(string_data)
+        self.reads = []
+
+    def read(self, chunk_size):
+        self.reads.append((self.cursor, chunk_size))
+        return super(FakeChunkedGridFsItem, self).read(chunk_size)
+
+
 @ddt.ddt
 class ContentTest(unittest.TestCase):
     def test_thumbnail_none(self):
@@ -164,6 +179,39 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_static_content_stream_reads_chunks(self):
+        """
+        Test that StaticContentStream reads GridFS items one whole chunk at a time
+        """
+        item = FakeChunkedGridFsItem(SAMPLE_STRING)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        self.assertEqual(''.join(static_content_stream.stream_data()), SAMPLE_STRING)
+        for position, size in item.reads:
+            self.assertEqual(position % item.chunk_size, 0)
+            self.assertEqual(size, item.chunk_size)
+
+    @ddt.data((0, 99), (150, 1500), (250, 260), (1000, len(SAMPLE_STRING) - 1))
+    @ddt.unpack
+    def test_static_content_stream_range_reads_aligned(self, first_byte, last_byte):
+        """
+        Test that StaticContentStream stream_data_in_range returns the range, reading within chunk boundaries
+        """
+        item = FakeChunkedGridFsItem(SAMPLE_STRING)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        data = ''.join(static_content_stream.stream_data_in_range(first_byte, last_byte))
+        self.assertEqual(data, SAMPLE_STRING[first_byte:last_byte + 1])
+        for position, size in item.reads:
+            self.assertEqual(position // item.chunk_size, (position + size - 1) // item.chunk_size)
+
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test StaticContent stream_data_in_range function
+        """
+        content = StaticContent('loc', 'name', 'type', SAMPLE_STRING)
+        self.assertEqual(''.join(content.stream_data_in_range(10, 19)), SAMPLE_STRING[10:20])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -4,12 +4,15 @@ by the individual custom courses feature.
 """
 import json
 import logging
+from uuid import uuid4
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
 
 import request_cache
 
-from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
+from courseware.field_overrides import FieldOverrideProvider, overrides_changed  # pylint: disable=import-error
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 
@@ -105,39 +108,117 @@ def _get_overrides_for_ccx(ccx):
     """
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
+
+    The overrides are cached for the request, and between requests for
+    `settings.CCX_OVERRIDES_CACHE_TIMEOUT` seconds.
     """
     overrides_cache = request_cache.get_cache('ccx-overrides')
 
     if ccx not in overrides_cache:
-        overrides = {}
-        query = CcxFieldOverride.objects.filter(
-            ccx=ccx,
-        )
+        timeout = getattr(settings, 'CCX_OVERRIDES_CACHE_TIMEOUT', 0)
+        overrides = None
+        if timeout:
+            # The key is read before the overrides are, so that if they change
+            # in the meantime they're cached under a key no longer in use.
+            cache_key = _overrides_cache_key(ccx)
+            overrides = cache.get(cache_key)
+        if overrides is None:
+            overrides = {}
+            query = CcxFieldOverride.objects.filter(
+                ccx=ccx,
+            )
+
+            instances = []
+            for override in query:
+                block_overrides = overrides.setdefault(override.location, {})
+                block_overrides[override.field] = json.loads(override.value)
+                block_overrides[override.field + "_id"] = override.id
+                instances.append(override)
 
-        for override in query:
-            block_overrides = overrides.setdefault(override.location, {})
-            block_overrides[override.field] = json.loads(override.value)
-            block_overrides[override.field + "_id"] = override.id
-            block_overrides[override.field + "_instance"] = override
+            if timeout:
+                cache.set(cache_key, overrides, timeout)
+
+            # The model instances are only kept for the request
+            for override in instances:
+                overrides[override.location][override.field + "_instance"] = override
 
         overrides_cache[ccx] = overrides
 
     return overrides_cache[ccx]
 
 
-@transaction.commit_on_success
+def _overrides_cache_key(ccx):
+    """
+    Returns the key the overrides of the `ccx` are cached under between requests.
+
+    The key includes a version of the overrides, which changes every time
+    they do (see `_invalidate_overrides_for_ccx`).
+    """
+    version_key = _overrides_version_cache_key(ccx)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid4().hex)
+        version = cache.get(version_key)
+    return u'ccx.overrides.{}.{}'.format(ccx.id, version)
+
+
+def _overrides_version_cache_key(ccx):
+    """
+    Returns the key the version of the overrides of the `ccx` is cached under.
+    """
+    return u'ccx.overrides.version.{}'.format(ccx.id)
+
+
+def _invalidate_overrides_for_ccx(ccx):
+    """
+    Drops the overrides of the `ccx` cached between requests, after they
+    have been changed.
+
+    This has to be called once the change is committed, as otherwise the
+    overrides could be read and cached again before it is.
+    """
+    cache.set(_overrides_version_cache_key(ccx), uuid4().hex)
+    overrides_changed()
+
+
+def _get_override_instance(ccx, block, name):
+    """
+    Returns the CcxFieldOverride of the field `name` of `block` for the
+    `ccx`, or None if the field isn't overridden.
+    """
+    override = get_override_for_ccx(ccx, block, name + "_instance")
+    if override is None:
+        # Overrides read from the cache don't include their model instances
+        override_id = get_override_for_ccx(ccx, block, name + "_id")
+        if override_id is not None:
+            try:
+                override = CcxFieldOverride.objects.get(id=override_id)
+            except CcxFieldOverride.DoesNotExist:
+                return None
+    return override
+
+
 def override_field_for_ccx(ccx, block, name, value):
     """
     Overrides a field for the `ccx`.  `block` and `name` specify the block
     and the name of the field on that block to override.  `value` is the
     value to set for the given field.
     """
+    _override_field_for_ccx(ccx, block, name, value)
+    _invalidate_overrides_for_ccx(ccx)
+
+
+@transaction.commit_on_success
+def _override_field_for_ccx(ccx, block, name, value):
+    """
+    Saves the override of a field for the `ccx`, see `override_field_for_ccx`.
+    """
     field = block.fields[name]
     value_json = field.to_json(value)
     serialized_value = json.dumps(value_json)
     override_has_changes = False
 
-    override = get_override_for_ccx(ccx, block, name + "_instance")
+    override = _get_override_instance(ccx, block, name)
     if override:
         override_has_changes = serialized_value != override.value
 
@@ -172,15 +253,17 @@ def clear_override_for_ccx(ccx, block, name):
     performed.
     """
     try:
-        CcxFieldOverride.objects.get(
+        override = CcxFieldOverride.objects.get(
             ccx=ccx,
             location=block.location,
-            field=name).delete()
-
-        clear_ccx_field_info_from_ccx_map(ccx, block, name)
-
+            field=name)
     except CcxFieldOverride.DoesNotExist:
-        pass
+        return
+
+    with transaction.commit_on_success():
+        override.delete()
+    clear_ccx_field_info_from_ccx_map(ccx, block, name)
+    _invalidate_overrides_for_ccx(ccx)
 
 
 def clear_ccx_field_info_from_ccx_map(ccx, block, name):  # pylint: disable=invalid-name
@@ -203,4 +286,6 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = filter(None, ids)
     ids = list(set(ids))
     if ids:
-        CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        with transaction.commit_on_success():
+            CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        _invalidate_overrides_for_ccx(ccx)
@@ -8,6 +8,7 @@ import pytz
 from nose.plugins.attrib import attr
 
 from courseware.field_overrides import OverrideFieldData  # pylint: disable=import-error
+from django.core.cache import cache
 from django.test.utils import override_settings
 from request_cache.middleware import RequestCache
 from student.tests.factories import AdminFactory  # pylint: disable=import-error
@@ -17,7 +18,13 @@ from xmodule.modulestore.tests.django_utils import (
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from ..models import CustomCourseForEdX
-from ..overrides import override_field_for_ccx
+from ..overrides import (
+    _overrides_cache_key,
+    bulk_delete_ccx_override_fields,
+    clear_override_for_ccx,
+    get_override_for_ccx,
+    override_field_for_ccx,
+)
 
 from .test_views import flatten, iter_blocks
 
@@ -155,3 +162,87 @@ class TestFieldOverrides(ModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    @override_settings(CCX_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_overrides_cached_between_requests(self):
+        """
+        Test that overrides are read from the cache in later requests, until they change.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+
+        RequestCache.clear_request_cache()
+        self.assertEquals(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(0):
+            self.assertEquals(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+        clear_override_for_ccx(self.ccx, chapter, 'start')
+        RequestCache.clear_request_cache()
+        self.assertIsNone(get_override_for_ccx(self.ccx, chapter, 'start'))
+
+    @override_settings(CCX_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_update_override_read_from_cache(self):
+        """
+        Test that an override read from the cache can be updated.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        chapter = self.ccx.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', datetime.datetime(2014, 12, 25, tzinfo=pytz.UTC))
+        RequestCache.clear_request_cache()
+        get_override_for_ccx(self.ccx, chapter, 'start')
+        RequestCache.clear_request_cache()
+
+        new_ccx_start = datetime.datetime(2015, 12, 25, tzinfo=pytz.UTC)
+        override_field_for_ccx(self.ccx, chapter, 'start', new_ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEquals(get_override_for_ccx(self.ccx, chapter, 'start'), new_ccx_start)
+
+    @override_settings(CCX_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_overrides_read_before_change_not_cached(self):
+        """
+        Test that overrides read before a change, and cached after it, are not used.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        chapter = self.ccx.course.get_children()[0]
+        stale_cache_key = _overrides_cache_key(self.ccx)
+
+        ccx_start = datetime.datetime(2014, 12, 25, tzinfo=pytz.UTC)
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        # A concurrent request that read the overrides before they changed
+        cache.set(stale_cache_key, {}, 60)
+        RequestCache.clear_request_cache()
+        self.assertEquals(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+    @override_settings(CCX_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_cache_invalidated_after_commit(self):
+        """
+        Test that the cached overrides are invalidated once the change is committed.
+        """
+        chapter = self.ccx.course.get_children()[0]
+        calls = mock.Mock()
+        with mock.patch('ccx.overrides._override_field_for_ccx', calls.override):
+            with mock.patch('ccx.overrides._invalidate_overrides_for_ccx', calls.invalidate):
+                override_field_for_ccx(self.ccx, chapter, 'start', datetime.datetime(2014, 12, 25, tzinfo=pytz.UTC))
+        self.assertEqual([name for name, __, __ in calls.mock_calls], ['override', 'invalidate'])
+
+    @override_settings(CCX_OVERRIDES_CACHE_TIMEOUT=60)
+    def test_bulk_delete_invalidates_cache(self):
+        """
+        Test that overrides deleted in bulk are no longer read from the cache.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        chapter = self.ccx.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', datetime.datetime(2014, 12, 25, tzinfo=pytz.UTC))
+        RequestCache.clear_request_cache()
+        override_id = get_override_for_ccx(self.ccx, chapter, 'start_id')
+
+        bulk_delete_ccx_override_fields(self.ccx, [override_id])
+        RequestCache.clear_request_cache()
+        self.assertIsNone(get_override_for_ccx(self.ccx, chapter, 'start'))
@@ -81,7 +81,7 @@ def get_certificates_for_user(username):
 
 
 def generate_user_certificates(student, course_key, course=None, insecure=False, generation_mode='batch',
-                               forced_grade=None):
+                               forced_grade=None, grade_summary=None):
     """
     It will add the add-cert request into the xqueue.
 
@@ -102,6 +102,8 @@ def generate_user_certificates(student, course_key, course=None, insecure=False,
         in case of django command and `self` if student initiated the request.
         forced_grade - a string indicating to replace grade parameter. if present grading
                        will be skipped.
+        grade_summary - the student's already computed grade, as returned by
+                        `courseware.grades.grade`, so that they are not graded again.
     """
     xqueue = XQueueCertInterface()
     if insecure:
@@ -110,7 +112,8 @@ def generate_user_certificates(student, course_key, course=None, insecure=False,
     status, cert = xqueue.add_cert(student, course_key,
                                    course=course,
                                    generate_pdf=generate_pdf,
-                                   forced_grade=forced_grade)
+                                   forced_grade=forced_grade,
+                                   grade_summary=grade_summary)
     if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
         emit_certificate_event('created', student, course_key, course, {
             'user_id': student.id,
@@ -184,7 +184,7 @@ class XQueueCertInterface(object):
 
     # pylint: disable=too-many-statements
     def add_cert(self, student, course_id, course=None, forced_grade=None, template_file=None,
-                 title='None', generate_pdf=True):
+                 title='None', generate_pdf=True, grade_summary=None):
         """
         Request a new certificate for a student.
 
@@ -195,6 +195,9 @@ class XQueueCertInterface(object):
                          the certificate request. If this is given, grading
                          will be skipped.
           generate_pdf - Boolean should a message be sent in queue to generate certificate PDF
+          grade_summary - the student's grade, as returned by grades.grade, if
+                          it has already been computed. If this is given, the
+                          student will not be graded again.
 
         Will change the certificate status to 'generating' or
         `downloadable` in case of web view certificates.
@@ -255,7 +258,10 @@ class XQueueCertInterface(object):
 
             course_name = course.display_name or unicode(course_id)
             is_whitelisted = self.whitelist.filter(user=student, course_id=course_id, whitelist=True).exists()
-            grade = grades.grade(student, self.request, course)
+            if grade_summary is not None:
+                grade = grade_summary
+            else:
+                grade = grades.grade(student, self.request, course)
             enrollment_mode, __ = CourseEnrollment.enrollment_mode_for_user(student, course_id)
             mode_is_verified = enrollment_mode in GeneratedCertificate.VERIFIED_CERTS_MODES
             user_is_verified = SoftwareSecurePhotoVerification.user_is_verified(student)
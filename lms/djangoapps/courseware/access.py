@@ -43,8 +43,7 @@ from student.roles import (
     CourseStaffRole,
     GlobalStaff,
     SupportStaffRole,
-    OrgInstructorRole,
-    OrgStaffRole,
+    get_course_roles,
 )
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
@@ -729,18 +728,15 @@ def _has_access_to_course(user, access_level, course_key):
         debug("Deny: unknown access level")
         return ACCESS_DENIED
 
-    staff_access = (
-        CourseStaffRole(course_key).has_user(user) or
-        OrgStaffRole(course_key.org).has_user(user)
-    )
+    # The course and org roles of the user are resolved together, once per course
+    course_roles = get_course_roles(user, course_key)
+
+    staff_access = CourseStaffRole.ROLE in course_roles
     if staff_access and access_level == 'staff':
         debug("Allow: user has course staff access")
         return ACCESS_GRANTED
 
-    instructor_access = (
-        CourseInstructorRole(course_key).has_user(user) or
-        OrgInstructorRole(course_key.org).has_user(user)
-    )
+    instructor_access = CourseInstructorRole.ROLE in course_roles
 
     if instructor_access and access_level in ('staff', 'instructor'):
         debug("Allow: user has course instructor access")
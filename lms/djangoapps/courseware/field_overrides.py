@@ -26,6 +26,9 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = "courseware.field_overrides.enabled_providers"
 
+# Incremented whenever field overrides are set or cleared, see `overrides_changed`.
+_overrides_generation = 0  # pylint: disable=invalid-name
+
 
 def resolve_dotted(name):
     """
@@ -71,11 +74,6 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
         enabled_providers = cls._providers_for_course(course)
 
         if enabled_providers:
@@ -87,6 +85,14 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def has_providers_for(cls, course):
+        """
+        Returns whether fields of the course may be overridden for users, in
+        which case their values have to be read from blocks bound to the user.
+        """
+        return bool(cls._providers_for_course(course))
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -97,6 +103,11 @@ class OverrideFieldData(FieldData):
         Arguments:
             course: The course XBlock
         """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
         request_cache = RequestCache.get_request_cache()
         enabled_providers = request_cache.data.get(
             ENABLED_OVERRIDE_PROVIDERS_KEY, NOTSET
@@ -112,6 +123,8 @@ class OverrideFieldData(FieldData):
     def __init__(self, user, fallback, providers):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        self._inherited_overrides = {}
+        self._inherited_overrides_generation = _overrides_generation
 
     def get_override(self, block, name):
         """
@@ -125,6 +138,31 @@ class OverrideFieldData(FieldData):
                     return value
         return NOTSET
 
+    def get_inherited_override(self, block, name):
+        """
+        Checks for an override for the field identified by `name` in the
+        ancestors of `block`, and returns the one closest to `block`, or
+        `NOTSET` if no override is found.
+
+        The result is remembered for every block on the way up the tree, so
+        the overrides of an ancestor are only looked up once for all of its
+        descendants.
+        """
+        if self._inherited_overrides_generation != _overrides_generation:
+            self._inherited_overrides = {}
+            self._inherited_overrides_generation = _overrides_generation
+
+        key = (block.location, name)
+        if key not in self._inherited_overrides:
+            value = NOTSET
+            parent = block.get_parent()
+            if parent:
+                value = self.get_override(parent, name)
+                if value is NOTSET:
+                    value = self.get_inherited_override(parent, name)
+            self._inherited_overrides[key] = value
+        return self._inherited_overrides[key]
+
     def get(self, block, name):
         value = self.get_override(block, name)
         if value is not NOTSET:
@@ -142,15 +180,13 @@ class OverrideFieldData(FieldData):
             return self.fallback.has(block, name)
 
         has = self.get_override(block, name)
-        if has is NOTSET:
+        if has is NOTSET and not overrides_disabled():
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in InheritanceMixin.fields:
+                if self.get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -161,12 +197,10 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+            if name in InheritanceMixin.fields:
+                value = self.get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
@@ -200,6 +234,16 @@ def overrides_disabled():
     return bool(_OVERRIDES_DISABLED.disabled)
 
 
+def overrides_changed():
+    """
+    Signals that field overrides have been set or cleared, so that the
+    inherited overrides remembered by `OverrideFieldData` objects are looked
+    up again.  Providers' APIs for setting overrides should call this.
+    """
+    global _overrides_generation  # pylint: disable=global-statement, invalid-name
+    _overrides_generation += 1
+
+
 class FieldOverrideProvider(object):
     """
     Abstract class which defines the interface that a `FieldOverrideProvider`
@@ -235,13 +279,3 @@ class FieldOverrideProvider(object):
         """
         return False
 
-
-def _lineage(block):
-    """
-    Returns an iterator over all ancestors of the given block, starting with
-    its immediate parent and ending at the root of the block tree.
-    """
-    parent = block.get_parent()
-    while parent:
-        yield parent
-        parent = parent.get_parent()
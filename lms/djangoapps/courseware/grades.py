@@ -1,7 +1,9 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from datetime import datetime
 from functools import partial
+from itertools import islice
 import json
 import random
 import logging
@@ -11,19 +13,21 @@ from django.conf import settings
 from django.db import transaction
 from django.test.client import RequestFactory
 from django.core.cache import cache
+from pytz import UTC
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
 from courseware.access import has_access
-from courseware.model_data import FieldDataCache, ScoresClient
-from student.models import anonymous_id_for_user
+from courseware.field_overrides import OverrideFieldData
+from courseware.model_data import FieldDataCache, ScoresClient, StudentModuleBatch
+from student.models import AnonymousUserId, anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendants
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import PersistentGradesVersion, PersistentSubsectionGrade, StudentModule
 from .module_render import get_module_for_descriptor
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
@@ -32,6 +36,24 @@ from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose grading data is loaded together by iterate_grades_for
+# when ENABLE_BATCH_GRADING is on.
+GRADING_BATCH_SIZE = 100
+
+
+def course_version_for_grading(course):
+    """
+    Return a string identifying the version of the course's content, for use in
+    keying cached grading data.
+
+    This is based on the last time something was published to the live version
+    of the course, so any content change yields a new version. Old XML courses
+    don't have `subtree_edited_on`, in which case an empty string is returned.
+    """
+    if course.subtree_edited_on is None:
+        return u""
+    return course.subtree_edited_on.isoformat()
+
 
 class MaxScoresCache(object):
     """
@@ -60,11 +82,11 @@ class MaxScoresCache(object):
         max scores -- any time a content change occurs, we change our cache
         keys.
         """
-        if course.subtree_edited_on is None:
-            # check for subtree_edited_on because old XML courses doesn't have this attribute
-            cache_key = u"{}".format(course.id)
+        version = course_version_for_grading(course)
+        if version:
+            cache_key = u"{}.{}".format(course.id, version)
         else:
-            cache_key = u"{}.{}".format(course.id, course.subtree_edited_on.isoformat())
+            cache_key = u"{}".format(course.id)
         return cls(cache_key)
 
     def fetch_from_remote(self, locations):
@@ -296,14 +318,18 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None):
+def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None,
+          submissions_scores=None, max_scores_cache=None, grades_version=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     Send a signal to update the minimum grade requirement status.
     """
     with manual_transaction():
-        grade_summary = _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client)
+        grade_summary = _grade(
+            student, request, course, keep_raw_scores, field_data_cache, scores_client,
+            submissions_scores, max_scores_cache, grades_version
+        )
         responses = GRADES_UPDATED.send_robust(
             sender=None,
             username=student.username,
@@ -318,7 +344,8 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
         return grade_summary
 
 
-def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client):
+def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client,
+           submissions_scores=None, max_scores_cache=None, grades_version=None):
     """
     Unwrapped version of "grade"
 
@@ -337,32 +364,80 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    `submissions_scores` and `max_scores_cache` may be passed in by callers
+    that grade many students at once and have already loaded them, in which
+    case pushing `max_scores_cache` back to the cache is left to the caller.
+    Subsection grades computed from a `field_data_cache` passed in are only
+    persisted if the caller also passes the student's `grades_version` (see
+    `PersistentGradesVersion`), read before that state was loaded.
+
     More information on the format is in the docstring for CourseGrader.
     """
-    if field_data_cache is None:
-        with manual_transaction():
-            field_data_cache = field_data_cache_for_grading(course, student)
-    if scores_client is None:
-        scores_client = ScoresClient.from_field_data_cache(field_data_cache)
+    grading_context = course.grading_context
+    raw_scores = []
 
-    # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
-    # scores that were registered with the submissions API, which for the moment
-    # means only openassessment (edx-ora2)
-    # We need to import this here to avoid a circular dependency of the form:
-    # XBlock --> submissions --> Django Rest Framework error strings -->
-    # Django translation --> ... --> courseware --> submissions
-    from submissions import api as sub_api  # installed from the edx-submissions repository
-    submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
-    max_scores_cache = MaxScoresCache.create_for_course(course)
+    # Subsection grades that were persisted the last time this student was
+    # graded against the current version of the course. Raw scores are not
+    # persisted, so asking for them always forces a full recompute. Neither
+    # are grades in courses with field overrides (e.g. CCX or individual
+    # dates), which can change what a student is graded on without changing
+    # the version of the course.
+    persist_grades = (
+        settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES', False) and
+        not keep_raw_scores and
+        not settings.GENERATE_PROFILE_SCORES and
+        not OverrideFieldData.has_providers_for(course)
+    )
+    course_version = course_version_for_grading(course)
+    persisted_grades = {}
+    if persist_grades:
+        if grades_version is None and field_data_cache is None:
+            grades_version = PersistentGradesVersion.read_versions([student.id], course.id)[student.id]
+        persisted_grades = PersistentSubsectionGrade.read_grades(student.id, course.id, course_version)
+    now = datetime.now(UTC)
+
+    def can_use_persisted_grade(section):
+        """Return True if a stored grade can stand in for grading this section."""
+        return (
+            section['section_descriptor'].location in persisted_grades and
+            not any(descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors'])
+        )
 
-    # For the moment, we have to get scorable_locations from field_data_cache
-    # and not from scores_client, because scores_client is ignorant of things
-    # in the submissions API. As a further refactoring step, submissions should
-    # be hidden behind the ScoresClient.
-    max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
+    # If every graded section has a usable persisted grade, we don't need to
+    # load any student state at all.
+    needs_student_state = not all(
+        can_use_persisted_grade(section)
+        for sections in grading_context['graded_sections'].itervalues()
+        for section in sections
+    )
 
-    grading_context = course.grading_context
-    raw_scores = []
+    if needs_student_state:
+        if field_data_cache is None:
+            with manual_transaction():
+                field_data_cache = field_data_cache_for_grading(course, student)
+        if scores_client is None:
+            scores_client = ScoresClient.from_field_data_cache(field_data_cache)
+
+        # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
+        # scores that were registered with the submissions API, which for the moment
+        # means only openassessment (edx-ora2)
+        # We need to import this here to avoid a circular dependency of the form:
+        # XBlock --> submissions --> Django Rest Framework error strings -->
+        # Django translation --> ... --> courseware --> submissions
+        if submissions_scores is None:
+            from submissions import api as sub_api  # installed from the edx-submissions repository
+            submissions_scores = sub_api.get_scores(
+                course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+            )
+        owns_max_scores_cache = max_scores_cache is None
+        if owns_max_scores_cache:
+            max_scores_cache = MaxScoresCache.create_for_course(course)
+
+            # For the moment, we have to get scorable_locations from field_data_cache
+            # and not from scores_client, because scores_client is ignorant of things
+            # in the submissions API. As a further refactoring step, submissions should
+            # be hidden behind the ScoresClient.
+            max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -373,12 +448,20 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             section_descriptor = section['section_descriptor']
             section_name = section_descriptor.display_name_with_default
 
+            if can_use_persisted_grade(section):
+                earned, possible = persisted_grades[section_descriptor.location]
+                graded_total = Score(earned, possible, True, section_name, None)
+                if graded_total.possible > 0:
+                    format_scores.append(graded_total)
+                continue
+
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
+            should_grade_section = always_recalculate
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
@@ -452,6 +535,26 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             else:
                 graded_total = Score(0.0, 1.0, True, section_name, None)
 
+            # Until all of its content is released, what the student is graded
+            # on in the section changes with time.
+            if (
+                    persist_grades and grades_version is not None and not always_recalculate and
+                    _is_released(section, now)
+            ):
+                with manual_transaction():
+                    saved = PersistentSubsectionGrade.save_grade(
+                        student.id,
+                        section_descriptor.location,
+                        course_version,
+                        graded_total.earned,
+                        graded_total.possible,
+                        grades_version,
+                    )
+                if not saved:
+                    # The student's grades were invalidated while we were
+                    # grading, so none of the rest can be stored either.
+                    grades_version = None
+
             #Add the graded total to totaled_scores
             if graded_total.possible > 0:
                 format_scores.append(graded_total)
@@ -479,11 +582,23 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
         # so grader can be double-checked
         grade_summary['raw_scores'] = raw_scores
 
-    max_scores_cache.push_to_remote()
+    if needs_student_state and owns_max_scores_cache:
+        max_scores_cache.push_to_remote()
 
     return grade_summary
 
 
+def _is_released(section, now):
+    """
+    Return whether the section and all of the blocks graded in it have started
+    by `now`, for every student.
+    """
+    return all(
+        descriptor.start is None or descriptor.start <= now
+        for descriptor in [section['section_descriptor']] + list(section['xmoduledescriptors'])
+    )
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -775,13 +890,22 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If the ENABLE_BATCH_GRADING feature is on, students are graded in batches
+    of GRADING_BATCH_SIZE which share a single traversal of the course and load
+    their StudentModules and submissions scores together.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
-    for student in students:
+    if settings.FEATURES.get('ENABLE_BATCH_GRADING', False):
+        students_to_grade = BatchGradingContext(course).iter_students_with_grading_data(students)
+    else:
+        students_to_grade = ((student, {}) for student in students)
+
+    for student, grading_data in students_to_grade:
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
                 request = _get_mock_request(student)
@@ -790,7 +914,7 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
+                gradeset = grade(student, request, course, keep_raw_scores, **grading_data)
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -805,6 +929,145 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
                 yield student, {}, exc.message
 
 
+class BatchGradingContext(object):
+    """
+    The parts of grading that are the same for every student in a course,
+    computed once so that they can be shared by many calls to `grade`.
+
+    The course is traversed a single time to find the blocks that affect
+    grading, and the MaxScoresCache is shared. Students are then handled in
+    batches: StudentModules are loaded with a couple of queries per batch, and
+    the submissions API scores with another.
+    """
+    def __init__(self, course, batch_size=None):
+        self.course = course
+        self.batch_size = batch_size or GRADING_BATCH_SIZE
+        self.descriptors = _descriptors_affecting_grading(course)
+        self.locations = set(descriptor.location for descriptor in self.descriptors)
+        self.scorable_locations = set(
+            descriptor.location for descriptor in self.descriptors if descriptor.has_score
+        )
+        self.max_scores_cache = MaxScoresCache.create_for_course(course)
+        self.max_scores_cache.fetch_from_remote(self.scorable_locations)
+
+    def iter_students_with_grading_data(self, students):
+        """
+        Yield (student, grading_data) for each of `students`, where
+        grading_data is a dict of keyword arguments for `grade` holding the
+        student's preloaded data.
+
+        If a batch's data can't be loaded, its students are yielded with no
+        grading data, so that they are graded one by one as usual.
+        """
+        students = iter(students)
+        while True:
+            batch = list(islice(students, self.batch_size))
+            if not batch:
+                break
+            try:
+                grading_data = self._load_batch(batch)
+            except Exception:  # pylint: disable=broad-except
+                log.exception(
+                    'Cannot load grading data in bulk for course %s, grading students one at a time.',
+                    self.course.id
+                )
+                grading_data = {}
+            for student in batch:
+                yield student, grading_data.get(student.id, {})
+            self.max_scores_cache.push_to_remote()
+
+    def _load_batch(self, students):
+        """Return a dict of user id -> grading data for each of `students`."""
+        # Read before any state is loaded, see `PersistentGradesVersion`.
+        grades_versions = {}
+        if settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES', False):
+            grades_versions = PersistentGradesVersion.read_versions(
+                [student.id for student in students], self.course.id
+            )
+
+        student_modules = StudentModuleBatch(
+            self.course.id,
+            [student.id for student in students],
+            self.locations,
+            self.scorable_locations,
+        )
+        submissions_scores = _submissions_scores_for(self.course.id, students)
+
+        grading_data = {}
+        for student in students:
+            grading_data[student.id] = {
+                'field_data_cache': FieldDataCache(
+                    self.descriptors,
+                    self.course.id,
+                    student,
+                    prefetched_user_state=student_modules.user_state_for(student.id),
+                    deferred_user_state=student_modules.deferred_state_for(student.id),
+                ),
+                'scores_client': student_modules.scores_client_for(student.id),
+                'submissions_scores': submissions_scores.get(student.id, {}),
+                'max_scores_cache': self.max_scores_cache,
+                'grades_version': grades_versions.get(student.id),
+            }
+        return grading_data
+
+
+def _descriptors_affecting_grading(course):
+    """
+    Return every descriptor in `course` that might affect grading, i.e. the
+    descriptors that `field_data_cache_for_grading` would load state for.
+    """
+    descriptors = []
+    with modulestore().bulk_operations(course.id):
+        to_visit = [course]
+        while to_visit:
+            descriptor = to_visit.pop()
+            if descriptor_affects_grading(course.block_types_affecting_grading, descriptor):
+                descriptors.append(descriptor)
+            to_visit.extend(descriptor.get_children() + descriptor.get_required_module_descriptors())
+    return descriptors
+
+
+def _submissions_scores_for(course_key, students):
+    """
+    Return a dict of user id -> the scores that `submissions.api.get_scores`
+    would return for that student in the course, loaded for all of `students`
+    with a single query.
+
+    The submissions API can only fetch the scores of one student at a time, so
+    this reads its models the way `get_scores` does.
+    """
+    # Imported here for the same reason as in `_grade`.
+    from submissions.models import ScoreSummary  # installed from the edx-submissions repository
+
+    # anonymous_id_for_user only creates an AnonymousUserId row if there isn't
+    # one already, so look those up in bulk and only ask it to save the others.
+    has_anonymous_id = set(
+        AnonymousUserId.objects.filter(
+            user_id__in=[student.id for student in students],
+            course_id=course_key,
+        ).values_list('user_id', flat=True)
+    )
+    user_ids_by_anonymous_id = {
+        anonymous_id_for_user(student, course_key, save=student.id not in has_anonymous_id): student.id
+        for student in students
+    }
+
+    summaries = ScoreSummary.objects.filter(
+        student_item__course_id=course_key.to_deprecated_string(),
+        student_item__student_id__in=user_ids_by_anonymous_id.keys(),
+    ).select_related('latest', 'student_item')
+
+    scores = defaultdict(dict)
+    for summary in summaries:
+        if summary.latest.is_hidden():
+            continue
+        user_id = user_ids_by_anonymous_id[summary.student_item.student_id]
+        scores[user_id][summary.student_item.item_id] = (
+            summary.latest.points_earned, summary.latest.points_possible
+        )
+    return scores
+
+
 def _get_mock_request(student):
     """
     Make a fake request because grading code expects to be able to look at
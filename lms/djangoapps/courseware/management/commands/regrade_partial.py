@@ -8,9 +8,10 @@ import json
 import logging
 from optparse import make_option
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from courseware.models import StudentModule
+from courseware.models import PersistentSubsectionGrade, StudentModule
 from capa.correctmap import CorrectMap
 
 LOG = logging.getLogger(__name__)
@@ -135,6 +136,14 @@ class Command(BaseCommand):
 
             module.grade = correct
             module.save()
+            # No score signal is sent for this change, so the grade persisted
+            # for the subsection has to be invalidated here.
+            if settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES', False):
+                PersistentSubsectionGrade.invalidate_for_block(
+                    module.student_id,
+                    module.course_id,
+                    module.module_state_key.map_into_course(module.course_id),
+                )
             self.num_changed += 1
         else:
             # don't make the change, but log that the change would be made
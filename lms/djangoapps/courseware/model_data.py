@@ -19,6 +19,9 @@ UserStateSummaryCache: A cache for Scope.user_state_summary
 PreferencesCache: A cache for Scope.preferences
 UserInfoCache: A cache for Scope.user_info
 DjangoOrmFieldCache: A base-class for single-row-per-field caches.
+
+StudentModuleBatch: The StudentModule rows of many users in a course, loaded at
+    once, from which per-user caches can be built without further queries.
 """
 
 import json
@@ -350,11 +353,25 @@ class UserStateCache(object):
     """
     Cache for Scope.user_state xblock field data.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, prefetched_states=None, deferred_states=None):
+        """
+        Arguments:
+            user (User): The user whose state is cached.
+            course_id (CourseKey): The course the state belongs to.
+            prefetched_states (dict): If given, a dict mapping usage keys to
+                field state dicts which have already been loaded for `user`.
+                Fields are then cached from this dict rather than read from
+                the database.
+            deferred_states (set): The usage keys which have state that was
+                left out of `prefetched_states`. Their state is read from the
+                database when first accessed.
+        """
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        self._prefetched_states = prefetched_states
+        self._deferred_states = set(deferred_states or ())
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -366,6 +383,12 @@ class UserStateCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        if self._prefetched_states is not None:
+            for usage_key in _all_usage_keys(xblocks, aside_types):
+                if usage_key in self._prefetched_states:
+                    self._cache[usage_key] = self._prefetched_states[usage_key]
+            return
+
         block_field_state = self._client.get_many(
             self.user.username,
             _all_usage_keys(xblocks, aside_types),
@@ -415,6 +438,7 @@ class UserStateCache(object):
         pending_updates = defaultdict(dict)
         for kvs_key, value in kv_dict.items():
             cache_key = self._cache_key_for_kvs_key(kvs_key)
+            self._load_deferred_state(cache_key)
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
@@ -441,6 +465,7 @@ class UserStateCache(object):
         Returns: A django orm object from the cache
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._load_deferred_state(cache_key)
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
@@ -457,6 +482,7 @@ class UserStateCache(object):
         Raises: KeyError if key isn't found in the cache
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._load_deferred_state(cache_key)
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
@@ -479,6 +505,7 @@ class UserStateCache(object):
         Returns: bool
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._load_deferred_state(cache_key)
 
         return (
             cache_key in self._cache and
@@ -488,6 +515,16 @@ class UserStateCache(object):
     def __len__(self):
         return len(self._cache)
 
+    def _load_deferred_state(self, cache_key):
+        """
+        Read the state of the block `cache_key` from the database if it was deferred.
+        """
+        if cache_key not in self._deferred_states:
+            return
+        self._deferred_states.discard(cache_key)
+        for user_state in self._client.get_many(self.user.username, [cache_key]):
+            self._cache[user_state.block_key] = user_state.state
+
     def _cache_key_for_kvs_key(self, key):
         """
         Return the key used in this DjangoOrmFieldCache for the specified KeyValueStore key.
@@ -687,7 +724,8 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None,
+                 prefetched_user_state=None, deferred_user_state=None):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -700,6 +738,12 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: Ignored
         asides: The list of aside types to load, or None to prefetch no asides.
+        prefetched_user_state: A dict of usage keys to Scope.user_state field
+            dicts already loaded for `user` (see StudentModuleBatch), or None
+            to load them from the database.
+        deferred_user_state: With `prefetched_user_state`, the usage keys
+            whose Scope.user_state fields were not loaded along with it, and
+            are to be read from the database if they're accessed.
         """
         if asides is None:
             self.asides = []
@@ -714,6 +758,8 @@ class FieldDataCache(object):
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                prefetched_states=prefetched_user_state,
+                deferred_states=deferred_user_state,
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
@@ -990,6 +1036,90 @@ class ScoresClient(object):
         client.fetch_scores(fd_cache.scorable_locations)
         return client
 
+    @classmethod
+    def from_scores(cls, course_key, user_id, locations_to_scores):
+        """
+        Create a ScoresClient from scores that have already been loaded, e.g.
+        by a StudentModuleBatch.
+        """
+        client = cls(course_key, user_id)
+        client._locations_to_scores.update(locations_to_scores)  # pylint: disable=protected-access
+        client._has_fetched = True  # pylint: disable=protected-access
+        return client
+
+
+class StudentModuleBatch(object):
+    """
+    The StudentModule rows of a group of users in one course, loaded with a
+    couple of queries.
+
+    Grading many students one at a time costs at least two StudentModule
+    queries per student (one for the FieldDataCache, one for the
+    ScoresClient). A StudentModuleBatch loads the rows for all of them up front
+    and hands out per-user state and scores from memory.
+
+    Only rows of the block types that might affect grading are loaded, and
+    the state of scored blocks is left out: grading reads their score, and
+    only needs their state in the rare cases it has to instantiate them.
+    """
+    def __init__(self, course_key, user_ids, locations, scorable_locations):
+        """
+        Arguments:
+            course_key (CourseKey): The course to load state for.
+            user_ids (list of int): The users to load state for.
+            locations (set of UsageKey): The blocks whose state should be kept.
+            scorable_locations (set of UsageKey): The blocks whose scores
+                should be kept, and whose state is deferred.
+        """
+        self.course_key = course_key
+        self._states = defaultdict(dict)
+        self._deferred_states = defaultdict(set)
+        self._scores = defaultdict(dict)
+
+        student_modules = StudentModule.objects.filter(course_id=course_key, student_id__in=user_ids)
+
+        score_rows = student_modules.filter(
+            module_type__in=set(location.block_type for location in scorable_locations),
+        ).values_list('student_id', 'module_state_key', 'grade', 'max_grade')
+        for user_id, location, correct, total in score_rows.iterator():
+            # Locations in StudentModule don't necessarily have course key info
+            # attached to them (since old mongo identifiers don't include runs).
+            usage_key = UsageKey.from_string(location).map_into_course(course_key)
+            if usage_key in scorable_locations:
+                self._scores[user_id][usage_key] = ScoresClient.Score(correct, total)
+                if usage_key in locations:
+                    self._deferred_states[user_id].add(usage_key)
+
+        state_locations = set(locations) - set(scorable_locations)
+        state_rows = student_modules.filter(
+            module_type__in=set(location.block_type for location in state_locations),
+        ).values_list('student_id', 'module_state_key', 'state')
+        for user_id, location, state in state_rows.iterator():
+            usage_key = UsageKey.from_string(location).map_into_course(course_key)
+            if state and usage_key in state_locations:
+                field_state = json.loads(state)
+                # An empty dict means that the state has been deleted.
+                if field_state:
+                    self._states[user_id][usage_key] = field_state
+
+    def user_state_for(self, user_id):
+        """
+        Return a dict of usage keys to Scope.user_state field dicts for the
+        user, suitable for FieldDataCache's `prefetched_user_state`.
+        """
+        return self._states.get(user_id, {})
+
+    def deferred_state_for(self, user_id):
+        """
+        Return the usage keys of the blocks the user has state for that
+        wasn't loaded, suitable for FieldDataCache's `deferred_user_state`.
+        """
+        return self._deferred_states.get(user_id, set())
+
+    def scores_client_for(self, user_id):
+        """Return a ScoresClient for the user, populated from this batch."""
+        return ScoresClient.from_scores(self.course_key, user_id, self._scores.get(user_id, {}))
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 @donottrack(StudentModule)
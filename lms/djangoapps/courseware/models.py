@@ -18,14 +18,22 @@ import itertools
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver, Signal
 
 from model_utils.models import TimeStampedModel
-from student.models import user_by_anonymous_id
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from student.models import CourseEnrollment, user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
 from openedx.core.djangoapps.call_stack_manager import CallStackManager, CallStackMixin
+from openedx.core.djangoapps.course_groups.models import (
+    CourseCohortsSettings, CourseUserGroup, CourseUserGroupPartitionGroup
+)
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
 log = logging.getLogger(__name__)
 
@@ -306,6 +314,215 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class PersistentSubsectionGrade(TimeStampedModel):
+    """
+    The graded total a user earned on a single subsection of a course, as
+    computed by `courseware.grades.grade`.
+
+    Rows are only trusted while `course_version` matches the version of the
+    course they were computed against (see `grades.course_version_for_grading`),
+    so publishing new content implicitly invalidates every stored grade. Score
+    changes delete the row of the affected subsection, and changes to the
+    groups the user is in (which decide what content they see) delete all of
+    the user's rows in the course; deleted rows are recomputed the next time
+    the user is graded.
+
+    Every invalidation also moves the user's `PersistentGradesVersion`, which
+    `save_grade` checks so that a grade computed from state read before an
+    invalidation is never stored after it.
+    """
+    class Meta(object):
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # The subsection (sequential) these scores were aggregated over
+    usage_key = LocationKeyField(max_length=255)
+
+    # Version of the course content the grade was computed against
+    course_version = models.CharField(max_length=255, blank=True)
+
+    earned = models.FloatField()
+    possible = models.FloatField()
+
+    @classmethod
+    def read_grades(cls, user_id, course_key, course_version):
+        """
+        Return a dict mapping subsection usage keys to (earned, possible) tuples
+        for all of the grades stored for this user against `course_version`.
+        """
+        grades_qset = cls.objects.filter(
+            user_id=user_id,
+            course_id=course_key,
+            course_version=course_version,
+        )
+        # As with StudentModule, stored locations may lack run information, so
+        # we map them back into the course before handing them out.
+        return {
+            UsageKey.from_string(usage_key).map_into_course(course_key): (earned, possible)
+            for usage_key, earned, possible
+            in grades_qset.values_list('usage_key', 'earned', 'possible')
+        }
+
+    @classmethod
+    def save_grade(cls, user_id, usage_key, course_version, earned, possible, grades_version):
+        """
+        Store the graded total for a user on the subsection at `usage_key`.
+
+        `grades_version` is the user's `PersistentGradesVersion` as read before
+        the scores making up the total were loaded. If the user's grades were
+        invalidated since, the total may be stale and nothing is stored.
+
+        Returns whether the grade was stored.
+        """
+        course_key = usage_key.course_key
+        # Lock the version row, so that no invalidation can happen between
+        # checking it and storing the grade. A user who was never invalidated
+        # has no row yet, so one is made to be locked.
+        PersistentGradesVersion.objects.get_or_create(user_id=user_id, course_id=course_key)
+        current_version = PersistentGradesVersion.objects.select_for_update().get(
+            user_id=user_id,
+            course_id=course_key,
+        ).version
+        if current_version != grades_version:
+            return False
+
+        grade, created = cls.objects.get_or_create(
+            user_id=user_id,
+            course_id=course_key,
+            usage_key=usage_key,
+            defaults={
+                'course_version': course_version,
+                'earned': earned,
+                'possible': possible,
+            }
+        )
+        if not created:
+            grade.course_version = course_version
+            grade.earned = earned
+            grade.possible = possible
+            grade.save()
+        return True
+
+    @classmethod
+    def invalidate(cls, user_id, course_key, usage_key=None):
+        """
+        Delete the stored grade for the subsection at `usage_key`, or every
+        stored grade the user has in the course if `usage_key` is None.
+        """
+        PersistentGradesVersion.increment([user_id], course_key)
+        grades_qset = cls.objects.filter(user_id=user_id, course_id=course_key)
+        if usage_key is not None:
+            grades_qset = grades_qset.filter(usage_key=usage_key)
+        grades_qset.delete()
+
+    @classmethod
+    def invalidate_users(cls, user_ids, course_key):
+        """
+        Delete every stored grade that the users with ids in `user_ids` have in
+        the course.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        PersistentGradesVersion.increment(user_ids, course_key)
+        cls.objects.filter(user_id__in=user_ids, course_id=course_key).delete()
+
+    @classmethod
+    def invalidate_course(cls, course_key):
+        """
+        Delete every stored grade in the course.
+        """
+        PersistentGradesVersion.objects.filter(course_id=course_key).update(version=F('version') + 1)
+        cls.objects.filter(course_id=course_key).delete()
+
+    @classmethod
+    def invalidate_for_block(cls, user_id, course_key, block_key):
+        """
+        Delete the stored grade of the subsection containing `block_key`.
+
+        If the enclosing subsection can't be determined (e.g. the block was
+        removed from the course), all of the user's grades in the course are
+        invalidated instead.
+        """
+        store = modulestore()
+        location = block_key
+        try:
+            while location is not None and location.block_type != 'sequential':
+                location = store.get_parent_location(location)
+        except ItemNotFoundError:
+            location = None
+        cls.invalidate(user_id, course_key, location)
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} ({}) = {}/{}".format(
+            self.user_id,  # pylint: disable=no-member
+            self.usage_key,
+            self.course_version,
+            self.earned,
+            self.possible,
+        )
+
+
+class PersistentGradesVersion(models.Model):
+    """
+    A counter of the invalidations of a user's persisted subsection grades in a
+    course.
+
+    Grading reads the version before it loads any of the user's state, and
+    `PersistentSubsectionGrade.save_grade` only stores the grades computed from
+    that state while the version is unchanged.
+    """
+    class Meta(object):
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    version = models.IntegerField(default=0)
+
+    @classmethod
+    def read_versions(cls, user_ids, course_key):
+        """
+        Return a dict mapping each of `user_ids` to the user's current version
+        in the course. Users without a row are at version 0.
+        """
+        versions = dict(
+            cls.objects.filter(user_id__in=user_ids, course_id=course_key).values_list('user_id', 'version')
+        )
+        return {user_id: versions.get(user_id, 0) for user_id in user_ids}
+
+    @classmethod
+    def increment(cls, user_ids, course_key):
+        """
+        Move the version of the users with ids in `user_ids` in the course.
+
+        Users without a row get one at version 1, so that grades computed
+        against version 0 while the invalidation happens aren't stored.
+        """
+        cls.objects.filter(user_id__in=user_ids, course_id=course_key).update(version=F('version') + 1)
+        existing_user_ids = set(
+            cls.objects.filter(user_id__in=user_ids, course_id=course_key).values_list('user_id', flat=True)
+        )
+        for user_id in user_ids:
+            if user_id not in existing_user_ids:
+                grades_version, created = cls.objects.get_or_create(
+                    user_id=user_id,
+                    course_id=course_key,
+                    defaults={'version': 1},
+                )
+                if not created:
+                    # Made by a concurrent save_grade since we looked
+                    cls.objects.filter(pk=grades_version.pk).update(version=F('version') + 1)
+
+    def __unicode__(self):
+        return u"[PersistentGradesVersion] {} in {}: {}".format(
+            self.user_id,  # pylint: disable=no-member
+            self.course_id,
+            self.version,
+        )
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -402,3 +619,121 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+def _persistent_grades_enabled():
+    """Return whether subsection grades are persisted, and must be invalidated."""
+    return settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES', False)
+
+
+@receiver(SCORE_CHANGED)
+def score_changed_subsection_grade_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Consume the SCORE_CHANGED signal and invalidate the persisted grade of the
+    subsection containing the block whose score changed.
+    """
+    if not _persistent_grades_enabled():
+        return
+    course_key = CourseKey.from_string(kwargs['course_id'])
+    usage_key = UsageKey.from_string(kwargs['usage_id']).map_into_course(course_key)
+    PersistentSubsectionGrade.invalidate_for_block(kwargs['user_id'], course_key, usage_key)
+
+
+@receiver(post_delete, sender=StudentModule)
+def student_module_deleted_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted subsection grade when the state a score came from
+    is deleted (e.g. when an instructor resets a student's attempts).
+    """
+    if not _persistent_grades_enabled() or instance.grade is None:
+        return
+    usage_key = instance.module_state_key.map_into_course(instance.course_id)
+    PersistentSubsectionGrade.invalidate_for_block(
+        instance.student_id,  # pylint: disable=no-member
+        instance.course_id,
+        usage_key,
+    )
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def cohort_membership_subsection_grade_handler(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted grades of users added to or removed from a cohort,
+    as the content groups they are in, and so what they are graded on, may
+    have changed.
+    """
+    if not _persistent_grades_enabled() or action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    pk_set = kwargs['pk_set']
+    if kwargs['reverse']:
+        # `instance` is a user, and `pk_set` the groups they were added to or removed from
+        if action == 'pre_clear':
+            groups = instance.course_groups.all()
+        else:
+            groups = CourseUserGroup.objects.filter(pk__in=pk_set)
+        for course_key in set(group.course_id for group in groups):
+            PersistentSubsectionGrade.invalidate_users([instance.id], course_key)
+    else:
+        if action == 'pre_clear':
+            user_ids = instance.users.values_list('id', flat=True)
+        else:
+            user_ids = pk_set
+        PersistentSubsectionGrade.invalidate_users(user_ids, instance.course_id)
+
+
+@receiver(pre_delete, sender=CourseUserGroup)
+def cohort_deleted_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted grades of the users in a cohort that is deleted.
+    """
+    if not _persistent_grades_enabled():
+        return
+    PersistentSubsectionGrade.invalidate_users(instance.users.values_list('id', flat=True), instance.course_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(pre_delete, sender=CourseUserGroupPartitionGroup)
+def cohort_partition_group_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted grades of the users in a cohort whose content
+    group changes.
+    """
+    if not _persistent_grades_enabled():
+        return
+    cohort = instance.course_user_group
+    PersistentSubsectionGrade.invalidate_users(cohort.users.values_list('id', flat=True), cohort.course_id)
+
+
+@receiver(post_save, sender=CourseCohortsSettings)
+def cohorts_settings_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate all of the persisted grades in a course whose cohort settings
+    change, as turning cohorts on or off changes the content groups of its
+    users.
+    """
+    if not _persistent_grades_enabled():
+        return
+    PersistentSubsectionGrade.invalidate_course(instance.course_id)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def enrollment_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted grades of a user whose enrollment changes, as
+    moving to another enrollment track can change the content they see.
+    """
+    if not _persistent_grades_enabled():
+        return
+    PersistentSubsectionGrade.invalidate_users([instance.user_id], instance.course_id)
+
+
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+def course_tag_subsection_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted grades of a user whose course tags change, as
+    these hold the groups they are assigned to in random user partitions.
+    """
+    if not _persistent_grades_enabled():
+        return
+    PersistentSubsectionGrade.invalidate_users([instance.user_id], instance.course_id)
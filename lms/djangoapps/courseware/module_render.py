@@ -15,7 +15,6 @@ import dogstats_wrapper as dog_stats_api
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.context_processors import csrf
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
@@ -48,6 +47,7 @@ from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from openedx.core.djangoapps.content.course_structures.navigation import get_course_navigation_index
 from openedx.core.lib.xblock_utils import (
     replace_course_urls,
     replace_jump_to_id_urls,
@@ -75,7 +75,7 @@ from xmodule.x_module import XModuleDescriptor
 from xmodule.mixin import wrap_with_license
 from util.json_request import JsonResponse
 from util.model_utils import slugify
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from util import milestones_helpers
 from verify_student.services import ReverificationService
 
@@ -154,7 +154,7 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
             return None
 
         toc_chapters = list()
-        chapters = course_module.get_display_items()
+        chapters = _get_toc_chapters(user, course, course_module)
 
         # See if the course is gated by one or more content milestones
         required_content = milestones_helpers.get_required_content(course, user)
@@ -256,6 +256,52 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         return toc_chapters
 
 
+def _get_toc_chapters(user, course, course_module):
+    """
+    Return the chapters of the course the user has access to, whose
+    get_display_items() return the sections the user has access to.
+
+    These are read from the course's navigation index when it's enabled and up
+    to date, which saves binding a module for every chapter and section. Access
+    is then checked on the descriptors, which is equivalent as long as no field
+    overrides can apply to the user.
+    """
+    if settings.FEATURES.get('ENABLE_COURSE_NAVIGATION_INDEX') and not OverrideFieldData.has_providers_for(course):
+        course_navigation_index = get_course_navigation_index(course)
+        if course_navigation_index is not None:
+            chapters = []
+            for chapter, descriptor in _accessible_items(
+                    user, course, course_navigation_index.get_chapters(), course.get_children()
+            ):
+                chapter.sections = [
+                    section for section, __ in _accessible_items(
+                        user, course, chapter.sections, descriptor.get_children()
+                    )
+                ]
+                chapters.append(chapter)
+            return chapters
+
+    return course_module.get_display_items()
+
+
+def _accessible_items(user, course, items, descriptors):
+    """
+    Return (item, descriptor) pairs for the navigation `items` the user has
+    access to, given the `descriptors` of the same blocks.
+    """
+    descriptors = dict((descriptor.location, descriptor) for descriptor in descriptors)
+    accessible_items = []
+    for item in items:
+        descriptor = descriptors.get(item.location)
+        if descriptor is None:
+            continue
+        # Do not check access when it's a noauth request, as get_module_for_descriptor doesn't
+        if getattr(user, 'known', True) and not has_access(user, 'load', descriptor, course.id):
+            continue
+        accessible_items.append((item, descriptor))
+    return accessible_items
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -728,7 +774,7 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
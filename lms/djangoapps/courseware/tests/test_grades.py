@@ -1,6 +1,8 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+
 from django.http import Http404
 from django.test import TestCase
 from django.test.client import RequestFactory
@@ -9,10 +11,20 @@ from mock import patch, MagicMock
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
-
-from courseware.grades import field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary
+from pytz import UTC
+
+from courseware.grades import (
+    _submissions_scores_for, field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary
+)
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache, StudentModuleBatch
+from courseware.models import PersistentGradesVersion, PersistentSubsectionGrade, SCORE_CHANGED
+from courseware.tests.factories import StudentModuleFactory
+from courseware.user_state_client import DjangoXBlockUserStateClient
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from student.tests.factories import UserFactory
-from student.models import CourseEnrollment
+from student.models import anonymous_id_for_user, CourseEnrollment
+from submissions import api as sub_api
+from xblock.fields import Scope
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
@@ -169,6 +181,248 @@ class TestMaxScoresCache(ModuleStoreTestCase):
         self.assertEqual(max_scores_cache.num_cached_from_remote(), 1)
 
 
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SUBSECTION_GRADES': True})
+class TestPersistentSubsectionGrades(ModuleStoreTestCase):
+    """
+    Tests for grading against persisted subsection grades.
+    """
+    def setUp(self):
+        super(TestPersistentSubsectionGrades, self).setUp()
+        self.student = UserFactory.create()
+        self.course = CourseFactory.create(start=datetime(2015, 1, 1, tzinfo=UTC))
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        self.sequential = ItemFactory.create(
+            category='sequential', parent=chapter, graded=True, format='Homework'
+        )
+        vertical = ItemFactory.create(category='vertical', parent=self.sequential)
+        self.problem = ItemFactory.create(category='problem', parent=vertical)
+
+        CourseEnrollment.enroll(self.student, self.course.id)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _persisted_grades(self):
+        """Return the persisted subsection grades for our student."""
+        return PersistentSubsectionGrade.objects.filter(user=self.student, course_id=self.course.id)
+
+    def test_grade_persists_subsections(self):
+        grade(self.student, self.request, self.course)
+        self.assertEqual(
+            [row.usage_key for row in self._persisted_grades()],
+            [self.sequential.location],
+        )
+
+    def test_persisted_grades_skip_student_state(self):
+        first_grade = grade(self.student, self.request, self.course)
+        with patch('courseware.grades.field_data_cache_for_grading') as mock_fdc:
+            second_grade = grade(self.student, self.request, self.course)
+        self.assertFalse(mock_fdc.called)
+        self.assertEqual(first_grade['percent'], second_grade['percent'])
+
+    def test_score_change_invalidates_subsection(self):
+        grade(self.student, self.request, self.course)
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=1,
+            points_earned=1,
+            user_id=self.student.id,
+            course_id=unicode(self.course.id),
+            usage_id=unicode(self.problem.location),
+        )
+        self.assertFalse(self._persisted_grades().exists())
+
+    def test_raw_scores_are_not_persisted(self):
+        grade(self.student, self.request, self.course, keep_raw_scores=True)
+        self.assertFalse(self._persisted_grades().exists())
+
+    def test_unreleased_subsection_not_persisted(self):
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, graded=True, format='Homework',
+            start=datetime.now(UTC) + timedelta(days=1),
+        )
+        vertical = ItemFactory.create(category='vertical', parent=sequential)
+        ItemFactory.create(category='problem', parent=vertical)
+        self.course = self.store.get_course(self.course.id)
+
+        grade(self.student, self.request, self.course)
+        self.assertEqual(
+            [row.usage_key for row in self._persisted_grades()],
+            [self.sequential.location],
+        )
+
+    def test_field_overrides_not_persisted(self):
+        with patch('courseware.grades.OverrideFieldData.has_providers_for', return_value=True):
+            grade(self.student, self.request, self.course)
+        self.assertFalse(self._persisted_grades().exists())
+
+    def test_read_versions_does_not_write(self):
+        with self.assertNumQueries(1):
+            versions = PersistentGradesVersion.read_versions([self.student.id], self.course.id)
+        self.assertEqual(versions, {self.student.id: 0})
+        self.assertFalse(PersistentGradesVersion.objects.exists())
+
+    def test_invalidation_while_grading(self):
+        def invalidate_then_load(course, student):
+            """Invalidate the student's grades, as a concurrent score change would."""
+            PersistentSubsectionGrade.invalidate(student.id, course.id)
+            return field_data_cache_for_grading(course, student)
+
+        with patch('courseware.grades.field_data_cache_for_grading', side_effect=invalidate_then_load):
+            grade(self.student, self.request, self.course)
+        self.assertFalse(self._persisted_grades().exists())
+
+        grade(self.student, self.request, self.course)
+        self.assertTrue(self._persisted_grades().exists())
+
+    def test_save_grade_checks_version(self):
+        grades_version = PersistentGradesVersion.read_versions([self.student.id], self.course.id)[self.student.id]
+        PersistentSubsectionGrade.invalidate(self.student.id, self.course.id, self.sequential.location)
+        self.assertFalse(
+            PersistentSubsectionGrade.save_grade(
+                self.student.id, self.sequential.location, u'', 1.0, 1.0, grades_version
+            )
+        )
+        self.assertTrue(
+            PersistentSubsectionGrade.save_grade(
+                self.student.id, self.sequential.location, u'', 1.0, 1.0, grades_version + 1
+            )
+        )
+
+    def test_cohort_membership_invalidates_grades(self):
+        grade(self.student, self.request, self.course)
+        cohort = CohortFactory(course_id=self.course.id)
+        cohort.users.add(self.student)
+        self.assertFalse(self._persisted_grades().exists())
+
+        grade(self.student, self.request, self.course)
+        cohort.users.remove(self.student)
+        self.assertFalse(self._persisted_grades().exists())
+
+    def test_enrollment_mode_change_invalidates_grades(self):
+        grade(self.student, self.request, self.course)
+        CourseEnrollment.enroll(self.student, self.course.id, mode='verified')
+        self.assertFalse(self._persisted_grades().exists())
+
+
+class TestBatchGrading(ModuleStoreTestCase):
+    """
+    Tests for grading many students at once with ENABLE_BATCH_GRADING.
+    """
+    def setUp(self):
+        super(TestBatchGrading, self).setUp()
+        self.course = CourseFactory.create(start=datetime(2015, 1, 1, tzinfo=UTC))
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, graded=True, format='Homework'
+        )
+        vertical = ItemFactory.create(category='vertical', parent=sequential)
+        self.problems = [ItemFactory.create(category='problem', parent=vertical) for __ in xrange(2)]
+
+        self.students = [UserFactory.create() for __ in xrange(3)]
+        for student in self.students:
+            CourseEnrollment.enroll(student, self.course.id)
+        # The first student answered both problems, the second one of them,
+        # and the third none.
+        for student, answered in zip(self.students, (self.problems, self.problems[:1])):
+            for problem in answered:
+                StudentModuleFactory.create(
+                    student=student,
+                    course_id=self.course.id,
+                    module_state_key=problem.location,
+                    state='{"attempts": 1}',
+                    grade=1,
+                    max_grade=1,
+                )
+
+    def _grades(self, batch_size=None):
+        """Return a dict of student id -> (gradeset, err_msg) from iterate_grades_for."""
+        with patch('courseware.grades.GRADING_BATCH_SIZE', batch_size or 100):
+            return {
+                student.id: (gradeset, err_msg)
+                for student, gradeset, err_msg in iterate_grades_for(self.course, self.students)
+            }
+
+    def test_batch_grades_match(self):
+        expected = self._grades()
+        self.assertNotEqual(expected[self.students[0].id], expected[self.students[2].id])
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': True}):
+            self.assertEqual(self._grades(), expected)
+            self.assertEqual(self._grades(batch_size=2), expected)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': True})
+    def test_batch_loads_student_modules_once(self):
+        with patch('courseware.grades.StudentModuleBatch', wraps=StudentModuleBatch) as mock_batch:
+            with patch.object(DjangoXBlockUserStateClient, 'get_many') as mock_get_many:
+                grades = self._grades()
+        self.assertEqual(mock_batch.call_count, 1)
+        self.assertFalse(mock_get_many.called)
+        self.assertFalse([err_msg for __, err_msg in grades.values() if err_msg])
+
+    def test_batch_defers_scored_state(self):
+        student = self.students[0]
+        locations = set(problem.location for problem in self.problems)
+        batch = StudentModuleBatch(self.course.id, [student.id], locations | {self.course.location}, locations)
+        self.assertEqual(batch.user_state_for(student.id), {})
+        self.assertEqual(batch.deferred_state_for(student.id), locations)
+        self.assertEqual(batch.deferred_state_for(self.students[2].id), set())
+
+        field_data_cache = FieldDataCache(
+            self.problems,
+            self.course.id,
+            student,
+            prefetched_user_state=batch.user_state_for(student.id),
+            deferred_user_state=batch.deferred_state_for(student.id),
+        )
+        kvs = DjangoKeyValueStore(field_data_cache)
+        key = DjangoKeyValueStore.Key(Scope.user_state, student.id, self.problems[0].location, 'attempts')
+        with self.assertNumQueries(1):
+            self.assertEqual(kvs.get(key), 1)
+            self.assertEqual(kvs.get(key), 1)
+
+    def test_batch_submissions_scores(self):
+        for student in self.students[:2]:
+            submission = sub_api.create_submission(
+                {
+                    'student_id': anonymous_id_for_user(student, self.course.id),
+                    'course_id': self.course.id.to_deprecated_string(),
+                    'item_id': 'i4x://org/course/openassessment/{}'.format(student.id),
+                    'item_type': 'openassessment',
+                },
+                'answer'
+            )
+            sub_api.set_score(submission['uuid'], 3, 4)
+
+        scores = _submissions_scores_for(self.course.id, self.students)
+        for student in self.students:
+            self.assertEqual(
+                scores.get(student.id, {}),
+                sub_api.get_scores(
+                    self.course.id.to_deprecated_string(), anonymous_id_for_user(student, self.course.id)
+                )
+            )
+        self.assertEqual(scores[self.students[0].id].values(), [(3, 4)])
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': True})
+    def test_batch_persists_grades(self):
+        expected = self._grades()
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SUBSECTION_GRADES': True}):
+            self.assertEqual(self._grades(), expected)
+            self.assertEqual(
+                PersistentSubsectionGrade.objects.filter(course_id=self.course.id).count(),
+                len(self.students),
+            )
+            self.assertEqual(self._grades(), expected)
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': True})
+    def test_batch_load_failure_falls_back(self):
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': False}):
+            expected = self._grades()
+        with patch('courseware.grades.StudentModuleBatch', side_effect=Exception("boom")):
+            self.assertEqual(self._grades(), expected)
+
+
 class TestFieldDataCacheScorableLocations(ModuleStoreTestCase):
     """
     Make sure we can filter the locations we pull back student state for via
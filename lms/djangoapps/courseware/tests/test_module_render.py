@@ -50,6 +50,8 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import ItemFactory, CourseFactory, check_mongo_calls
 from xmodule.x_module import XModuleDescriptor, XModule, STUDENT_VIEW, CombinedSystem
 
+from openedx.core.djangoapps.content.course_structures.navigation import get_course_navigation_index
+from openedx.core.djangoapps.content.course_structures.tasks import update_course_structure
 from openedx.core.djangoapps.credit.models import CreditCourse
 from openedx.core.djangoapps.credit.api import (
     set_credit_requirements,
@@ -696,6 +698,29 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_toc_from_navigation_index(self, default_ms):
+        with self.store.default_store(default_ms):
+            self.setup_modulestore(default_ms, None, None)
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, 'Welcome', self.field_data_cache
+            )
+
+            update_course_structure(unicode(self.toy_course.id))
+            self.assertIsNotNone(get_course_navigation_index(self.toy_course))
+            with patch.dict('django.conf.settings.FEATURES', {'ENABLE_COURSE_NAVIGATION_INDEX': True}):
+                with patch(
+                    'courseware.module_render.get_module_for_descriptor_internal',
+                    wraps=render.get_module_for_descriptor_internal
+                ) as mock_get_module:
+                    actual = render.toc_for_course(
+                        self.request.user, self.request, self.toy_course, self.chapter, 'Welcome',
+                        self.field_data_cache
+                    )
+            self.assertEqual(actual, expected)
+            # Only the course module is bound
+            self.assertEqual(mock_get_module.call_count, 1)
+
 
 @attr('shard_1')
 @ddt.ddt
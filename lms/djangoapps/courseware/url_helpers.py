@@ -4,7 +4,9 @@ Module to define url helpers functions
 from urllib import urlencode
 from xmodule.modulestore.search import path_to_location, navigation_index
 from xmodule.modulestore.django import modulestore
+from django.conf import settings
 from django.core.urlresolvers import reverse
+from openedx.core.djangoapps.content.course_structures.navigation import get_course_navigation_index
 
 
 def get_redirect_url(course_key, usage_key):
@@ -21,10 +23,16 @@ def get_redirect_url(course_key, usage_key):
         Redirect url string
     """
 
+    course_navigation_index = None
+    if settings.FEATURES.get('ENABLE_COURSE_NAVIGATION_INDEX'):
+        course = modulestore().get_course(usage_key.course_key, depth=0)
+        if course is not None:
+            course_navigation_index = get_course_navigation_index(course)
+
     (
         course_key, chapter, section, vertical_unused,
         position, final_target_id
-    ) = path_to_location(modulestore(), usage_key)
+    ) = path_to_location(modulestore(), usage_key, course_navigation_index=course_navigation_index)
 
     # choose the appropriate view (and provide the necessary args) based on the
     # args provided by the redirect.
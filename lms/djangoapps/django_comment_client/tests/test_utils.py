@@ -8,6 +8,7 @@ from django.utils.timezone import UTC as django_utc
 
 from django.core.urlresolvers import reverse
 from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
 from edxmako import add_lookup
 
 from django_comment_client.tests.factories import RoleFactory
@@ -27,6 +28,7 @@ from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MIXED_TOY_MODULESTORE
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.locator import CourseLocator
+from request_cache.middleware import RequestCache
 from teams.tests.factories import CourseTeamFactory
 
 
@@ -286,6 +288,46 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
         self.assertTrue(utils.discussion_category_id_access(self.course, self.user, 'private_discussion_id'))
         self.assertFalse(utils.discussion_category_id_access(self.course, user, 'private_discussion_id'))
 
+    def test_map_loaded_once_per_request(self):
+        with self.assertNumQueries(1):
+            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+            utils.get_cached_discussion_key(self.course, 'test_discussion_id_2')
+
+    @override_settings(DISCUSSION_ID_MAP_CACHE_SIZE=10)
+    def test_map_cached_per_course_version(self):
+        self.addCleanup(utils.DISCUSSION_ID_MAPS.clear)
+        utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(0):
+            usage_key = utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        self.assertEqual(usage_key, self.discussion.location)
+
+    @override_settings(DISCUSSION_ID_MAP_CACHE_SIZE=10)
+    def test_outdated_map_not_cached(self):
+        self.addCleanup(utils.DISCUSSION_ID_MAPS.clear)
+        CourseStructure.objects.filter(course_id=self.course.id).update(
+            modified=datetime.datetime(2000, 1, 1, tzinfo=UTC)
+        )
+        utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(1):
+            utils.get_cached_discussion_key(self.course, 'test_discussion_id')
+
+    def test_modules_loaded_once_per_request(self):
+        discussion_ids = ['test_discussion_id', 'test_discussion_id', 'test_discussion_id_2']
+        with mock.patch.object(modulestore(), 'get_item', wraps=modulestore().get_item) as mock_get_item:
+            utils.get_cached_discussion_id_map(self.course, discussion_ids, self.user)
+            metadata = utils.get_cached_discussion_id_map(self.course, discussion_ids, self.user)
+        self.assertEqual(mock_get_item.call_count, 2)
+        self.assertEqual(set(metadata), {'test_discussion_id', 'test_discussion_id_2'})
+
+    def test_accessible_modules_reused(self):
+        utils.get_accessible_discussion_modules(self.course, self.user)
+        with mock.patch.object(modulestore(), 'get_item') as mock_get_item:
+            metadata = utils.get_cached_discussion_id_map(self.course, ['test_discussion_id'], self.user)
+        self.assertFalse(mock_get_item.called)
+        self.assertEqual(metadata['test_discussion_id']['location'], self.discussion.location)
+
 
 class CategoryMapTestMixin(object):
     """
@@ -1,7 +1,8 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from datetime import datetime
 import json
 import logging
+import threading
 from django.conf import settings
 
 import pytz
@@ -20,6 +21,7 @@ from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, has_permission, get_team
 from django_comment_client.settings import MAX_COMMENT_DEPTH
 from edxmako import lookup_template
+from request_cache import get_cache
 
 from courseware import courses
 from courseware.access import has_access
@@ -124,17 +126,39 @@ def has_required_keys(module):
     return True
 
 
+def _loaded_discussion_modules(course):
+    """
+    Returns the dict of the discussion modules of `course` loaded during this
+    request, by location.
+    """
+    return get_cache('django_comment_client.discussion_modules').setdefault(
+        (course.id, course.subtree_edited_on), {}
+    )
+
+
+def _can_load_discussion_module(course, user, module):
+    """
+    Returns whether `module` has the keys of the discussion id map and `user`
+    can load it. Access is checked once per user and module in each request.
+    """
+    access_cache = get_cache('django_comment_client.discussion_module_access')
+    cache_key = (getattr(user, 'id', None), module.location)
+    if cache_key not in access_cache:
+        access_cache[cache_key] = has_required_keys(module) and bool(has_access(user, 'load', module, course.id))
+    return access_cache[cache_key]
+
+
 def get_accessible_discussion_modules(course, user, include_all=False):  # pylint: disable=invalid-name
     """
     Return a list of all valid discussion modules in this course that
     are accessible to the given user.
     """
     all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
+    _loaded_discussion_modules(course).update((module.location, module) for module in all_modules)
 
-    return [
-        module for module in all_modules
-        if has_required_keys(module) and (include_all or has_access(user, 'load', module, course.id))
-    ]
+    if include_all:
+        return [module for module in all_modules if has_required_keys(module)]
+    return [module for module in all_modules if _can_load_discussion_module(course, user, module)]
 
 
 def get_discussion_id_map_entry(module):
@@ -155,19 +179,115 @@ class DiscussionIdMapIsNotCached(Exception):
     pass
 
 
+class DiscussionIdMapCache(object):
+    """
+    A process-local LRU cache of the discussion id maps of course versions,
+    holding at most DISCUSSION_ID_MAP_CACHE_SIZE of them.
+
+    The map of a version of a course never changes, so entries are only
+    evicted to make room. The maps are shared by all requests of the process,
+    and must not be modified.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, course_key, course_version):
+        """
+        Returns the discussion id map of the version of the course, or None if it isn't cached.
+        """
+        with self._lock:
+            discussion_id_map = self._entries.pop((course_key, course_version), None)
+            if discussion_id_map is not None:
+                # Re-insert to mark as most recently used
+                self._entries[(course_key, course_version)] = discussion_id_map
+            return discussion_id_map
+
+    def set(self, course_key, course_version, discussion_id_map):
+        """
+        Stores the discussion id map of the version of the course.
+        """
+        max_entries = getattr(settings, 'DISCUSSION_ID_MAP_CACHE_SIZE', 0)
+        if not max_entries:
+            return
+        with self._lock:
+            self._entries.pop((course_key, course_version), None)
+            self._entries[(course_key, course_version)] = discussion_id_map
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+DISCUSSION_ID_MAPS = DiscussionIdMapCache()
+
+
+def _load_discussion_id_map(course):
+    """
+    Returns the discussion id map of `course` stored with its CourseStructure, or None if there is none.
+    """
+    try:
+        structure = CourseStructure.objects.only('course_id', 'modified', 'discussion_id_map_json').get(
+            course_id=course.id
+        )
+    except CourseStructure.DoesNotExist:
+        return None
+
+    discussion_id_map = structure.discussion_id_map
+    # The map is only regenerated after the course is published, so a map saved
+    # before this version of the course may be outdated, and is only used for
+    # this request.
+    if discussion_id_map and (course.subtree_edited_on is None or structure.modified >= course.subtree_edited_on):
+        DISCUSSION_ID_MAPS.set(course.id, course.subtree_edited_on, discussion_id_map)
+    return discussion_id_map
+
+
+def get_cached_discussion_id_map_keys(course):  # pylint: disable=invalid-name
+    """
+    Returns the mapping of discussion ids to usage keys of the discussion modules of `course`, which is loaded once
+    per request, and kept by the process for each version of the course. If the discussion id map is not cached for
+    course, raises a DiscussionIdMapIsNotCached exception.
+    """
+    request_cache = get_cache('django_comment_client.discussion_id_maps')
+    cache_key = (course.id, course.subtree_edited_on)
+    if cache_key not in request_cache:
+        discussion_id_map = DISCUSSION_ID_MAPS.get(course.id, course.subtree_edited_on)
+        if discussion_id_map is None:
+            discussion_id_map = _load_discussion_id_map(course)
+        request_cache[cache_key] = discussion_id_map
+
+    if not request_cache[cache_key]:
+        raise DiscussionIdMapIsNotCached()
+    return request_cache[cache_key]
+
+
 def get_cached_discussion_key(course, discussion_id):
     """
     Returns the usage key of the discussion module associated with discussion_id if it is cached. If the discussion id
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        cached_mapping = CourseStructure.objects.get(course_id=course.id).discussion_id_map
-        if not cached_mapping:
-            raise DiscussionIdMapIsNotCached()
-        return cached_mapping.get(discussion_id)
-    except CourseStructure.DoesNotExist:
-        raise DiscussionIdMapIsNotCached()
+    return get_cached_discussion_id_map_keys(course).get(discussion_id)
+
+
+def get_discussion_modules(course, usage_keys):
+    """
+    Returns the discussion modules of `course` with the given usage keys, loading those that weren't loaded yet in
+    this request together.
+    """
+    loaded_modules = _loaded_discussion_modules(course)
+    missing_keys = [usage_key for usage_key in usage_keys if usage_key not in loaded_modules]
+    if missing_keys:
+        store = modulestore()
+        with store.bulk_operations(course.id):
+            for usage_key in missing_keys:
+                loaded_modules[usage_key] = store.get_item(usage_key)
+    return [loaded_modules[usage_key] for usage_key in usage_keys]
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -176,19 +296,19 @@ def get_cached_discussion_id_map(course, discussion_ids, user):
     user. If not, returns the result of get_discussion_id_map
     """
     try:
-        entries = []
-        for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course, discussion_id)
-            if not key:
-                continue
-            module = modulestore().get_item(key)
-            if not (has_required_keys(module) and has_access(user, 'load', module, course.id)):
-                continue
-            entries.append(get_discussion_id_map_entry(module))
-        return dict(entries)
+        discussion_id_map = get_cached_discussion_id_map_keys(course)
     except DiscussionIdMapIsNotCached:
         return get_discussion_id_map(course, user)
 
+    # Threads of the same discussion share their module
+    usage_keys = set(
+        discussion_id_map[discussion_id] for discussion_id in discussion_ids if discussion_id in discussion_id_map
+    )
+    return dict(
+        get_discussion_id_map_entry(module) for module in get_discussion_modules(course, list(usage_keys))
+        if _can_load_discussion_module(course, user, module)
+    )
+
 
 def get_discussion_id_map(course, user):
     """
@@ -398,8 +518,8 @@ def discussion_category_id_access(course, user, discussion_id):
         key = get_cached_discussion_key(course, discussion_id)
         if not key:
             return False
-        module = modulestore().get_item(key)
-        return has_required_keys(module) and has_access(user, 'load', module, course.id)
+        module, = get_discussion_modules(course, [key])
+        return _can_load_discussion_module(course, user, module)
     except DiscussionIdMapIsNotCached:
         return discussion_id in get_discussion_categories_ids(course, user)
 
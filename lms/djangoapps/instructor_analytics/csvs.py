@@ -64,19 +64,24 @@ def format_dictlist(dictlist, features):
     }
     """
 
-    def dict_to_entry(dct):
-        """ Convert dictionary to a list for a csv row """
-        relevant_items = [(k, v) for (k, v) in dct.items() if k in features]
-        ordered = sorted(relevant_items, key=lambda (k, v): header.index(k))
-        vals = [v for (_, v) in ordered]
-        return vals
-
     header = features
-    datarows = map(dict_to_entry, dictlist)
+    datarows = [format_dictlist_row(dct, features) for dct in dictlist]
 
     return header, datarows
 
 
+def format_dictlist_row(dct, features):
+    """
+    Convert a single dictionary to a csv row ordered like `features`.
+
+    This is the per-row half of `format_dictlist`, for callers that stream
+    rows rather than building the whole list up front.
+    """
+    relevant_items = [(k, v) for (k, v) in dct.items() if k in features]
+    ordered = sorted(relevant_items, key=lambda (k, v): features.index(k))
+    return [v for (_, v) in ordered]
+
+
 def format_instances(instances, features):
     """
     Convert a list of instances into a header list and datarows list.
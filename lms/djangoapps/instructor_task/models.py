@@ -19,6 +19,8 @@ import csv
 import json
 import hashlib
 import os.path
+import shutil
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,9 +195,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows` accepts any iterable of rows, including generators,
+    and writes them out incrementally, so callers never need to hold a whole
+    report in memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -218,6 +220,62 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, rows):
+        """
+        Given an iterable of `rows` read back from a CSV file, return the rows
+        with their utf-8 encoded strings decoded to unicode.
+        """
+        for row in rows:
+            yield [item.decode('utf-8') for item in row]
+
+    def partial_rows(self, course_id, report_id, prefix):
+        """
+        Yield the rows of every partial CSV stored under `report_id` whose
+        name starts with `prefix`, in the order of their names.
+        """
+        for part_name in sorted(self.partial_names(course_id, report_id)):
+            if part_name.startswith(prefix):
+                for row in self.read_partial_rows(course_id, report_id, part_name):
+                    yield row
+
+
+class S3MultipartUploadFile(object):
+    """
+    A write-only file-like object that sends what is written to it to S3 as the
+    parts of a boto `MultiPartUpload`, so that large files never have to be held
+    in memory in their entirety.
+    """
+    # S3 rejects parts smaller than 5MB, except for the last one.
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, multipart_upload):
+        self.multipart_upload = multipart_upload
+        self.buffer = StringIO()
+        self.num_parts = 0
+
+    def write(self, data):
+        """Buffer `data`, sending it to S3 once a whole part is available."""
+        self.buffer.write(data)
+        if self.buffer.tell() >= self.MIN_PART_SIZE:
+            self._upload_part()
+
+    def flush(self):
+        """Parts are only sent once large enough, so there's nothing to do."""
+        pass
+
+    def close(self):
+        """Send whatever remains as the last part and complete the upload."""
+        if self.buffer.tell() > 0 or self.num_parts == 0:
+            self._upload_part()
+        self.multipart_upload.complete_upload()
+
+    def _upload_part(self):
+        """Send the buffered data as the next part of the upload."""
+        self.num_parts += 1
+        self.buffer.seek(0)
+        self.multipart_upload.upload_part_from_file(self.buffer, self.num_parts)
+        self.buffer = StringIO()
+
 
 class S3ReportStore(ReportStore):
     """
@@ -313,19 +371,88 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file to S3.
+
+        `rows` may be a generator: the compressed csv is sent to S3 as the parts
+        of a multipart upload as it is produced, so only about one part's worth
+        of data is held in memory at a time. The file only becomes visible once
+        the upload is completed.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
+        key = self.key_for(course_id, filename)
+        multipart_upload = self.bucket.initiate_multipart_upload(
+            key.key,
+            headers={
+                "Content-Encoding": 'gzip',
+                "Content-Type": 'text/csv',
+            }
+        )
+        try:
+            upload_file = S3MultipartUploadFile(multipart_upload)
+            gzip_file = GzipFile(fileobj=upload_file, mode="wb")
+            csvwriter = csv.writer(gzip_file)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            gzip_file.close()
+            upload_file.close()
+        except Exception:
+            multipart_upload.cancel_upload()
+            raise
+
+    def partial_key_for(self, course_id, report_id, part_name):
+        """
+        Return the S3 key used for the partial CSV `part_name` of the report
+        identified by `report_id`. Partials are kept outside of the course's
+        directory so that they are never listed by `links_for`.
+        """
+        hashed_course_id = hashlib.sha1(course_id.to_deprecated_string())
+
+        key = Key(self.bucket)
+        key.key = "{}/{}.partials/{}/{}".format(
+            self.root_path,
+            hashed_course_id.hexdigest(),
+            report_id,
+            part_name
+        )
+
+        return key
+
+    def store_partial_rows(self, course_id, report_id, part_name, rows):
+        """
+        Store `rows` as a gzip'd csv file that will later be merged into the
+        report identified by `report_id`.
+        """
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
         csvwriter.writerows(self._get_utf8_encoded_rows(rows))
         gzip_file.close()
 
-        self.store(course_id, filename, output_buffer)
+        data = output_buffer.getvalue()
+        self.partial_key_for(course_id, report_id, part_name).set_contents_from_string(
+            data,
+            headers={
+                "Content-Length": len(data),
+                "Content-Type": 'application/gzip',
+            }
+        )
+
+    def partial_names(self, course_id, report_id):
+        """Return the names of all partial CSVs stored under `report_id`."""
+        partials_dir = self.partial_key_for(course_id, report_id, '')
+        return [key.key.split("/")[-1] for key in self.bucket.list(prefix=partials_dir.key)]
+
+    def read_partial_rows(self, course_id, report_id, part_name):
+        """Return an iterator over the rows of a partial CSV."""
+        data = self.partial_key_for(course_id, report_id, part_name).get_contents_as_string()
+        gzip_file = GzipFile(fileobj=StringIO(data), mode="rb")
+        return self._get_utf8_decoded_rows(csv.reader(gzip_file))
+
+    def delete_partials(self, course_id, report_id):
+        """Delete all partial CSVs stored under `report_id`."""
+        partials_dir = self.partial_key_for(course_id, report_id, '')
+        self.bucket.delete_keys([key.key for key in self.bucket.list(prefix=partials_dir.key)])
 
     def links_for(self, course_id):
         """
@@ -394,13 +521,74 @@ class LocalFSReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out. `rows` may be a generator.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        # Write rows out as they are produced to a temporary file outside of
+        # the course's directory, and only move it into place once complete.
+        temp_file = tempfile.NamedTemporaryFile(dir=self.root_path, suffix='.csv.tmp', delete=False)
+        try:
+            with temp_file:
+                csvwriter = csv.writer(temp_file)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            # Temporary files are only readable by their owner, give the report
+            # the permissions `open` would have
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_file.name, 0666 & ~umask)
+            os.rename(temp_file.name, full_path)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+
+    def partial_path_to(self, course_id, report_id, part_name):
+        """
+        Return the full path to the partial CSV `part_name` of the report
+        identified by `report_id`. Partials are kept outside of the course's
+        directory so that they are never listed by `links_for`.
+        """
+        return os.path.join(
+            self.root_path,
+            urllib.quote(course_id.to_deprecated_string(), safe='') + '.partials',
+            report_id,
+            part_name
+        )
+
+    def store_partial_rows(self, course_id, report_id, part_name, rows):
+        """
+        Write `rows` to a partial CSV that will later be merged into the report
+        identified by `report_id`.
+        """
+        full_path = self.partial_path_to(course_id, report_id, part_name)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
 
-        self.store(course_id, filename, output_buffer)
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+
+    def partial_names(self, course_id, report_id):
+        """Return the names of all partial CSVs stored under `report_id`."""
+        partials_dir = self.partial_path_to(course_id, report_id, '')
+        if not os.path.exists(partials_dir):
+            return []
+        return os.listdir(partials_dir)
+
+    def read_partial_rows(self, course_id, report_id, part_name):
+        """Yield the rows of a partial CSV."""
+        with open(self.partial_path_to(course_id, report_id, part_name), "rb") as f:
+            for row in self._get_utf8_decoded_rows(csv.reader(f)):
+                yield row
+
+    def delete_partials(self, course_id, report_id):
+        """Delete all partial CSVs stored under `report_id`."""
+        partials_dir = self.partial_path_to(course_id, report_id, '')
+        if os.path.exists(partials_dir):
+            shutil.rmtree(partials_dir)
 
     def links_for(self, course_id):
         """
@@ -36,6 +36,8 @@ from instructor_task.tasks_helper import (
     delete_problem_module_state,
     upload_problem_responses_csv,
     upload_grades_csv,
+    upload_grades_csv_chunk,
+    queue_grade_report_subtasks,
     upload_problem_grade_report,
     upload_students_csv,
     cohort_students_and_upload,
@@ -170,10 +172,25 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    if settings.FEATURES.get('ENABLE_SHARDED_GRADE_REPORTS'):
+        task_fn = partial(queue_grade_report_subtasks, xmodule_instance_args, calculate_grades_csv_chunk)
+    else:
+        task_fn = partial(upload_grades_csv, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, xmodule_instance_args, user_ids, subtask_status_dict):
+    """
+    Grade a chunk of the students of a sharded grade report.
+
+    Queued by `calculate_grades_csv` when ENABLE_SHARDED_GRADE_REPORTS is on.
+    Status is reported on the parent InstructorTask `entry_id` rather than
+    through BaseInstructorTask, as for the bulk email subtasks.
+    """
+    return upload_grades_csv_chunk(entry_id, xmodule_instance_args, user_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
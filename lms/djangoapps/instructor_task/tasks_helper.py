@@ -5,6 +5,7 @@ running state of a course.
 """
 import json
 import re
+import traceback
 from collections import OrderedDict
 from datetime import datetime
 from django.conf import settings
@@ -17,6 +18,7 @@ import logging
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 from django.db.models import Q
@@ -48,13 +50,20 @@ from courseware.models import StudentModule
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import (
-    enrolled_students_features,
+    iter_enrolled_students_features,
     get_proctored_exam_results,
     list_may_enroll,
     list_problem_responses
 )
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.csvs import format_dictlist, format_dictlist_row
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -79,6 +88,9 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# Header row of the errors CSV written alongside a grade report.
+GRADE_REPORT_ERR_HEADER = [["id", "username", "error_msg"]]
+
 
 class BaseInstructorTask(Task):
     """
@@ -606,6 +618,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This may be any iterable of rows. Generators are consumed as the
+            CSV is written, so rows never need to be held in memory at once.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -652,35 +666,18 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def _grade_report_rows(course, students, task_progress, task_info_string, action_name, err_rows, status_interval=None):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
+    Grade `students` in `course`, yielding the rows of a grade report for them.
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
-    """
-    start_time = time()
-    start_date = datetime.now(UTC)
-    status_interval = 100
-    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    The first row yielded is a header row, unless no student could be graded,
+    in which case nothing is yielded. A row (without header) is appended to
+    `err_rows` for each student that could not be graded.
 
-    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
-    task_info_string = fmt.format(
-        task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
-        entry_id=_entry_id,
-        course_id=course_id,
-        task_input=_task_input
-    )
-    TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
-
-    course = get_course_by_id(course_id)
+    `task_progress` is updated as students are graded, and if `status_interval`
+    is given the current task's state is updated every `status_interval` students.
+    """
+    course_id = course.id
     course_is_cohorted = is_course_cohorted(course.id)
     teams_enabled = course.teams_enabled
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
@@ -693,13 +690,11 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
+    # Loop over all our students, yielding a row for each as they are graded
     header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
@@ -707,11 +702,11 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         action_name,
         current_step,
 
-        total_enrolled_students
+        total_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course, students):
         # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
+        if status_interval and task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
         task_progress.attempted += 1
 
@@ -724,7 +719,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             action_name,
             current_step,
             student_counter,
-            total_enrolled_students
+            total_students
         )
 
         if gradeset:
@@ -732,7 +727,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.succeeded += 1
             if not header:
                 header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
+                yield (
                     ["id", "email", "username", "grade"] + header + cohorts_header +
                     group_configs_header + teams_header +
                     ['Enrollment Track', 'Verification Status'] + certificate_info_header
@@ -782,7 +777,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
+            yield (
                 [student.id, student.email, student.username, gradeset['percent']] +
                 row_percents + cohorts_group_name + group_configs_group_names + team_name +
                 [enrollment_mode] + [verification_status] + certificate_info
@@ -798,26 +793,230 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         action_name,
         current_step,
         student_counter,
-        total_enrolled_students
+        total_students
+    )
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
+    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
+    that are visible in ReportStore will be complete ones.
+
+    Rows are generated as students are graded and streamed to the
+    `ReportStore`, so the report is never held in memory as a whole.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    status_interval = 100
+    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
+    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
+    task_info_string = fmt.format(
+        task_id=_xmodule_instance_args.get('task_id') if _xmodule_instance_args is not None else None,
+        entry_id=_entry_id,
+        course_id=course_id,
+        task_input=_task_input
+    )
+    TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
+
+    course = get_course_by_id(course_id)
+    err_rows = []
+    rows = _grade_report_rows(
+        course, enrolled_students, task_progress, task_info_string, action_name, err_rows, status_interval
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
+    # Students are graded as the rows are consumed by the upload.
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if err_rows:
+        upload_csv_to_report_store(GRADE_REPORT_ERR_HEADER + err_rows, 'grade_report_err', course_id, start_date)
 
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def queue_grade_report_subtasks(
+        xmodule_instance_args, create_chunk_subtask, entry_id, course_id, _task_input, action_name
+):
+    """
+    Split the grade report of `course_id` into subtasks that each grade a chunk
+    of no more than settings.GRADE_REPORT_STUDENTS_PER_TASK enrolled students,
+    and queue them.
+
+    `create_chunk_subtask` is the celery task that grades a chunk; it's called
+    with the arguments of `upload_grades_csv_chunk`. Each subtask stores its
+    rows as partial CSVs in the `ReportStore`, and the subtask that completes
+    last merges them into the final report (see `merge_grade_report_partials`).
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk email, if subtasks have already been defined this task has
+    # been requeued by Celery, and the subtasks that were queued the first time
+    # around are still doing the work.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued its grade report subtasks: %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    # Ordering by id keeps the merged report in the same order as partials are named.
+    enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id).order_by('id')
+
+    # Without students there would be no subtask to merge the report, and
+    # complete the task: write the (empty) report right away, as the unsharded report does.
+    if not enrolled_students.exists():
+        return upload_grades_csv(xmodule_instance_args, entry_id, course_id, _task_input, action_name)
+
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the given list of students."""
+        return create_chunk_subtask.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADE_REPORT_STUDENTS_PER_TASK,
+        enrolled_students.count(),
+    )
+
+
+def upload_grades_csv_chunk(entry_id, xmodule_instance_args, user_ids, subtask_status_dict):
+    """
+    Grade the students with ids `user_ids` for the course of the InstructorTask
+    `entry_id`, and store the resulting rows as partial CSVs of its grade report.
+
+    Progress is recorded on the parent InstructorTask via `update_subtask_status`.
+    Once every subtask has completed, the partials are merged into the final
+    grade report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+
+    # Make sure this chunk is known to the parent task and hasn't already been
+    # completed by another worker (e.g. if it was redelivered after a restart).
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    # Partials are named by the first student they contain, so that merging
+    # them in name order preserves the order students were chunked in.
+    part_name = u"{:012d}.csv".format(min(user_ids)) if user_ids else u"empty.csv"
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Subtask: {subtask_id}, Course: {course_id}'
+    task_info_string = fmt.format(
+        task_id=entry.task_id,
+        entry_id=entry_id,
+        subtask_id=current_task_id,
+        course_id=course_id,
+    )
+    task_progress = TaskProgress(json.loads(entry.task_output).get('action_name'), len(user_ids), time())
+
+    try:
+        course = get_course_by_id(course_id)
+        students = User.objects.filter(id__in=user_ids).order_by('id')
+        err_rows = []
+        rows = _grade_report_rows(
+            course, students, task_progress, task_info_string, task_progress.action_name, err_rows
+        )
+        report_store.store_partial_rows(course_id, entry.task_id, u"grades_" + part_name, rows)
+        report_store.store_partial_rows(course_id, entry.task_id, u"errors_" + part_name, err_rows)
+    except Exception as exc:
+        TASK_LOG.exception(u"%s, Grade report subtask failed unexpectedly", task_info_string)
+        # Record every student of this chunk as an error, so that they show up
+        # in the merged error report rather than silently going missing.
+        report_store.store_partial_rows(course_id, entry.task_id, u"grades_" + part_name, [])
+        report_store.store_partial_rows(
+            course_id,
+            entry.task_id,
+            u"errors_" + part_name,
+            [[user.id, user.username, exc.message] for user in User.objects.filter(id__in=user_ids)]
+        )
+        subtask_status.increment(failed=len(user_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        merge_grade_report_partials(entry_id)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    merge_grade_report_partials(entry_id)
+    return subtask_status.to_dict()
+
+
+def merge_grade_report_partials(entry_id):
+    """
+    Merge the partial CSVs written by the grade report subtasks of InstructorTask
+    `entry_id` into the final grade report, if every subtask has completed.
+
+    Only one caller gets to perform the merge, even if several subtasks
+    complete at the same time. If the merge fails, the InstructorTask is
+    marked as failed and the merge lock is released.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if entry.task_state != SUCCESS:
+        return
+    lock_key = u"grade-report-merge-{}".format(entry_id)
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    course_id = entry.course_id
+    start_date = entry.created or datetime.now(UTC)
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    TASK_LOG.info(u"InstructorTask ID: %s, Course: %s, Merging grade report partials", entry_id, course_id)
+
+    def merged_rows():
+        """Yield the rows of all partials, keeping only the first header row."""
+        seen_header = False
+        for row in report_store.partial_rows(course_id, entry.task_id, u"grades_"):
+            if row[0] == u"id":
+                if seen_header:
+                    continue
+                seen_header = True
+            yield row
+
+    try:
+        upload_csv_to_report_store(merged_rows(), 'grade_report', course_id, start_date)
+
+        err_rows = report_store.partial_rows(course_id, entry.task_id, u"errors_")
+        first_err_row = next(err_rows, None)
+        if first_err_row is not None:
+            upload_csv_to_report_store(
+                chain(GRADE_REPORT_ERR_HEADER, [first_err_row], err_rows), 'grade_report_err', course_id, start_date
+            )
+    except Exception as exc:
+        TASK_LOG.exception(
+            u"InstructorTask ID: %s, Course: %s, Merging grade report partials failed", entry_id, course_id
+        )
+        cache.delete(lock_key)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+        report_store.delete_partials(course_id, entry.task_id)
+        raise
+
+    report_store.delete_partials(course_id, entry.task_id)
+
+
 def _order_problems(blocks):
     """
     Sort the problems by the assignment type and assignment that it belongs to.
@@ -927,48 +1126,53 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
-    # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
     error_rows = [list(header_row.values()) + ['error_msg']]
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
+    def grade_rows():
+        """Grade each student in turn, yielding a row for each successfully graded one."""
+        for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+            student_fields = [getattr(student, field_name) for field_name in header_row]
+            task_progress.attempted += 1
 
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                error_rows.append(student_fields + [err_msg])
+                task_progress.failed += 1
+                continue
 
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
+            yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+
+    # Rows are streamed to the report store as students are graded, but we
+    # only upload if at least one student is successfully graded, so look
+    # ahead for the first row before starting the upload.
+    rows = grade_rows()
+    first_row = next(rows, None)
+    if first_row is not None:
+        header = list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
+        upload_csv_to_report_store(chain([header, first_row], rows), 'problem_grade_report', course_id, start_date)
     # If there are any error rows, write them out as well
     if len(error_rows) > 1:
         upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
@@ -992,20 +1196,21 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
 
     # compute the student features table and format it
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
 
-    rows.insert(0, header)
+    def student_rows():
+        """Yield the header, then a row for each enrolled student as it is fetched."""
+        yield query_features
+        for student_dict in iter_enrolled_students_features(course_id, query_features):
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            yield format_dictlist_row(student_dict, query_features)
 
-    current_step = {'step': 'Uploading CSV'}
-    task_progress.update_task_state(extra_meta=current_step)
+    # Perform the upload, computing the rows as they are written
+    upload_csv_to_report_store(student_rows(), 'student_profile_info', course_id, start_date)
 
-    # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    task_progress.skipped = task_progress.total - task_progress.attempted
 
+    current_step = {'step': 'Uploading CSV'}
     return task_progress.update_task_state(extra_meta=current_step)
 
 
@@ -1030,13 +1235,10 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
+    # Loop over all our students, yielding CSV rows as they are computed
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
     total_students = students_in_course.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
         task_info_string,
@@ -1045,85 +1247,91 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def enrollment_rows():
+        """Yield the display header, then one row per student in the course."""
+        header = None
+        student_counter = 0
+        for student in students_in_course.iterator():
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
 
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
+
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+            task_progress.succeeded += 1
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
+    # Perform the actual upload, computing the rows as they are written
+    upload_csv_to_report_store(
+        enrollment_rows(), 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS'
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
@@ -1359,13 +1567,25 @@ def generate_students_certificates(
     task_progress.update_task_state(extra_meta=current_step)
 
     course = modulestore().get_course(course_id, depth=0)
+    if settings.FEATURES.get('ENABLE_BATCH_GRADING', False):
+        # Grade the students together, so that batch grading can share its
+        # work across them. Students who couldn't be graded here are graded
+        # again (and fail as before) by the certificate request itself.
+        students_with_grades = (
+            (student, None if err_msg else gradeset)
+            for student, gradeset, err_msg in iterate_grades_for(course, students_require_certs)
+        )
+    else:
+        students_with_grades = ((student, None) for student in students_require_certs)
+
     # Generate certificate for each student
-    for student in students_require_certs:
+    for student, grade_summary in students_with_grades:
         task_progress.attempted += 1
         status = generate_user_certificates(
             student,
             course_id,
-            course=course
+            course=course,
+            grade_summary=grade_summary
         )
 
         if status in [CertificateStatuses.generating, CertificateStatuses.downloadable]:
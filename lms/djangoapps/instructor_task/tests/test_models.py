@@ -4,11 +4,13 @@ Tests for instructor_task/models.py.
 
 from cStringIO import StringIO
 import mock
+import os
+import stat
 import time
 from datetime import datetime
 from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from instructor_task.models import LocalFSReportStore, S3MultipartUploadFile, S3ReportStore
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -93,6 +95,59 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows can be streamed from a generator, and that nothing but
+        the finished file is left behind in the store.
+        """
+        report_store = self.create_report_store()
+
+        def rows():
+            """ Yield the rows of a small report. """
+            yield ['id', 'username']
+            for i in xrange(3):
+                yield [i, u'user\u00e9{}'.format(i)]
+
+        report_store.store_rows(self.course_id, 'streamed.csv', rows())
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['streamed.csv'])
+        with open(report_store.path_to(self.course_id, 'streamed.csv')) as csv_file:
+            self.assertEqual(
+                csv_file.read(),
+                'id,username\r\n0,user\xc3\xa90\r\n1,user\xc3\xa91\r\n2,user\xc3\xa92\r\n'
+            )
+        self.assertFalse([name for name in os.listdir(report_store.root_path) if name.endswith('.tmp')])
+
+    def test_store_rows_permissions(self):
+        """
+        Test that reports streamed through a temporary file get the same
+        permissions as any other file created under the current umask.
+        """
+        report_store = self.create_report_store()
+        original_umask = os.umask(0022)
+        self.addCleanup(os.umask, original_umask)
+
+        report_store.store_rows(self.course_id, 'streamed.csv', [['id']])
+
+        mode = os.stat(report_store.path_to(self.course_id, 'streamed.csv')).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0644)
+
+    def test_store_rows_failure(self):
+        """
+        Test that a report whose rows fail part way through is not published.
+        """
+        report_store = self.create_report_store()
+
+        def rows():
+            """ Yield a row, then fail. """
+            yield ['id']
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'broken.csv', rows())
+        self.assertEqual(report_store.links_for(self.course_id), [])
+        self.assertFalse([name for name in os.listdir(report_store.root_path) if name.endswith('.tmp')])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +160,32 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+
+class S3MultipartUploadFileTestCase(TestCase):
+    """
+    Test the S3MultipartUploadFile used to stream reports to S3.
+    """
+    def setUp(self):
+        super(S3MultipartUploadFileTestCase, self).setUp()
+        self.multipart_upload = mock.Mock()
+        self.parts = []
+        self.multipart_upload.upload_part_from_file.side_effect = (
+            lambda fp, part_num: self.parts.append((part_num, fp.read()))
+        )
+
+    @mock.patch.object(S3MultipartUploadFile, 'MIN_PART_SIZE', 4)
+    def test_parts(self):
+        upload_file = S3MultipartUploadFile(self.multipart_upload)
+        for data in ('ab', 'cd', 'efghi', 'j'):
+            upload_file.write(data)
+        self.assertFalse(self.multipart_upload.complete_upload.called)
+        upload_file.close()
+        self.assertEqual(self.parts, [(1, 'abcd'), (2, 'efghi'), (3, 'j')])
+        self.multipart_upload.complete_upload.assert_called_once_with()
+
+    def test_empty_file(self):
+        upload_file = S3MultipartUploadFile(self.multipart_upload)
+        upload_file.close()
+        self.assertEqual(self.parts, [(1, '')])
+        self.multipart_upload.complete_upload.assert_called_once_with()
@@ -7,10 +7,14 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
+from celery.states import SUCCESS, FAILURE
 from mock import Mock, patch
 import tempfile
+from uuid import uuid4
 from openedx.core.djangoapps.course_groups import cohorts
 import unicodecsv
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 
@@ -31,11 +35,14 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
     upload_problem_responses_csv,
     upload_grades_csv,
+    upload_grades_csv_chunk,
+    queue_grade_report_subtasks,
     upload_problem_grade_report,
     upload_students_csv,
     upload_may_enroll_csv,
@@ -108,6 +115,88 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    def test_sharded_grade_report(self):
+        """
+        Test that grading students in chunks yields a single merged report.
+        """
+        for i in range(5):
+            self.create_student('student{0}'.format(i))
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+
+        # Run every subtask synchronously as soon as it is queued.
+        chunk_task = Mock()
+        chunk_task.subtask.side_effect = lambda args, **kwargs: Mock(
+            apply_async=lambda: upload_grades_csv_chunk(*args)
+        )
+        queue_grade_report_subtasks(None, chunk_task, entry.id, self.course.id, None, 'graded')
+        self.assertEqual(chunk_task.subtask.call_count, 3)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            usernames = [row['username'] for row in unicodecsv.DictReader(csv_file)]
+        self.assertEqual(usernames, ['student{0}'.format(i) for i in range(5)])
+        self.assertEqual(report_store.partial_names(self.course.id, entry.task_id), [])
+
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper.upload_csv_to_report_store')
+    def test_sharded_grade_report_merge_failure(self, mock_upload):
+        """
+        Test that a failing merge marks the task as failed and releases its lock.
+        """
+        mock_upload.side_effect = IOError("disk full")
+        for i in range(3):
+            self.create_student('student{0}'.format(i))
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+        chunk_task = Mock()
+        chunk_task.subtask.side_effect = lambda args, **kwargs: Mock(
+            apply_async=lambda: upload_grades_csv_chunk(*args)
+        )
+        with self.assertRaises(IOError):
+            queue_grade_report_subtasks(None, chunk_task, entry.id, self.course.id, None, 'graded')
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], "disk full")
+        self.assertIsNone(cache.get(u"grade-report-merge-{}".format(entry.id)))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.partial_names(self.course.id, entry.task_id), [])
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_sharded_grade_report_without_students(self, _mock_current_task):
+        """
+        Test that a course without students gets its report without queueing subtasks.
+        """
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+        chunk_task = Mock()
+        result = queue_grade_report_subtasks(None, chunk_task, entry.id, self.course.id, None, 'graded')
+        self.assertFalse(chunk_task.subtask.called)
+        self.assertDictContainsSubset({'attempted': 0, 'succeeded': 0, 'failed': 0}, result)
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).subtasks, '')
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            self.assertEqual(list(unicodecsv.DictReader(csv_file)), [])
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -1478,6 +1567,7 @@ class TestGradeReportEnrollmentAndCertificateInfo(TestReportMixin, InstructorTas
         self._verify_csv_data(user.username, expected_output)
 
 
+@ddt.ddt
 @override_settings(CERT_QUEUE='test-queue')
 class TestCertificateGeneration(InstructorTaskModuleTestCase):
     """
@@ -1527,3 +1617,27 @@ class TestCertificateGeneration(InstructorTaskModuleTestCase):
             },
             result
         )
+
+    @ddt.data(True, False)
+    def test_certificate_generation_batch_grading(self, batch_grading):
+        """
+        Verify that students are only graded ahead of their certificate request with batch grading.
+        """
+        students = [self.create_student(username='student_{}'.format(i)) for i in xrange(2)]
+        gradeset = {'percent': 0.5}
+        with patch.dict('django.conf.settings.FEATURES', {'ENABLE_BATCH_GRADING': batch_grading}):
+            with patch('instructor_task.tasks_helper._get_current_task'):
+                with patch('instructor_task.tasks_helper.iterate_grades_for') as mock_iterate_grades_for:
+                    mock_iterate_grades_for.side_effect = lambda course, students: (
+                        (student, gradeset, "") for student in students
+                    )
+                    with patch('instructor_task.tasks_helper.generate_user_certificates') as mock_generate:
+                        mock_generate.return_value = CertificateStatuses.generating
+                        generate_students_certificates(None, None, self.course.id, None, 'certificates generated')
+        self.assertEqual(mock_iterate_grades_for.called, batch_grading)
+        self.assertEqual(
+            set(call_args[0][0] for call_args in mock_generate.call_args_list),
+            set(students),
+        )
+        for call_args in mock_generate.call_args_list:
+            self.assertEqual(call_args[1]['grade_summary'], gradeset if batch_grading else None)
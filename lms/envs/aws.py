@@ -191,6 +191,14 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES', COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES
+)
+CONTENTSERVER_DISK_CACHE = ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', CONTENTSERVER_DISK_CACHE)
+CONTENTSERVER_ASSET_CACHE_TTL = ENV_TOKENS.get('CONTENTSERVER_ASSET_CACHE_TTL', CONTENTSERVER_ASSET_CACHE_TTL)
+CONTENTSERVER_COURSE_ASSET_CACHE_TTLS = ENV_TOKENS.get(
+    'CONTENTSERVER_COURSE_ASSET_CACHE_TTLS', CONTENTSERVER_COURSE_ASSET_CACHE_TTLS
+)
 
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -272,6 +280,8 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_CLIENT.update(ENV_TOKENS.get("COMMENTS_SERVICE_CLIENT", {}))
+DISCUSSION_ID_MAP_CACHE_SIZE = ENV_TOKENS.get('DISCUSSION_ID_MAP_CACHE_SIZE', DISCUSSION_ID_MAP_CACHE_SIZE)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -294,7 +304,10 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
     else:
         CODE_JAIL[name] = value
 
+CODE_JAIL_POOL.update(ENV_TOKENS.get('CODE_JAIL_POOL', {}))
+
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_CACHE = ENV_TOKENS.get('SAFE_EXEC_CACHE', SAFE_EXEC_CACHE)
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -515,6 +528,7 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADE_REPORT_STUDENTS_PER_TASK = ENV_TOKENS.get('GRADE_REPORT_STUDENTS_PER_TASK', GRADE_REPORT_STUDENTS_PER_TASK)
 
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
@@ -669,6 +683,7 @@ if FEATURES.get('CUSTOM_COURSES_EDX'):
     FIELD_OVERRIDE_PROVIDERS += (
         'ccx.overrides.CustomCoursesForEdxOverrideProvider',
     )
+CCX_OVERRIDES_CACHE_TIMEOUT = ENV_TOKENS.get('CCX_OVERRIDES_CACHE_TIMEOUT', CCX_OVERRIDES_CACHE_TIMEOUT)
 
 ##### Individual Due Date Extensions #####
 if FEATURES.get('INDIVIDUAL_DUE_DATES'):
@@ -61,6 +61,20 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Number of course versions whose discussion id maps each process keeps in
+# memory, in front of the CourseStructure table. 0 disables it.
+DISCUSSION_ID_MAP_CACHE_SIZE = 100
+
+# Client of the comments service: the number of connections each process keeps
+# open to it, the retries of failed requests, the default timeout of requests
+# in seconds, and the number of requests sent at once by batch lookups.
+COMMENTS_SERVICE_CLIENT = {
+    'POOL_SIZE': 10,
+    'RETRIES': 2,
+    'TIMEOUT': 5,
+    'MAX_CONCURRENT_REQUESTS': 10,
+}
+
 
 # Features
 FEATURES = {
@@ -406,6 +420,22 @@ FEATURES = {
     # Enable the max score cache to speed up grading
     'ENABLE_MAX_SCORE_CACHE': True,
 
+    # Persist per-subsection grades so that grading a student only recomputes
+    # the subsections whose scores changed since the last time they were graded
+    'ENABLE_PERSISTENT_SUBSECTION_GRADES': False,
+
+    # Grade students in batches that share one traversal of the course and
+    # load their courseware state and submissions scores with a query per batch
+    'ENABLE_BATCH_GRADING': False,
+
+    # Split grade report generation into subtasks that grade chunks of
+    # students in parallel, and merge their partial CSVs when all are done
+    'ENABLE_SHARDED_GRADE_REPORTS': False,
+
+    # Render the courseware table of contents and resolve jump_to links from the
+    # navigation index stored with each published course's CourseStructure
+    'ENABLE_COURSE_NAVIGATION_INDEX': False,
+
     # Enable LTI Provider feature.
     'ENABLE_LTI_PROVIDER': False,
 }
@@ -755,6 +785,22 @@ MODULESTORE = {
     }
 }
 
+# Maximum total size, in bytes, of the serialized split modulestore course structures
+# each process keeps in memory in front of the 'course_structure_cache'. 0 disables it.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+
+# Local directory in which the StaticContentServer keeps the contents of assets that are
+# too large for memcached or requested by byte range, shared by the processes of a server,
+# e.g. {'DIRECTORY': '/edx/var/contentserver_cache', 'MAX_SIZE': 1024 * 1024 * 1024}.
+# None disables it.
+CONTENTSERVER_DISK_CACHE = None
+
+# Number of seconds for which public caches (browsers, CDNs) may keep unlocked assets,
+# by default and by course id. Courses are matched on organization and course number.
+# 0 sends no Cache-Control header for them.
+CONTENTSERVER_ASSET_CACHE_TTL = 0
+CONTENTSERVER_COURSE_ASSET_CACHE_TTLS = {}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -770,6 +816,16 @@ CODE_JAIL = {
     },
 }
 
+# Pool of sandboxed Python processes that have already imported the modules problem
+# code uses, which execute problem code in place of a new sandboxed Python each time.
+# Only used when CODE_JAIL has a python_bin.
+CODE_JAIL_POOL = {
+    # Number of processes in the pool of each LMS process. 0 disables the pool.
+    'size': 0,
+    # Number of executions after which a process of the pool is replaced.
+    'max_jobs': 100,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -780,6 +836,19 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Cache of the results of executing problem code in the sandbox, so that problems
+# with the same code, inputs and random seed run it once. None disables it.
+SAFE_EXEC_CACHE = {
+    # Name of the cache in CACHES the results are stored in.
+    'CACHE': 'default',
+    # Seconds results are kept for. None uses the timeout of the cache.
+    'TIMEOUT': None,
+    # Seconds the results of code that raised an exception are kept for.
+    'ERROR_TIMEOUT': 5 * 60,
+    # Size in bytes of the JSON of the largest result that is cached.
+    'MAX_RESULT_SIZE': 512 * 1024,
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -2191,6 +2260,10 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# When ENABLE_SHARDED_GRADE_REPORTS is on, the number of students graded by
+# each subtask of a grade report
+GRADE_REPORT_STUDENTS_PER_TASK = 500
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-financial-reports',
@@ -2595,6 +2668,10 @@ CHECKPOINT_PATTERN = r'(?P<checkpoint_name>[^/]+)'
 # this setting.
 FIELD_OVERRIDE_PROVIDERS = ()
 
+# Number of seconds the field overrides of a CCX are cached for, between
+# requests (0 to only cache them for the duration of a request).
+CCX_OVERRIDES_CACHE_TIMEOUT = 60 * 60
+
 # PROFILE IMAGE CONFIG
 # WARNING: Certain django storage backends do not support atomic
 # file overwrites (including the default, OverwriteStorage) - instead
@@ -221,6 +221,12 @@ CACHES = {
     },
 }
 
+# Keep the course structure cache a no-op in tests, in-process tier included
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 0
+
+# Course structures are deleted and regenerated within tests, so don't keep discussion id maps between them
+DISCUSSION_ID_MAP_CACHE_SIZE = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
@@ -510,6 +516,8 @@ FACEBOOK_API_VERSION = "v2.2"
 ######### custom courses #########
 INSTALLED_APPS += ('ccx',)
 FEATURES['CUSTOM_COURSES_EDX'] = True
+# CCX ids get reused between tests, which would otherwise see each other's cached overrides
+CCX_OVERRIDES_CACHE_TIMEOUT = 0
 
 # Set dummy values for profile image settings.
 PROFILE_IMAGE_BACKEND = {
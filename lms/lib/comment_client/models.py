@@ -1,6 +1,7 @@
+import functools
 import logging
 
-from .utils import extract, perform_request, CommentClientRequestError
+from .utils import extract, perform_concurrently, perform_request, CommentClientRequestError
 
 
 log = logging.getLogger(__name__)
@@ -73,10 +74,31 @@ class Model(object):
             url,
             self.default_retrieve_params,
             metric_tags=self._metric_tags,
-            metric_action='model.retrieve'
+            metric_action='model.retrieve',
+            timeout=kwargs.get('timeout')
         )
         self._update_from_response(response)
 
+    @classmethod
+    def retrieve_many(cls, instances, **kwargs):
+        """
+        Retrieves the instances that aren't retrieved yet concurrently, with
+        the keyword arguments of `retrieve` (including the `timeout` of each
+        request), and returns them.
+        """
+        perform_concurrently([
+            functools.partial(instance.retrieve, **kwargs)
+            for instance in instances if not instance.retrieved
+        ])
+        return instances
+
+    @classmethod
+    def find_many(cls, ids, **kwargs):
+        """
+        Returns the retrieved instances with the given ids, fetched concurrently.
+        """
+        return cls.retrieve_many([cls.find(id) for id in ids], **kwargs)
+
     @property
     def _metric_tags(self):
         """
@@ -0,0 +1,108 @@
+"""
+Tests for the connection handling and concurrent requests of the comment client.
+"""
+import cookielib
+import json
+
+from django.test import TestCase
+from django.utils.translation import get_language, override
+from mock import Mock, patch
+from requests.packages.urllib3.exceptions import ReadTimeoutError
+
+from lms.lib.comment_client import utils
+from lms.lib.comment_client.comment import Comment
+
+
+def make_response(data, status_code=200):
+    """Make a stand-in for the response of the comments service."""
+    return Mock(status_code=status_code, text=json.dumps(data), json=Mock(return_value=data))
+
+
+class GetSessionTestCase(TestCase):
+    """
+    Test the session shared by the requests to the comments service.
+    """
+    def setUp(self):
+        super(GetSessionTestCase, self).setUp()
+        patcher = patch.multiple(utils, _session=None, _session_pid=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shared_per_process(self):
+        session = utils.get_session()
+        self.assertIs(utils.get_session(), session)
+        with patch('lms.lib.comment_client.utils.os.getpid', return_value=-1):
+            self.assertIsNot(utils.get_session(), session)
+
+    def test_pool_settings(self):
+        with self.settings(COMMENTS_SERVICE_CLIENT={'POOL_SIZE': 3, 'RETRIES': 1}):
+            adapter = utils.get_session().get_adapter('http://localhost:4567/api/v1')
+        self.assertEqual(adapter._pool_maxsize, 3)  # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 1)
+
+    def test_no_cookies(self):
+        session = utils.get_session()
+        cookie = cookielib.Cookie(
+            0, 'sessionid', 'secret', None, False, 'localhost', False, False, '/', False, False, None, False,
+            None, None, {}
+        )
+        session.cookies.set_cookie_if_ok(cookie, Mock())
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_reads_not_retried_for_post(self):
+        retry = utils.CommentServiceRetry(total=2)
+        self.assertEqual(retry.increment('GET', error=ReadTimeoutError(None, 'url', 'timeout')).total, 1)
+        with self.assertRaises(ReadTimeoutError):
+            retry.increment('POST', error=ReadTimeoutError(None, 'url', 'timeout'))
+
+    @patch('lms.lib.comment_client.utils.requests.Session.request', return_value=make_response({}))
+    def test_timeout(self, mock_request):
+        utils.perform_request('get', 'http://localhost:4567/api/v1/comments/1')
+        self.assertEqual(mock_request.call_args[1]['timeout'], 5)
+        utils.perform_request('get', 'http://localhost:4567/api/v1/comments/1', timeout=1)
+        self.assertEqual(mock_request.call_args[1]['timeout'], 1)
+
+
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Test calling functions concurrently.
+    """
+    def test_results_in_order(self):
+        functions = [lambda number=number: number * 2 for number in range(20)]
+        self.assertEqual(utils.perform_concurrently(functions), range(0, 40, 2))
+
+    def test_errors(self):
+        def fail():
+            """Fail like a request to the comments service."""
+            raise utils.CommentClientRequestError('Not found', 404)
+
+        with self.assertRaises(utils.CommentClientRequestError):
+            utils.perform_concurrently([lambda: 1, fail])
+
+    def test_language(self):
+        with override('eo'):
+            languages = utils.perform_concurrently([get_language, get_language])
+        self.assertEqual(languages, ['eo', 'eo'])
+
+
+@patch('lms.lib.comment_client.utils.requests.Session.request')
+class RetrieveManyTestCase(TestCase):
+    """
+    Test retrieving several models at once.
+    """
+    def test_find_many(self, mock_request):
+        mock_request.side_effect = lambda method, url, **kwargs: make_response(
+            {'id': url.rsplit('/', 1)[-1], 'body': 'Body of ' + url.rsplit('/', 1)[-1]}
+        )
+        comments = Comment.find_many(['1', '2', '3'], timeout=2)
+        self.assertEqual([comment.body for comment in comments], ['Body of 1', 'Body of 2', 'Body of 3'])
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_request.call_args[1]['timeout'], 2)
+
+    def test_retrieved_instances_skipped(self, mock_request):
+        mock_request.return_value = make_response({'id': '2', 'body': 'Body'})
+        retrieved = Comment.find('1')
+        retrieved.retrieved = True
+        comments = Comment.retrieve_many([retrieved, Comment.find('2')])
+        self.assertEqual(comments[1].body, 'Body')
+        self.assertEqual(mock_request.call_count, 1)
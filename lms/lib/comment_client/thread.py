@@ -136,7 +136,8 @@ class Thread(models.Model):
             url,
             request_params,
             metric_action='model.retrieve',
-            metric_tags=self._metric_tags
+            metric_tags=self._metric_tags,
+            timeout=kwargs.get('timeout')
         )
         self._update_from_response(response)
 
@@ -117,6 +117,7 @@ class User(models.Model):
 
     def _retrieve(self, *args, **kwargs):
         url = self.url(action='get', params=self.attributes)
+        timeout = kwargs.pop('timeout', None)
         retrieve_params = self.default_retrieve_params.copy()
         retrieve_params.update(kwargs)
         if self.attributes.get('course_id'):
@@ -130,6 +131,7 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                timeout=timeout,
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
@@ -142,6 +144,7 @@ class User(models.Model):
                     retrieve_params,
                     metric_action='model.retrieve',
                     metric_tags=self._metric_tags,
+                    timeout=timeout,
                 )
             else:
                 raise
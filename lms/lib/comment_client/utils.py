@@ -1,14 +1,124 @@
 from contextlib import contextmanager
+import cookielib
 import dogstats_wrapper as dog_stats_api
 import logging
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+import threading
 from django.conf import settings
+from multiprocessing.pool import ThreadPool
 from time import time
 from uuid import uuid4
-from django.utils.translation import get_language
+from django.utils.translation import get_language, override
 
 log = logging.getLogger(__name__)
 
+# Settings of the client of the comments service, which can be overridden by
+# the COMMENTS_SERVICE_CLIENT setting:
+# - POOL_SIZE: the number of connections to the service each process keeps open
+# - RETRIES: the number of times requests are retried after failing to connect
+#   (or after losing their response, for idempotent requests)
+# - TIMEOUT: the default number of seconds to wait for the service, per request
+# - MAX_CONCURRENT_REQUESTS: the number of requests perform_concurrently
+#   sends at once
+DEFAULT_CLIENT_SETTINGS = {
+    'POOL_SIZE': 10,
+    'RETRIES': 2,
+    'TIMEOUT': 5,
+    'MAX_CONCURRENT_REQUESTS': 10,
+}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def client_setting(name):
+    """
+    Returns the value of a setting of the client of the comments service.
+    """
+    return getattr(settings, 'COMMENTS_SERVICE_CLIENT', {}).get(name, DEFAULT_CLIENT_SETTINGS[name])
+
+
+class CommentServiceRetry(Retry):
+    """
+    Retries requests that failed to connect, and requests that lost their
+    response only if they are idempotent, since the service may have acted on
+    others.
+    """
+    def increment(self, method=None, *args, **kwargs):
+        retry = self
+        if method is not None and method.upper() not in self.method_whitelist:
+            retry = self.new(read=False)
+        return super(CommentServiceRetry, retry).increment(method, *args, **kwargs)
+
+
+class NoCookiesPolicy(cookielib.DefaultCookiePolicy):
+    """
+    Cookie policy of the shared session, which is used for all users and
+    so must not keep cookies.
+    """
+    def set_ok(self, cookie, request):
+        return False
+
+
+def get_session():
+    """
+    Returns the requests.Session of the current process, which keeps a pool
+    of connections to the comments service open.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    if _session_pid != os.getpid():
+        with _session_lock:
+            # Processes forked from the one that created the session can't share its connections.
+            if _session_pid != os.getpid():
+                session = requests.Session()
+                session.cookies.set_policy(NoCookiesPolicy())
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=client_setting('POOL_SIZE'),
+                    max_retries=CommentServiceRetry(total=client_setting('RETRIES')),
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def perform_concurrently(functions):
+    """
+    Calls the given functions, which usually perform requests to the comments
+    service, concurrently, and returns their results in the same order.
+
+    The first exception raised by a function is raised once they all return.
+    """
+    if len(functions) <= 1:
+        return [function() for function in functions]
+
+    # Translations are activated per thread
+    language = get_language()
+
+    def call(function):
+        """Call the function in a thread of the pool, returning its result or exception."""
+        try:
+            with override(language):
+                return function(), None
+        except Exception as error:  # pylint: disable=broad-except
+            return None, error
+
+    pool = ThreadPool(min(len(functions), client_setting('MAX_CONCURRENT_REQUESTS')))
+    try:
+        results = pool.map(call, functions)
+    finally:
+        pool.close()
+        pool.join()
+    for __, error in results:
+        if error is not None:
+            raise error
+    return [result for result, __ in results]
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -51,7 +161,7 @@ def request_timer(request_id, method, url, tags=None):
 
 
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False, timeout=None):
 
     if metric_tags is None:
         metric_tags = []
@@ -75,14 +185,16 @@ def perform_request(method, url, data_or_params=None, raw=False,
     else:
         data = None
         params = merge_dict(data_or_params, request_id_dict)
+    if timeout is None:
+        timeout = client_setting('TIMEOUT')
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
             params=params,
             headers=headers,
-            timeout=5
+            timeout=timeout
         )
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
@@ -29,6 +29,9 @@ def run():
 
     add_mimetypes()
 
+    if settings.CODE_JAIL_POOL['size']:
+        enable_sandbox_pool()
+
     if settings.FEATURES.get('USE_CUSTOM_THEME', False):
         enable_stanford_theme()
 
@@ -69,6 +72,14 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def enable_sandbox_pool():
+    """
+    Execute problem code in a pool of warm sandboxed processes.
+    """
+    from capa.safe_exec import configure_sandbox_pool
+    configure_sandbox_pool(settings.CODE_JAIL_POOL['size'], settings.CODE_JAIL_POOL['max_jobs'])
+
+
 def enable_stanford_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
@@ -30,6 +30,9 @@ class CourseStructure(TimeStampedModel):
     # JSON mapping of discussion ids to usage keys for the corresponding discussion modules
     discussion_id_map_json = CompressedTextField(verbose_name='Discussion ID Map JSON', blank=True, null=True)
 
+    # JSON navigation index of the published course (see navigation.py)
+    navigation_index_json = CompressedTextField(verbose_name='Navigation Index JSON', blank=True, null=True)
+
     @property
     def structure(self):
         """
@@ -0,0 +1,200 @@
+"""
+Navigation index of published courses.
+
+Rendering the courseware table of contents, and finding the path to a block
+for jump_to links, otherwise load and walk the course's blocks on every
+request. The navigation index holds the parts of the published course tree
+they need (parents, ordered children, and the display metadata of chapters and
+sections), so that they can answer from a single JSON document stored with the
+course's CourseStructure.
+"""
+import json
+import logging
+
+from django.core.cache import cache
+from opaque_keys.edx.keys import UsageKey
+from xmodule.fields import Date
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+log = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the index changes, so that old indexes are ignored.
+NAVIGATION_INDEX_VERSION = 1
+
+DATE_FIELD = Date()
+
+
+def course_navigation_version(course):
+    """
+    Returns a string identifying the published version of the course, which
+    changes whenever anything is published to it (empty for XML courses).
+    """
+    if course.subtree_edited_on is None:
+        return u''
+    return course.subtree_edited_on.isoformat()
+
+
+def generate_navigation_index(course):
+    """
+    Returns the navigation index of `course` (as loaded from the published branch), as a dict.
+    """
+    blocks = {}
+    blocks_stack = [(course, None, 0)]
+    while blocks_stack:
+        block, parent_key, depth = blocks_stack.pop()
+        key = unicode(block.location)
+        children = block.get_children() if block.has_children else []
+        entry = {
+            'parent': parent_key,
+            'children': [unicode(child.location) for child in children],
+        }
+
+        # Chapters and sections are listed in the table of contents
+        if depth in (1, 2):
+            entry['toc'] = {
+                'display_name': block.display_name_with_default,
+                'url_name': block.url_name,
+                'hide_from_toc': getattr(block, 'hide_from_toc', False),
+            }
+            if depth == 2:
+                entry['toc'].update({
+                    'format': getattr(block, 'format', None),
+                    'due': DATE_FIELD.to_json(getattr(block, 'due', None)),
+                    'graded': getattr(block, 'graded', False),
+                    'is_proctored_enabled': getattr(block, 'is_proctored_enabled', False),
+                })
+
+        blocks[key] = entry
+        blocks_stack.extend((child, key, depth + 1) for child in children)
+
+    return {
+        'version': NAVIGATION_INDEX_VERSION,
+        'course_version': course_navigation_version(course),
+        'root': unicode(course.location),
+        'blocks': blocks,
+    }
+
+
+def navigation_index_cache_key(course_key, course_version):
+    """
+    Returns the cache key of the navigation index of the given version of a course.
+    """
+    return u'course_structures.navigation_index.{}.{}'.format(course_key, course_version).encode('utf-8')
+
+
+def get_course_navigation_index(course):
+    """
+    Returns the CourseNavigationIndex of the published version of `course`, or
+    None if it isn't available (yet).
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructure
+
+    course_version = course_navigation_version(course)
+    cache_key = navigation_index_cache_key(course.id, course_version)
+    index_json = cache.get(cache_key)
+    if index_json is None:
+        try:
+            structure = CourseStructure.objects.only('course_id', 'navigation_index_json').get(course_id=course.id)
+        except CourseStructure.DoesNotExist:
+            return None
+        index_json = structure.navigation_index_json
+        if not index_json:
+            return None
+        cache.set(cache_key, index_json)
+
+    index = json.loads(index_json)
+    if index.get('version') != NAVIGATION_INDEX_VERSION or index['course_version'] != course_version:
+        # Built from another version of the course, which will be replaced by the index of this version.
+        log.info(u"Navigation index of course %s is not for version %s", course.id, course_version)
+        return None
+    return CourseNavigationIndex(course.id, index)
+
+
+class CourseNavigationIndex(object):
+    """
+    The navigation index of a published course version.
+
+    It answers `has_item`, `get_parent_location` and `get_child_locations` the
+    way the published branch of the modulestore does, and lists the chapters and
+    sections of the course with their display metadata.
+    """
+    def __init__(self, course_key, index):
+        self.course_key = course_key
+        self.course_version = index['course_version']
+        self.root = self._usage_key(index['root'])
+        self._blocks = index['blocks']
+
+    def _usage_key(self, usage_key_string):
+        """
+        Returns the usage key of a block of the index.
+        """
+        # Usage key strings might not include the course run, so we add it back in with map_into_course
+        return UsageKey.from_string(usage_key_string).map_into_course(self.course_key)
+
+    def _block(self, usage_key):
+        """
+        Returns the entry of the index for the block, or raises ItemNotFoundError.
+        """
+        try:
+            return self._blocks[unicode(usage_key)]
+        except KeyError:
+            raise ItemNotFoundError(usage_key)
+
+    def has_item(self, usage_key):
+        """
+        Returns whether the block is in the published course.
+        """
+        return unicode(usage_key) in self._blocks
+
+    def get_parent_location(self, usage_key):
+        """
+        Returns the usage key of the block's parent, or None if it's the course.
+        """
+        parent = self._block(usage_key)['parent']
+        return self._usage_key(parent) if parent is not None else None
+
+    def get_child_locations(self, usage_key):
+        """
+        Returns the usage keys of the block's children, in order.
+        """
+        return [self._usage_key(child) for child in self._block(usage_key)['children']]
+
+    def get_chapters(self):
+        """
+        Returns a NavigationItem for each chapter of the course, in order, with its sections.
+        """
+        chapters = []
+        for chapter_key in self._block(self.root)['children']:
+            chapter = self._blocks[chapter_key]
+            sections = [
+                NavigationItem(self._usage_key(section_key), self._blocks[section_key]['toc'])
+                for section_key in chapter['children']
+            ]
+            chapters.append(NavigationItem(self._usage_key(chapter_key), chapter['toc'], sections))
+        return chapters
+
+
+class NavigationItem(object):
+    """
+    A chapter or section of a course's navigation index.
+
+    Exposes the attributes of chapter and section modules that the table of
+    contents is rendered from, so that it can use either.
+    """
+    def __init__(self, location, toc, sections=None):
+        self.location = location
+        self.display_name_with_default = toc['display_name']
+        self.url_name = toc['url_name']
+        self.hide_from_toc = toc['hide_from_toc']
+        self.format = toc.get('format')
+        self.due = DATE_FIELD.from_json(toc.get('due'))
+        self.graded = toc.get('graded', False)
+        self.is_proctored_enabled = toc.get('is_proctored_enabled', False)
+        self.sections = sections or []
+
+    def get_display_items(self):
+        """
+        Returns the sections of a chapter.
+        """
+        return self.sections
@@ -6,8 +6,11 @@ import logging
 
 from celery.task import task
 from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
+from .navigation import generate_navigation_index
+
 
 log = logging.getLogger('edx.celery.task')
 
@@ -60,6 +63,17 @@ def _generate_course_structure(course_key):
         }
 
 
+def _generate_navigation_index(course_key):
+    """
+    Generates the navigation index of the published version of the specified course.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        with store.bulk_operations(course_key):
+            course = store.get_course(course_key, depth=None)
+            return generate_navigation_index(course)
+
+
 @task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
 def update_course_structure(course_key):
     """
@@ -77,22 +91,26 @@ def update_course_structure(course_key):
 
     try:
         structure = _generate_course_structure(course_key)
+        navigation_index = _generate_navigation_index(course_key)
     except Exception as ex:
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
 
     structure_json = json.dumps(structure['structure'])
     discussion_id_map_json = json.dumps(structure['discussion_id_map'])
+    navigation_index_json = json.dumps(navigation_index)
 
     structure_model, created = CourseStructure.objects.get_or_create(
         course_id=course_key,
         defaults={
             'structure_json': structure_json,
-            'discussion_id_map_json': discussion_id_map_json
+            'discussion_id_map_json': discussion_id_map_json,
+            'navigation_index_json': navigation_index_json,
         }
     )
 
     if not created:
         structure_model.structure_json = structure_json
         structure_model.discussion_id_map_json = discussion_id_map_json
+        structure_model.navigation_index_json = navigation_index_json
         structure_model.save()
@@ -3,13 +3,20 @@ Course Structure Content sub-application test cases
 """
 import json
 
+from mock import patch
 from xmodule_django.models import UsageKey
-from xmodule.modulestore.django import SignalHandler
+from xmodule.modulestore.django import SignalHandler, modulestore
+from xmodule.modulestore.search import path_to_location
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.navigation import (
+    NAVIGATION_INDEX_VERSION, get_course_navigation_index
+)
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
-from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
+from openedx.core.djangoapps.content.course_structures.tasks import (
+    _generate_course_structure, _generate_navigation_index, update_course_structure
+)
 
 
 class SignalDisconnectTestMixin(object):
@@ -235,3 +242,71 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
             [unicode(value) for value in structure.discussion_id_map.values()],
             expected_structure['discussion_id_map'].values()
         )
+
+
+class CourseNavigationIndexTests(SignalDisconnectTestMixin, ModuleStoreTestCase):
+    """
+    Test cases covering the course navigation index
+    """
+    def setUp(self):
+        super(CourseNavigationIndexTests, self).setUp()
+        self.course = CourseFactory.create(org='TestX', course='TS102', run='T1')
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Test Chapter')
+        self.sequential = ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Test Sequential', format='Homework', graded=True
+        )
+        self.vertical = ItemFactory.create(parent=self.sequential, category='vertical')
+        self.problem = ItemFactory.create(parent=self.vertical, category='problem')
+        CourseStructure.objects.all().delete()
+
+    def get_course(self):
+        """
+        Returns the published course, as the LMS loads it.
+        """
+        return modulestore().get_course(self.course.id, depth=0)
+
+    def test_generate_navigation_index(self):
+        index = _generate_navigation_index(self.course.id)
+        self.assertEqual(index['version'], NAVIGATION_INDEX_VERSION)
+        self.assertEqual(index['root'], unicode(self.course.location))
+        self.assertEqual(index['blocks'][unicode(self.chapter.location)]['children'], [unicode(self.sequential.location)])
+        self.assertEqual(index['blocks'][unicode(self.problem.location)]['parent'], unicode(self.vertical.location))
+
+        section_toc = index['blocks'][unicode(self.sequential.location)]['toc']
+        self.assertEqual(section_toc['display_name'], 'Test Sequential')
+        self.assertEqual(section_toc['format'], 'Homework')
+        self.assertTrue(section_toc['graded'])
+        self.assertNotIn('toc', index['blocks'][unicode(self.vertical.location)])
+
+    def test_get_course_navigation_index(self):
+        self.assertIsNone(get_course_navigation_index(self.get_course()))
+
+        update_course_structure(unicode(self.course.id))
+        index = get_course_navigation_index(self.get_course())
+        self.assertEqual(index.get_parent_location(self.sequential.location), self.chapter.location)
+        self.assertEqual(index.get_child_locations(self.vertical.location), [self.problem.location])
+
+        chapters = index.get_chapters()
+        self.assertEqual([chapter.location for chapter in chapters], [self.chapter.location])
+        self.assertEqual(chapters[0].display_name_with_default, 'Test Chapter')
+        self.assertEqual([section.location for section in chapters[0].get_display_items()], [self.sequential.location])
+
+    def test_stale_navigation_index(self):
+        update_course_structure(unicode(self.course.id))
+        ItemFactory.create(parent=self.chapter, category='sequential')
+        self.assertIsNone(get_course_navigation_index(self.get_course()))
+
+    def test_path_to_location(self):
+        update_course_structure(unicode(self.course.id))
+        index = get_course_navigation_index(self.get_course())
+        self.assertEqual(
+            path_to_location(modulestore(), self.problem.location, course_navigation_index=index),
+            path_to_location(modulestore(), self.problem.location),
+        )
+
+    def test_publish_clears_navigation_index(self):
+        update_course_structure(unicode(self.course.id))
+        with patch('openedx.core.djangoapps.content.course_structures.tasks.update_course_structure.apply_async'):
+            listen_for_course_publish(self, self.course.id)
+        structure = CourseStructure.objects.get(course_id=self.course.id)
+        self.assertIsNone(structure.navigation_index_json)